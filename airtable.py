@@ -4,10 +4,13 @@ All reads and writes to Airtable: Projects, Clients, Traffic table
 """
 
 import os
-import re
+import time
 import httpx
 from datetime import datetime
 
+import metrics
+from transforms import PROJECT_FIELDS, transform_projects
+
 # ===================
 # CONFIG
 # ===================
@@ -15,6 +18,9 @@ from datetime import datetime
 AIRTABLE_API_KEY = os.environ.get('AIRTABLE_API_KEY')
 AIRTABLE_BASE_ID = os.environ.get('AIRTABLE_BASE_ID', 'app8CI7NAZqhQ4G1Y')
 
+# Overridable so benchmarks can point at a local stand-in
+AIRTABLE_API_URL = os.environ.get('AIRTABLE_API_URL', 'https://api.airtable.com/v0')
+
 PROJECTS_TABLE = 'Projects'
 CLIENTS_TABLE = 'Clients'
 TRAFFIC_TABLE = 'Traffic'
@@ -22,63 +28,35 @@ UPDATES_TABLE = 'Updates'
 
 TIMEOUT = 10.0
 
+# Fields each reader consumes - requested via fields[] so Airtable skips the
+# rest (Projects carries many columns nobody here reads). Job cards go through
+# transform_projects, so they ask for its PROJECT_FIELDS.
+PROJECT_LOOKUP_FIELDS = [
+    'Job Number', 'Project Name', 'Client', 'Stage', 'Status', 'Round',
+    'With Client?', 'Teams Channel ID'
+]
+
 
 # ===================
-# DATE PARSING HELPERS (same as dot-hub-api)
+# JOB CARDS (same transform as dot-hub-api)
 # ===================
 
-def parse_friendly_date(friendly_str):
-    """Parse friendly date formats into ISO format"""
-    if not friendly_str or friendly_str.upper() == 'TBC':
-        return None
-    
-    match = re.search(r'(\d{1,2})\s+(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)', friendly_str, re.IGNORECASE)
-    if match:
-        day = int(match.group(1))
-        month_str = match.group(2).capitalize()
-        months = {'Jan': 1, 'Feb': 2, 'Mar': 3, 'Apr': 4, 'May': 5, 'Jun': 6,
-                  'Jul': 7, 'Aug': 8, 'Sep': 9, 'Oct': 10, 'Nov': 11, 'Dec': 12}
-        month = months.get(month_str)
-        if month:
-            year = datetime.now().year
-            try:
-                date = datetime(year, month, day)
-                if (datetime.now() - date).days > 180:
-                    date = datetime(year + 1, month, day)
-                return date.strftime('%Y-%m-%d')
-            except ValueError:
-                return None
-    
-    try:
-        date = datetime.strptime(friendly_str, '%d %B %Y')
-        return date.strftime('%Y-%m-%d')
-    except ValueError:
-        pass
-    
-    return None
+JOB_CARD_KEYS = (
+    'jobNumber', 'jobName', 'description', 'stage', 'status', 'updateDue',
+    'withClient', 'clientCode', 'update', 'lastUpdated', 'updateHistory',
+    'liveDate'
+)
 
 
-def parse_status_changed(status_str):
-    """Parse Status Changed field into ISO date"""
-    if not status_str:
-        return None
-    
-    if 'T' in status_str:
-        try:
-            date_part = status_str.split('T')[0]
-            return date_part
-        except:
-            pass
-    
-    match = re.search(r'(\d{1,2})/(\d{1,2})/(\d{4})', status_str)
-    if match:
-        day, month, year = int(match.group(1)), int(match.group(2)), int(match.group(3))
-        try:
-            return datetime(year, month, day).strftime('%Y-%m-%d')
-        except ValueError:
-            return None
-    
-    return None
+def _job_cards(records):
+    """Transform a page of Projects records into job card dicts"""
+    jobs = transform_projects(records, history_limit=5, stage_default='', status_default='')
+    cards = []
+    for job in jobs:
+        card = {key: job[key] for key in JOB_CARD_KEYS}
+        card['clientCode'] = card['clientCode'] or ''
+        cards.append(card)
+    return cards
 
 
 def _headers():
@@ -91,7 +69,19 @@ def _headers():
 
 def _url(table):
     """Build Airtable URL for a table"""
-    return f'https://api.airtable.com/v0/{AIRTABLE_BASE_ID}/{table}'
+    return f'{AIRTABLE_API_URL}/{AIRTABLE_BASE_ID}/{table}'
+
+
+def _request(method, url, **kwargs):
+    """httpx.request, timed and counted in metrics"""
+    started = time.perf_counter()
+    status = 'error'
+    try:
+        response = httpx.request(method, url, **kwargs)
+        status = response.status_code
+        return response
+    finally:
+        metrics.airtable_response(method, url, status, time.perf_counter() - started)
 
 
 # ===================
@@ -111,7 +101,8 @@ def check_duplicate(internet_message_id):
             'filterByFormula': f"{{internetMessageId}}='{internet_message_id}'"
         }
         
-        response = httpx.get(
+        response = _request(
+            'GET',
             _url(TRAFFIC_TABLE), 
             headers=_headers(), 
             params=params, 
@@ -139,7 +130,8 @@ def check_pending_clarify(conversation_id):
         filter_formula = f"AND({{conversationId}}='{conversation_id}', {{Status}}='pending')"
         params = {'filterByFormula': filter_formula}
         
-        response = httpx.get(
+        response = _request(
+            'GET',
             _url(TRAFFIC_TABLE), 
             headers=_headers(), 
             params=params, 
@@ -178,7 +170,8 @@ def log_traffic(internet_message_id, conversation_id, route, status, job_number,
             }
         }
         
-        response = httpx.post(
+        response = _request(
+            'POST',
             _url(TRAFFIC_TABLE), 
             headers=_headers(), 
             json=record_data, 
@@ -205,7 +198,8 @@ def update_traffic_record(record_id, updates):
         return False
     
     try:
-        response = httpx.patch(
+        response = _request(
+            'PATCH',
             f"{_url(TRAFFIC_TABLE)}/{record_id}",
             headers=_headers(),
             json={'fields': updates},
@@ -233,10 +227,12 @@ def get_project(job_number):
     
     try:
         params = {
-            'filterByFormula': f"{{Job Number}}='{job_number}'"
+            'filterByFormula': f"{{Job Number}}='{job_number}'",
+            'fields[]': PROJECT_LOOKUP_FIELDS
         }
         
-        response = httpx.get(
+        response = _request(
+            'GET',
             _url(PROJECTS_TABLE), 
             headers=_headers(), 
             params=params, 
@@ -292,11 +288,12 @@ def get_active_jobs(client_code):
     try:
         # Get all jobs that are NOT completed
         filter_formula = f"AND(FIND('{client_code}', {{Job Number}})=1, {{Status}}!='Completed')"
-        params = {'filterByFormula': filter_formula}
+        params = {'filterByFormula': filter_formula, 'fields[]': PROJECT_FIELDS}
         
         print(f"[airtable] Fetching active jobs for {client_code}")
         
-        response = httpx.get(
+        response = _request(
+            'GET',
             _url(PROJECTS_TABLE), 
             headers=_headers(), 
             params=params, 
@@ -308,53 +305,7 @@ def get_active_jobs(client_code):
         
         print(f"[airtable] Found {len(records)} active jobs for {client_code}")
         
-        jobs = []
-        for record in records:
-            fields = record.get('fields', {})
-            job_number = fields.get('Job Number', '')
-            
-            # Get update text - same as dot-hub-api
-            update_summary = fields.get('Update Summary', '') or fields.get('Update', '')
-            latest_update = update_summary
-            if '|' in update_summary:
-                parts = update_summary.split('|')
-                latest_update = parts[-1].strip() if parts else update_summary
-            
-            # Parse dates - same as dot-hub-api
-            update_due_friendly = fields.get('Update due friendly', '')
-            update_due = parse_friendly_date(update_due_friendly)
-            
-            live_date_raw = fields.get('Live Date', '')
-            live_date = parse_friendly_date(live_date_raw) if live_date_raw else None
-            
-            last_update_made = fields.get('Last update made', '')
-            last_updated = parse_status_changed(last_update_made)
-            
-            # Get update history - could be array or string
-            update_history_raw = fields.get('Update history', [])
-            if isinstance(update_history_raw, str):
-                update_history = [u.strip() for u in update_history_raw.split('\n') if u.strip()]
-            elif isinstance(update_history_raw, list):
-                update_history = update_history_raw[:5]
-            else:
-                update_history = []
-            
-            jobs.append({
-                'jobNumber': job_number,
-                'jobName': fields.get('Project Name', ''),
-                'description': fields.get('Description', ''),
-                'stage': fields.get('Stage', ''),
-                'status': fields.get('Status', ''),
-                'updateDue': update_due,
-                'withClient': fields.get('With Client?', False),
-                'clientCode': job_number.split()[0] if job_number else '',
-                'update': latest_update,
-                'lastUpdated': last_updated,
-                'updateHistory': update_history,
-                'liveDate': live_date,
-            })
-        
-        return jobs
+        return _job_cards(records)
         
     except Exception as e:
         print(f"[airtable] Error getting active jobs: {e}")
@@ -373,11 +324,12 @@ def get_all_active_jobs():
     try:
         # Get all jobs that are NOT completed
         filter_formula = "{Status}!='Completed'"
-        params = {'filterByFormula': filter_formula}
+        params = {'filterByFormula': filter_formula, 'fields[]': PROJECT_FIELDS}
         
         print(f"[airtable] Fetching all active jobs across all clients")
         
-        response = httpx.get(
+        response = _request(
+            'GET',
             _url(PROJECTS_TABLE), 
             headers=_headers(), 
             params=params, 
@@ -389,53 +341,7 @@ def get_all_active_jobs():
         
         print(f"[airtable] Found {len(records)} total active jobs")
         
-        jobs = []
-        for record in records:
-            fields = record.get('fields', {})
-            job_number = fields.get('Job Number', '')
-            
-            # Get update text - same as dot-hub-api
-            update_summary = fields.get('Update Summary', '') or fields.get('Update', '')
-            latest_update = update_summary
-            if '|' in update_summary:
-                parts = update_summary.split('|')
-                latest_update = parts[-1].strip() if parts else update_summary
-            
-            # Parse dates - same as dot-hub-api
-            update_due_friendly = fields.get('Update due friendly', '')
-            update_due = parse_friendly_date(update_due_friendly)
-            
-            live_date_raw = fields.get('Live Date', '')
-            live_date = parse_friendly_date(live_date_raw) if live_date_raw else None
-            
-            last_update_made = fields.get('Last update made', '')
-            last_updated = parse_status_changed(last_update_made)
-            
-            # Get update history - could be array or string
-            update_history_raw = fields.get('Update history', [])
-            if isinstance(update_history_raw, str):
-                update_history = [u.strip() for u in update_history_raw.split('\n') if u.strip()]
-            elif isinstance(update_history_raw, list):
-                update_history = update_history_raw[:5]
-            else:
-                update_history = []
-            
-            jobs.append({
-                'jobNumber': job_number,
-                'jobName': fields.get('Project Name', ''),
-                'description': fields.get('Description', ''),
-                'stage': fields.get('Stage', ''),
-                'status': fields.get('Status', ''),
-                'updateDue': update_due,
-                'withClient': fields.get('With Client?', False),
-                'clientCode': job_number.split()[0] if job_number else '',
-                'update': latest_update,
-                'lastUpdated': last_updated,
-                'updateHistory': update_history,
-                'liveDate': live_date,
-            })
-        
-        return jobs
+        return _job_cards(records)
         
     except Exception as e:
         print(f"[airtable] Error getting all active jobs: {e}")
@@ -457,12 +363,14 @@ def get_job_by_number(job_number):
         filter_formula = f"{{Job Number}}='{job_number}'"
         params = {
             'filterByFormula': filter_formula,
-            'maxRecords': 1
+            'maxRecords': 1,
+            'fields[]': PROJECT_FIELDS
         }
         
         print(f"[airtable] Fetching job: {job_number}")
         
-        response = httpx.get(
+        response = _request(
+            'GET',
             _url(PROJECTS_TABLE), 
             headers=_headers(), 
             params=params, 
@@ -476,48 +384,7 @@ def get_job_by_number(job_number):
             print(f"[airtable] Job {job_number} not found")
             return None
         
-        fields = records[0].get('fields', {})
-        
-        # Get update text - same as dot-hub-api
-        update_summary = fields.get('Update Summary', '') or fields.get('Update', '')
-        latest_update = update_summary
-        if '|' in update_summary:
-            parts = update_summary.split('|')
-            latest_update = parts[-1].strip() if parts else update_summary
-        
-        # Parse dates - same as dot-hub-api
-        update_due_friendly = fields.get('Update due friendly', '')
-        update_due = parse_friendly_date(update_due_friendly)
-        
-        live_date_raw = fields.get('Live Date', '')
-        live_date = parse_friendly_date(live_date_raw) if live_date_raw else None
-        
-        last_update_made = fields.get('Last update made', '')
-        last_updated = parse_status_changed(last_update_made)
-        
-        # Get update history - could be array or string
-        update_history_raw = fields.get('Update history', [])
-        if isinstance(update_history_raw, str):
-            update_history = [u.strip() for u in update_history_raw.split('\n') if u.strip()]
-        elif isinstance(update_history_raw, list):
-            update_history = update_history_raw[:5]
-        else:
-            update_history = []
-        
-        return {
-            'jobNumber': fields.get('Job Number', ''),
-            'jobName': fields.get('Project Name', ''),
-            'description': fields.get('Description', ''),
-            'stage': fields.get('Stage', ''),
-            'status': fields.get('Status', ''),
-            'updateDue': update_due,
-            'withClient': fields.get('With Client?', False),
-            'clientCode': job_number.split()[0] if job_number else '',
-            'update': latest_update,
-            'lastUpdated': last_updated,
-            'updateHistory': update_history,
-            'liveDate': live_date,
-        }
+        return _job_cards(records)[0]
         
     except Exception as e:
         print(f"[airtable] Error getting job by number: {e}")
@@ -553,10 +420,12 @@ def update_project_record(job_number, updates):
         # Find the project record
         params = {
             'filterByFormula': f"{{Job Number}}='{job_number}'",
-            'maxRecords': 1
+            'maxRecords': 1,
+            'fields[]': ['Job Number']
         }
         
-        response = httpx.get(
+        response = _request(
+            'GET',
             _url(PROJECTS_TABLE),
             headers=_headers(),
             params=params,
@@ -571,7 +440,8 @@ def update_project_record(job_number, updates):
         record_id = records[0]['id']
         
         # Update the record
-        response = httpx.patch(
+        response = _request(
+            'PATCH',
             f"{_url(PROJECTS_TABLE)}/{record_id}",
             headers=_headers(),
             json={'fields': updates},
@@ -606,10 +476,12 @@ def create_update_record(job_number, update_text, update_due=None):
         # First, find the project record ID to link to
         params = {
             'filterByFormula': f"{{Job Number}}='{job_number}'",
-            'maxRecords': 1
+            'maxRecords': 1,
+            'fields[]': ['Job Number']
         }
         
-        response = httpx.get(
+        response = _request(
+            'GET',
             _url(PROJECTS_TABLE),
             headers=_headers(),
             params=params,
@@ -633,7 +505,8 @@ def create_update_record(job_number, update_text, update_due=None):
             update_fields['Update due'] = update_due
         
         # Create the record
-        response = httpx.post(
+        response = _request(
+            'POST',
             _url(UPDATES_TABLE),
             headers=_headers(),
             json={'fields': update_fields},
@@ -665,10 +538,12 @@ def get_team_id(client_code):
     
     try:
         params = {
-            'filterByFormula': f"{{Client code}}='{client_code}'"
+            'filterByFormula': f"{{Client code}}='{client_code}'",
+            'fields[]': ['Teams ID']
         }
         
-        response = httpx.get(
+        response = _request(
+            'GET',
             _url(CLIENTS_TABLE), 
             headers=_headers(), 
             params=params, 
@@ -697,10 +572,12 @@ def get_client_name(client_code):
     
     try:
         params = {
-            'filterByFormula': f"{{Client code}}='{client_code}'"
+            'filterByFormula': f"{{Client code}}='{client_code}'",
+            'fields[]': ['Clients']
         }
         
-        response = httpx.get(
+        response = _request(
+            'GET',
             _url(CLIENTS_TABLE), 
             headers=_headers(), 
             params=params, 
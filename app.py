@@ -6,169 +6,187 @@ Ask Dot brain lives in ask_dot.py
 
 from flask import Flask, jsonify, request
 from flask_cors import CORS
-import requests
 import os
-import json
-from datetime import datetime
-import re
+from datetime import date, timedelta
 
 # Import Ask Dot brain
 import ask_dot
+import budgets
+import cache
+import events
+import metrics
+import mirror
+import people
+import profiler
+import responses
+import rollups
+import search
+import traces
+import transforms
+import webhooks
 
 app = Flask(__name__)
+app.json = responses.FastJSONProvider(app)
 CORS(app)
 
-AIRTABLE_API_KEY = os.environ.get('AIRTABLE_API_KEY')
-AIRTABLE_BASE_ID = os.environ.get('AIRTABLE_BASE_ID', 'app8CI7NAZqhQ4G1Y')
-
-HEADERS = {
-    'Authorization': f'Bearer {AIRTABLE_API_KEY}',
-    'Content-Type': 'application/json'
-}
-
-def get_airtable_url(table):
-    return f'https://api.airtable.com/v0/{AIRTABLE_BASE_ID}/{table}'
+# Serve the last saved mirrors straight away; syncs catch them up from there
+mirror.load_all()
 
 
-# ===== DATE PARSING HELPERS =====
-def parse_friendly_date(friendly_str):
-    """Parse friendly date formats into ISO format"""
-    if not friendly_str or friendly_str.upper() == 'TBC':
-        return None
-    
-    match = re.search(r'(\d{1,2})\s+(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)', friendly_str, re.IGNORECASE)
-    if match:
-        day = int(match.group(1))
-        month_str = match.group(2).capitalize()
-        months = {'Jan': 1, 'Feb': 2, 'Mar': 3, 'Apr': 4, 'May': 5, 'Jun': 6,
-                  'Jul': 7, 'Aug': 8, 'Sep': 9, 'Oct': 10, 'Nov': 11, 'Dec': 12}
-        month = months.get(month_str)
-        if month:
-            year = datetime.now().year
-            try:
-                date = datetime(year, month, day)
-                if (datetime.now() - date).days > 180:
-                    date = datetime(year + 1, month, day)
-                return date.strftime('%Y-%m-%d')
-            except ValueError:
-                return None
+def snapshot_response(snapshot):
+    """Serve a cached snapshot, or 304 if the client already has this version"""
+    encoding = responses.negotiate_encoding(request, len(snapshot.body))
+    etag = snapshot.etag_for(encoding)
     
-    try:
-        date = datetime.strptime(friendly_str, '%d %B %Y')
-        return date.strftime('%Y-%m-%d')
-    except ValueError:
-        pass
-    
-    return None
-
-def parse_status_changed(status_str):
-    """Parse Status Changed field into ISO date"""
-    if not status_str:
-        return None
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(snapshot.encoded(encoding), mimetype='application/json')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
     
-    if 'T' in status_str:
-        try:
-            date_part = status_str.split('T')[0]
-            return date_part
-        except:
-            pass
-    
-    match = re.search(r'(\d{1,2})/(\d{1,2})/(\d{4})', status_str)
-    if match:
-        day, month, year = int(match.group(1)), int(match.group(2)), int(match.group(3))
+    response.set_etag(etag)
+    response.vary.add('Accept-Encoding')
+    # List routes answer NDJSON instead when Accept asks for it
+    response.vary.add('Accept')
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def wants_ndjson():
+    """?format=ndjson, or an Accept header that prefers NDJSON to JSON"""
+    if request.args.get('format') == 'ndjson':
+        return True
+    return request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson']) == 'application/x-ndjson'
+
+
+def wants_list():
+    """Whether a list endpoint should page (?limit=, ?cursor=) or stream rather than serve its snapshot"""
+    return 'limit' in request.args or 'cursor' in request.args or wants_ndjson()
+
+
+def list_response(rows, key, name, project=None):
+    """
+    Rows of a large list, paged and/or streamed as the request asks:
+    ?limit= (and ?cursor= from the last page) serves one page in key order
+    as {name: rows, nextCursor}; NDJSON streams one row per line, a chunk
+    at a time, with the next cursor in X-Next-Cursor.
+    Raises ValueError for a bad limit or cursor.
+    """
+    next_cursor = None
+    if 'limit' in request.args or 'cursor' in request.args:
         try:
-            return datetime(year, month, day).strftime('%Y-%m-%d')
+            limit = int(request.args.get('limit', responses.DEFAULT_PAGE_SIZE))
         except ValueError:
-            return None
+            raise ValueError('limit must be a number')
+        rows, next_cursor = responses.paginate(rows, key, limit, request.args.get('cursor'))
     
-    return None
-
-def extract_client_code(job_number):
-    """Extract client code from job number like 'SKY 017' -> 'SKY'"""
-    if not job_number:
-        return None
-    parts = job_number.split(' ')
-    return parts[0] if parts else None
-
-def transform_project(record):
-    """Transform Airtable record to frontend format"""
-    fields = record.get('fields', {})
-    job_number = fields.get('Job Number', '')
-    
-    update_summary = fields.get('Update Summary', '') or fields.get('Update', '')
-    latest_update = update_summary
-    if '|' in update_summary:
-        parts = update_summary.split('|')
-        latest_update = parts[-1].strip() if parts else update_summary
-    
-    update_due_friendly = fields.get('Update due friendly', '')
-    update_due = parse_friendly_date(update_due_friendly)
-    
-    live_date_raw = fields.get('Live Date', '')
-    live_date = parse_friendly_date(live_date_raw) if live_date_raw else None
-    
-    last_update_made = fields.get('Last update made', '')
-    last_updated = parse_status_changed(last_update_made)
-    
-    with_client = bool(fields.get('With Client?', False))
-    
-    # Get update history - could be array or string
-    update_history_raw = fields.get('Update history', [])
-    if isinstance(update_history_raw, str):
-        # If it's a string, split by newlines or some delimiter
-        update_history = [u.strip() for u in update_history_raw.split('\n') if u.strip()]
-    elif isinstance(update_history_raw, list):
-        update_history = update_history_raw
-    else:
-        update_history = []
-    
-    return {
-        'jobNumber': job_number,
-        'jobName': fields.get('Project Name', ''),
-        'clientCode': extract_client_code(job_number),
-        'client': fields.get('Client', ''),
-        'description': fields.get('Description', ''),
-        'projectOwner': fields.get('Project Owner', ''),
-        'update': latest_update,
-        'updateHistory': update_history,
-        'updateDue': update_due,
-        'liveDate': live_date,
-        'lastUpdated': last_updated,
-        'stage': fields.get('Stage', 'Triage'),
-        'status': fields.get('Status', 'Incoming'),
-        'withClient': with_client,
-        'channelUrl': fields.get('Channel Url', ''),
-        'teamsChannelId': fields.get('Teams Channel ID', '')
-    }
+    if wants_ndjson():
+        response = app.response_class(responses.ndjson_chunks(rows, app.json.dumps_bytes, project),
+                                      mimetype='application/x-ndjson')
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['X-Accel-Buffering'] = 'no'
+        response.vary.add('Accept')
+        return response
+    
+    if project is not None:
+        rows = [project(row) for row in rows]
+    response = jsonify({name: rows, 'nextCursor': next_cursor})
+    response.vary.add('Accept')
+    return response
+
+
+# Registered before compress_response so it runs after it (after_request
+# hooks run in reverse) and the timing includes compression
+@app.before_request
+def start_request_metrics():
+    metrics.start_request()
+
+
+@app.after_request
+def record_request_metrics(response):
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    stats = metrics.finish_request(route, request.method, response.status_code)
+    if stats is not None:
+        response.headers['Server-Timing'] = metrics.server_timing(stats)
+        metrics.log_if_slow(request.method, request.full_path.rstrip('?'), stats)
+        traces.record(request, response.status_code, stats['total'])
+    return response
+
+
+@app.after_request
+def compress_response(response):
+    return responses.compress_response(request, response)
+
+
+# ===== METRICS =====
+@app.route('/metrics')
+def get_metrics():
+    """Prometheus scrape endpoint - totals across every worker"""
+    if metrics.METRICS_TOKEN and request.headers.get('Authorization') != f'Bearer {metrics.METRICS_TOKEN}':
+        return jsonify({'error': 'Unauthorized'}), 401
+    return app.response_class(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+# ===== PROFILES =====
+@app.route('/debug/profiles/<profile_id>')
+def get_profile(profile_id):
+    """
+    A saved request profile (see profiler.py) as collapsed stacks for
+    flamegraph.pl / speedscope, or ?format=summary for per-function wall time.
+    Needs the profile token, like the request that made it.
+    """
+    if not profiler.requested():
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    folded = profiler.load(profile_id)
+    if folded is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    
+    if request.args.get('format') == 'summary':
+        return jsonify(profiler.summarize(folded))
+    return app.response_class(folded, mimetype='text/plain')
 
 
 # ===== HEALTH CHECK =====
 @app.route('/')
 def health():
+    # Ready only once the mirrors hold data, so the platform holds traffic
+    # back from a worker that would otherwise block on a cold Airtable load
+    mirror.start_background_sync()
+    if not mirror.ready():
+        return jsonify({'status': 'warming', 'service': 'dot-remote-api'}), 503
     return jsonify({'status': 'ok', 'service': 'dot-remote-api'})
 
 
 # ===== CLIENTS =====
+def load_clients():
+    """All clients, sorted by name"""
+    clients = []
+    for fields in mirror.clients.rows():
+        clients.append({
+            'code': fields.get('Client code', ''),
+            'name': fields.get('Clients', ''),
+            'teamsId': fields.get('Teams ID', ''),
+            'sharepointId': fields.get('Sharepoint ID', '')
+        })
+    
+    clients.sort(key=lambda x: x['name'])
+    return clients
+
+clients_snapshots = cache.SnapshotCache('clients', load_clients, dumps=app.json.dumps_bytes)
+
+@mirror.clients.on_change
+def clients_changed(changed, removed, previous):
+    clients_snapshots.invalidate()
+    tracker_clients_snapshots.invalidate()
+    budget_snapshots.invalidate()
+
 @app.route('/clients')
 def get_clients():
     try:
-        url = get_airtable_url('Clients')
-        response = requests.get(url, headers=HEADERS)
-        response.raise_for_status()
-        
-        records = response.json().get('records', [])
-        clients = []
-        for record in records:
-            fields = record.get('fields', {})
-            clients.append({
-                'code': fields.get('Client code', ''),
-                'name': fields.get('Clients', ''),
-                'teamsId': fields.get('Teams ID', ''),
-                'sharepointId': fields.get('Sharepoint ID', '')
-            })
-        
-        clients.sort(key=lambda x: x['name'])
-        return jsonify(clients)
+        return snapshot_response(clients_snapshots.get())
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -177,47 +195,12 @@ def get_clients():
 # ===== PEOPLE =====
 @app.route('/people/<client_code>')
 def get_people_for_client(client_code):
-    """Get people/contacts for a specific client"""
+    """Get people/contacts for a specific client (One NZ divisions share theirs)"""
     try:
-        url = get_airtable_url('People')
-        
-        # Handle One NZ divisions - search for ONE, ONB, or ONS
-        if client_code in ['ONE', 'ONB', 'ONS']:
-            filter_formula = "AND({Active} = TRUE(), OR({Client Link} = 'ONE', {Client Link} = 'ONB', {Client Link} = 'ONS'))"
-        else:
-            filter_formula = f"AND({{Active}} = TRUE(), {{Client Link}} = '{client_code}')"
-        
-        params = {
-            'filterByFormula': filter_formula
-        }
-        
-        all_people = []
-        offset = None
-        
-        while True:
-            if offset:
-                params['offset'] = offset
-            
-            response = requests.get(url, headers=HEADERS, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            for record in data.get('records', []):
-                fields = record.get('fields', {})
-                name = fields.get('Name', fields.get('Full name', ''))
-                if name:
-                    all_people.append({
-                        'name': name,
-                        'email': fields.get('Email Address', ''),
-                        'clientCode': fields.get('Client Link', '')
-                    })
-            
-            offset = data.get('offset')
-            if not offset:
-                break
-        
-        # Sort by name
-        all_people.sort(key=lambda x: x['name'])
+        all_people = [
+            {'name': person['name'], 'email': person['email'], 'clientCode': person['clientCode']}
+            for person in people.directory.search(client_code)
+        ]
         return jsonify(all_people)
     
     except Exception as e:
@@ -225,37 +208,90 @@ def get_people_for_client(client_code):
 
 
 # ===== JOBS =====
+ACTIVE_STATUSES = ('Incoming', 'In Progress', 'On Hold')
+
+# Named projections for ?view= - a card is everything but the update history,
+# which the job's history endpoint serves a page at a time
+JOB_VIEWS = {
+    'full': None,
+    'card': tuple(key for key in transforms.Job.KEYS if key != 'updateHistory'),
+}
+
+def job_fields():
+    """
+    The projection a jobs list asked for: ?fields=jobNumber,status or
+    ?view=card, else None (every field). Raises ValueError for unknown names.
+    Fields come back in Job.KEYS order, so every spelling of one selection
+    shares a snapshot.
+    """
+    names = request.args.get('fields')
+    if names:
+        wanted = {name.strip() for name in names.split(',') if name.strip()}
+        unknown = sorted(wanted.difference(transforms.Job.KEYS))
+        if unknown:
+            raise ValueError(f"Unknown job fields: {', '.join(unknown)}")
+        return tuple(key for key in transforms.Job.KEYS if key in wanted) or None
+    view = request.args.get('view', 'full')
+    if view not in JOB_VIEWS:
+        raise ValueError(f"view must be one of {', '.join(JOB_VIEWS)}")
+    return JOB_VIEWS[view]
+
+def project_job(fields):
+    """job -> dict of just fields, or None when fields is None (every field)"""
+    if fields is None:
+        return None
+    return lambda job: {key: job[key] for key in fields}
+
+def project_jobs(jobs, fields):
+    """Jobs as dicts of just fields (all of them when fields is None)"""
+    if fields is None:
+        return jobs
+    return list(map(project_job(fields), jobs))
+
+def job_number(job):
+    return job['jobNumber']
+
+def is_active_job(job):
+    return job['status'] in ACTIVE_STATUSES
+
+def active_jobs():
+    """Active jobs from the status index - by status in ACTIVE_STATUSES order, Airtable order within each"""
+    return mirror.projects.query([('status', ACTIVE_STATUSES)])
+
+def load_active_jobs(fields=None):
+    """All active jobs (Incoming, In Progress, On Hold), optionally projected to fields"""
+    return project_jobs(active_jobs(), fields)
+
+active_jobs_snapshots = cache.SnapshotCache('jobs', load_active_jobs, dumps=app.json.dumps_bytes)
+
+@mirror.projects.on_change
+def projects_changed(changed, removed, previous):
+    active_jobs_snapshots.invalidate()
+    for record_id, job in changed:
+        old = previous.get(record_id)
+        if old is not None and old['clientCode'] != job['clientCode']:
+            # Moved client - gone from the old client's stream
+            events.bus.publish('job-removed', {'jobNumber': old['jobNumber']}, old['clientCode'])
+        events.bus.publish('job', job, job['clientCode'])
+    for _, job in removed:
+        events.bus.publish('job-removed', {'jobNumber': job['jobNumber']}, job['clientCode'])
+
+
 @app.route('/jobs/all')
+@profiler.profiled
 def get_all_jobs():
-    """Get all active jobs"""
+    """
+    Get all active jobs - ?view=card or ?fields= for a slimmer list,
+    ?limit=/?cursor= for pages by job number, ?format=ndjson to stream
+    """
     try:
-        url = get_airtable_url('Projects')
-        
-        active_statuses = ['Incoming', 'In Progress', 'On Hold']
-        formula_parts = [f"{{Status}} = '{s}'" for s in active_statuses]
-        params = {
-            'filterByFormula': f"OR({', '.join(formula_parts)})"
-        }
-        
-        all_records = []
-        offset = None
-        
-        while True:
-            if offset:
-                params['offset'] = offset
-            
-            response = requests.get(url, headers=HEADERS, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            for record in data.get('records', []):
-                all_records.append(transform_project(record))
-            
-            offset = data.get('offset')
-            if not offset:
-                break
-        
-        return jsonify(all_records)
+        fields = job_fields()
+        if wants_list():
+            return list_response(active_jobs(), job_number, 'jobs', project_job(fields))
+        return snapshot_response(active_jobs_snapshots.get(fields))
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -263,32 +299,253 @@ def get_all_jobs():
 
 @app.route('/jobs/client/<client_code>')
 def get_client_jobs(client_code):
-    """Get all jobs for a specific client"""
+    """
+    Get all jobs for a specific client - ?view=card or ?fields= for a slimmer
+    list, ?limit=/?cursor= for pages by job number, ?format=ndjson to stream
+    """
+    try:
+        all_records = mirror.projects.lookup('client', client_code)
+        fields = job_fields()
+        if wants_list():
+            return list_response(all_records, job_number, 'jobs', project_job(fields))
+        
+        response = jsonify(project_jobs(all_records, fields))
+        response.vary.add('Accept')
+        return response
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+DATE_RANGES = {
+    'today': (0, 0),
+    'tomorrow': (1, 1),
+    'week': (0, 6),
+}
+
+@app.route('/jobs/query')
+def query_jobs():
+    """
+    Jobs matching Dot's job filter, answered from the Projects indexes:
+    ?client=SKY&status=On Hold&stage=Craft&withClient=true&dateRange=week
+    (today | tomorrow | week, on updateDue or ?dateField=liveDate) and
+    ?search=term (repeatable; a job matches any term).
+    status defaults to the active statuses; status=all drops the filter.
+    ?view=card or ?fields= slims the jobs, as on /jobs/all.
+    """
+    args = request.args
+    try:
+        fields = job_fields()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    equals = []
+    if args.get('client'):
+        equals.append(('client', args['client']))
+    status = args.get('status')
+    if status != 'all':
+        equals.append(('status', {status} if status else ACTIVE_STATUSES))
+    if args.get('stage'):
+        equals.append(('stage', args['stage']))
+    if args.get('withClient') in ('true', 'false'):
+        equals.append(('withClient', args['withClient'] == 'true'))
+    
+    ranges = []
+    date_range = args.get('dateRange')
+    if date_range:
+        if date_range not in DATE_RANGES:
+            return jsonify({'error': f"dateRange must be one of {', '.join(DATE_RANGES)}"}), 400
+        date_field = args.get('dateField', 'updateDue')
+        if date_field not in ('updateDue', 'liveDate'):
+            return jsonify({'error': 'dateField must be updateDue or liveDate'}), 400
+        start, end = DATE_RANGES[date_range]
+        today = date.today()
+        ranges.append((date_field, (today + timedelta(days=start)).isoformat(),
+                       (today + timedelta(days=end)).isoformat()))
+    
+    try:
+        jobs = mirror.projects.query(equals, ranges)
+        
+        terms = [term for term in args.getlist('search') if term.strip()]
+        if terms:
+            # Rank the filtered jobs by their best-scoring term
+            allowed = {job['jobNumber'] for job in jobs}
+            scores = {}
+            for term in terms:
+                for score, job in search.jobs.search(term, where=lambda job: job['jobNumber'] in allowed):
+                    if score > scores.get(job['jobNumber'], (0, None))[0]:
+                        scores[job['jobNumber']] = (score, job)
+            ranked = sorted(scores.values(), key=lambda item: (-item[0], item[1]['jobNumber']))
+            return jsonify(project_jobs([job for _, job in ranked], fields))
+        
+        if not ranges:
+            jobs.sort(key=lambda job: job['jobNumber'])
+        return jsonify(project_jobs(jobs, fields))
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/jobs/search')
+def search_jobs():
+    """
+    Jobs matching ?q= in number, name, owner, description or update history,
+    best first (see search.py). Optional ?client= narrows to one client,
+    ?active=true to active jobs, ?limit= caps the results (default 50, 1 to
+    responses.MAX_PAGE_SIZE). ?view=card or ?fields= slims the jobs, as on
+    /jobs/all.
+    """
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'Search query required'}), 400
+    
+    client_code = request.args.get('client')
+    active_only = request.args.get('active', '').lower() in ('1', 'true', 'yes')
+    
+    def where(job):
+        if client_code and job['clientCode'] != client_code:
+            return False
+        return is_active_job(job) if active_only else True
+    
     try:
-        url = get_airtable_url('Projects')
+        fields = job_fields()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        limit = int(request.args.get('limit', 50))
+    except ValueError:
+        return jsonify({'error': 'limit must be a number'}), 400
+    if limit < 1 or limit > responses.MAX_PAGE_SIZE:
+        return jsonify({'error': f'limit must be between 1 and {responses.MAX_PAGE_SIZE}'}), 400
+    
+    try:
+        results = search.jobs.search(query, limit=limit, where=where)
+        jobs = project_jobs([job for _, job in results], fields)
+        return jsonify([dict(job, score=round(score, 3)) for (score, _), job in zip(results, jobs)])
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/jobs/changes')
+def get_job_changes():
+    """
+    Jobs added, modified or removed since a version.
+    Without ?client= the view is /jobs/all; with it, /jobs/client/<client>.
+    
+    Call without since (or with an expired one) to get resync: true and the
+    current version, do a full fetch, then poll with since=<version> and
+    apply changed (upsert by jobNumber) and removed (job numbers).
+    """
+    since = request.args.get('since')
+    client_code = request.args.get('client')
+    
+    if client_code:
+        in_view = lambda job: job['clientCode'] == client_code
+    else:
+        in_view = is_active_job
+    
+    try:
+        mirror.projects.ensure_fresh()
+        delta = mirror.projects.changes_since(since) if since else None
+        if delta is None:
+            return jsonify({'version': mirror.projects.cursor, 'resync': True, 'changed': [], 'removed': []})
+        
+        changed_rows, removed_rows, version = delta
+        changed, removed = [], []
+        for _, job in changed_rows:
+            if in_view(job):
+                changed.append(job)
+            else:
+                removed.append(job['jobNumber'])
+        for _, job in removed_rows:
+            removed.append(job['jobNumber'])
+        
+        return jsonify({'version': version, 'resync': False, 'changed': changed, 'removed': removed})
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+HISTORY_PAGE_SIZE = 20
+HISTORY_MAX_PAGE_SIZE = 100     # Airtable's pageSize limit
+
+# Updates field pages are sorted on, newest first, as updateHistory is on the job
+UPDATES_SORT_FIELD = os.environ.get('UPDATES_SORT_FIELD', 'Created')
+
+# Airtable's 422 error types for an offset it no longer (or never) knew.
+# Any other 422 - e.g. UNKNOWN_FIELD_NAME for UPDATES_SORT_FIELD - is ours.
+EXPIRED_OFFSET_ERRORS = ('LIST_RECORDS_ITERATOR_NOT_AVAILABLE', 'INVALID_OFFSET_VALUE')
+
+def job_exists(job_number):
+    """In the Projects mirror, or (archived jobs aren't mirrored) in Airtable"""
+    if mirror.projects.has('jobNumber', job_number):
+        return True
+    params = {
+        'filterByFormula': f"{{Job Number}} = '{job_number}'",
+        'maxRecords': 1,
+        'fields[]': ['Job Number']
+    }
+    response = cache.airtable_request('GET', cache.get_airtable_url('Projects'), headers=cache.HEADERS, params=params)
+    response.raise_for_status()
+    return bool(response.json().get('records'))
+
+@app.route('/job/<job_number>/history')
+def get_job_history(job_number):
+    """
+    A job's updates from the Updates table, newest first, a page at a time.
+    ?limit= sets the page size (default 20, 1 to 100); pass the last page's
+    nextCursor as ?cursor= for the next one. nextCursor is null on the last page.
+    """
+    try:
+        limit = int(request.args.get('limit', HISTORY_PAGE_SIZE))
+    except ValueError:
+        return jsonify({'error': 'limit must be a number'}), 400
+    if limit < 1 or limit > HISTORY_MAX_PAGE_SIZE:
+        return jsonify({'error': f'limit must be between 1 and {HISTORY_MAX_PAGE_SIZE}'}), 400
+    
+    try:
+        cursor = request.args.get('cursor')
+        # Later pages follow a cursor we handed out - the job was checked on page one
+        if not cursor and not job_exists(job_number):
+            return jsonify({'error': 'Job not found'}), 404
+        
         params = {
-            'filterByFormula': f"AND(FIND('{client_code}', {{Job Number}}), {{Status}} != 'Archived')"
+            # Project Link reads as the linked job numbers in a formula
+            'filterByFormula': f"ARRAYJOIN({{Project Link}}) = '{job_number}'",
+            'pageSize': limit,
+            'fields[]': ['Update', 'Update due'],
+            'sort[0][field]': UPDATES_SORT_FIELD,
+            'sort[0][direction]': 'desc'
         }
+        if cursor:
+            params['offset'] = cursor
+        
+        response = cache.airtable_request('GET', cache.get_airtable_url('Updates'), headers=cache.HEADERS, params=params)
+        if response.status_code == 422:
+            error = response.json().get('error', {})
+            error = error if isinstance(error, dict) else {'type': error}
+            # Airtable's offsets expire after a few minutes
+            if cursor and error.get('type') in EXPIRED_OFFSET_ERRORS:
+                return jsonify({'error': 'cursor is invalid or has expired'}), 400
+            # Otherwise the query is wrong - most likely the sort field isn't in Updates
+            message = error.get('message') or error.get('type')
+            return jsonify({'error': f"Updates query rejected (sorting on '{UPDATES_SORT_FIELD}'): {message}"}), 500
+        response.raise_for_status()
         
-        all_records = []
-        offset = None
-        
-        while True:
-            if offset:
-                params['offset'] = offset
-            
-            response = requests.get(url, headers=HEADERS, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            for record in data.get('records', []):
-                all_records.append(transform_project(record))
-            
-            offset = data.get('offset')
-            if not offset:
-                break
+        data = response.json()
+        updates = [{
+            'id': record['id'],
+            'update': record.get('fields', {}).get('Update', ''),
+            'updateDue': record.get('fields', {}).get('Update due'),
+            'created': record.get('createdTime')
+        } for record in data.get('records', [])]
         
-        return jsonify(all_records)
+        return jsonify({'jobNumber': job_number, 'updates': updates, 'nextCursor': data.get('offset')})
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -300,12 +557,13 @@ def update_job(job_number):
     try:
         data = request.get_json()
         
-        url = get_airtable_url('Projects')
+        url = cache.get_airtable_url('Projects')
         params = {
             'filterByFormula': f"{{Job Number}} = '{job_number}'",
-            'maxRecords': 1
+            'maxRecords': 1,
+            'fields[]': ['Job Number']
         }
-        response = requests.get(url, headers=HEADERS, params=params)
+        response = cache.airtable_request('GET', url, headers=cache.HEADERS, params=params)
         response.raise_for_status()
         
         records = response.json().get('records', [])
@@ -339,13 +597,22 @@ def update_job(job_number):
         if not airtable_fields:
             return jsonify({'error': 'No valid fields to update'}), 400
         
-        update_response = requests.patch(
+        update_response = cache.airtable_request(
+            'PATCH',
             f"{url}/{record_id}",
-            headers=HEADERS,
+            headers=cache.HEADERS,
             json={'fields': airtable_fields}
         )
         update_response.raise_for_status()
         
+        # The PATCH response is the updated record - apply it to the mirror
+        if airtable_fields.get('Status') == 'Archived':
+            mirror.projects.remove([record_id])
+        else:
+            mirror.projects.upsert([update_response.json()])
+        # Saved straight away - the other workers see it through the change feed
+        mirror.save(mirror.projects)
+        
         return jsonify({'success': True, 'updated': list(airtable_fields.keys())})
     
     except Exception as e:
@@ -353,114 +620,151 @@ def update_job(job_number):
 
 
 # ===== TRACKER =====
+def load_tracker_clients():
+    """Retainer clients (a monthly commitment) with their budget setup, by name"""
+    return [{
+        'code': view['code'],
+        'name': view['name'],
+        'committed': view['committed'],
+        'rollover': view['rollover'],
+        'rolloverUseIn': view['rolloverUseIn'],
+        'yearEnd': view['yearEnd'],
+        'currentQuarter': view['currentQuarter']
+    } for view in budgets.view.retainers()]
+
+def load_budget(client_code=None):
+    """One client's budget view, or every retainer client's"""
+    if client_code is None:
+        return budgets.view.retainers()
+    return budgets.view.get(client_code)
+
+tracker_clients_snapshots = cache.SnapshotCache('tracker-clients', load_tracker_clients, dumps=app.json.dumps_bytes)
+
+budget_snapshots = cache.SnapshotCache('budget', load_budget, dumps=app.json.dumps_bytes)
+
 @app.route('/tracker/clients')
 def get_tracker_clients():
     """Get clients with tracker/budget info"""
     try:
-        url = get_airtable_url('Clients')
-        response = requests.get(url, headers=HEADERS)
-        response.raise_for_status()
-        
-        clients = []
-        for record in response.json().get('records', []):
-            fields = record.get('fields', {})
-            
-            def parse_currency(val):
-                if isinstance(val, (int, float)):
-                    return val
-                if isinstance(val, str):
-                    return int(val.replace('$', '').replace(',', '') or 0)
-                return 0
-            
-            monthly = parse_currency(fields.get('Monthly Committed', 0))
-            if monthly > 0:
-                rollover = fields.get('Rollover Credit', 0)
-                if isinstance(rollover, list):
-                    rollover = rollover[0] if rollover else 0
-                rollover = parse_currency(rollover)
-                
-                clients.append({
-                    'code': fields.get('Client code', ''),
-                    'name': fields.get('Clients', ''),
-                    'committed': monthly,
-                    'rollover': rollover,
-                    'rolloverUseIn': fields.get('Rollover use', ''),
-                    'yearEnd': fields.get('Year end', ''),
-                    'currentQuarter': fields.get('Current Quarter', '')
-                })
-        
-        clients.sort(key=lambda x: x['name'])
-        return jsonify(clients)
+        return snapshot_response(tracker_clients_snapshots.get())
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/tracker/budget')
+def get_tracker_budget():
+    """
+    Budget view (see budgets.py): this month, this and last quarter and every
+    named quarter, with rollover, remaining and percent used. For one client
+    with ?client=, otherwise for every retainer client.
+    """
+    client_code = request.args.get('client')
+    
+    try:
+        # Only known clients get a snapshot - the key comes from the query string
+        if client_code is not None and budgets.view.get(client_code) is None:
+            return jsonify({'error': 'Client not found'}), 404
+        snapshot = budget_snapshots.get(client_code)
+        if snapshot.body == b'null':
+            return jsonify({'error': 'Client not found'}), 404
+        return snapshot_response(snapshot)
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+def load_tracker_rows(client_code):
+    """Non-zero tracker spend rows for a client"""
+    return [row for row in mirror.tracker.lookup('client', client_code) if row['spend'] != 0]
+
+tracker_snapshots = cache.SnapshotCache('tracker', load_tracker_rows, dumps=app.json.dumps_bytes)
+
+def tracker_rows_body(client_code):
+    """A client's /tracker/data body - snapshots are only kept for clients with tracker rows"""
+    if not mirror.tracker.has('client', client_code):
+        return b'[]'
+    return tracker_snapshots.get(client_code).body
+
+def load_tracker_groups(client_codes):
+    """{client: rows} for several clients, spliced from their per-client snapshots"""
+    parts = [app.json.dumps_bytes(code) + b':' + tracker_rows_body(code) for code in client_codes]
+    return b'{' + b','.join(parts) + b'}'
+
+# Already serialized by load_tracker_groups
+tracker_group_snapshots = cache.SnapshotCache('tracker-groups', load_tracker_groups, dumps=bytes)
+
+summary_snapshots = cache.SnapshotCache('tracker-summary', rollups.tracker.summarize, dumps=app.json.dumps_bytes)
+
+@mirror.tracker.on_change
+def tracker_changed(changed, removed, previous):
+    # A row that moved client changes the old client's snapshots too
+    touched = {row['client'] for _, row in changed + removed}
+    touched.update(row['client'] for row in previous.values())
+    tracker_snapshots.invalidate(*touched)
+    tracker_group_snapshots.invalidate()
+    summary_snapshots.invalidate(*touched)
+    for record_id, row in changed:
+        old = previous.get(record_id)
+        if old is not None and old['client'] != row['client']:
+            events.bus.publish('tracker-removed', {'id': old['id']}, old['client'])
+        events.bus.publish('tracker', row, row['client'])
+    for _, row in removed:
+        events.bus.publish('tracker-removed', {'id': row['id']}, row['client'])
+
 @app.route('/tracker/data')
+@profiler.profiled
 def get_tracker_data():
-    """Get tracker spend data for a client"""
+    """
+    Get tracker spend data for a client. Several clients (?client=SKY,TOW)
+    or every client with tracker rows (?client=all) come back in one
+    response as {client code: rows}.
+    ?limit=/?cursor= pages the rows by record id and ?format=ndjson streams
+    them, one row per line - each row carries its client.
+    """
     client_code = request.args.get('client')
     if not client_code:
         return jsonify({'error': 'Client code required'}), 400
     
     try:
-        tracker_url = get_airtable_url('Tracker')
-        
-        all_records = []
-        offset = None
-        
-        while True:
-            params = {
-                'filterByFormula': f"{{Client Code}} = '{client_code}'"
-            }
-            if offset:
-                params['offset'] = offset
-            
-            response = requests.get(tracker_url, headers=HEADERS, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            for record in data.get('records', []):
-                fields = record.get('fields', {})
-                
-                # These are all lookup fields now - may return as lists
-                job_number = fields.get('Job Number', '')
-                if isinstance(job_number, list):
-                    job_number = job_number[0] if job_number else ''
-                
-                project_name = fields.get('Project Name', '')
-                if isinstance(project_name, list):
-                    project_name = project_name[0] if project_name else ''
-                
-                owner = fields.get('Owner', '')
-                if isinstance(owner, list):
-                    owner = owner[0] if owner else ''
-                
-                spend = fields.get('Spend', 0)
-                if isinstance(spend, str):
-                    spend = float(spend.replace('$', '').replace(',', '') or 0)
-                
-                if spend == 0:
-                    continue
-                
-                all_records.append({
-                    'id': record.get('id'),
-                    'client': client_code,
-                    'jobNumber': job_number,
-                    'projectName': project_name,
-                    'owner': owner,
-                    'description': fields.get('Tracker notes', ''),
-                    'spend': spend,
-                    'month': fields.get('Month', ''),
-                    'spendType': fields.get('Spend type', 'Project budget'),
-                    'ballpark': bool(fields.get('Ballpark', False)),
-                })
-            
-            offset = data.get('offset')
-            if not offset:
-                break
-        
-        return jsonify(all_records)
+        if client_code == 'all':
+            client_codes = [code for code in mirror.tracker.keys('client') if code]
+        elif ',' in client_code:
+            client_codes = [code.strip() for code in client_code.split(',') if code.strip()]
+        else:
+            client_codes = [client_code]
+        client_codes = sorted(set(client_codes))
+        
+        if wants_list():
+            rows = [row for code in client_codes for row in load_tracker_rows(code)]
+            return list_response(rows, lambda row: row['id'], 'rows')
+        if len(client_codes) == 1 and client_codes[0] == client_code:
+            if not mirror.tracker.has('client', client_code):
+                return jsonify([])
+            return snapshot_response(tracker_snapshots.get(client_code))
+        return snapshot_response(tracker_group_snapshots.get(tuple(client_codes)))
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/tracker/summary')
+def get_tracker_summary():
+    """
+    Tracker spend for a client rolled up by month, quarter, job and spend
+    type, each split into ballpark and confirmed (see rollups.py)
+    """
+    client_code = request.args.get('client')
+    if not client_code:
+        return jsonify({'error': 'Client code required'}), 400
+    
+    try:
+        if not mirror.tracker.has('client', client_code):
+            return jsonify(rollups.tracker.summarize(client_code))
+        return snapshot_response(summary_snapshots.get(client_code))
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -495,13 +799,16 @@ def update_tracker():
         if not airtable_fields:
             return jsonify({'error': 'No valid fields to update'}), 400
         
-        url = get_airtable_url('Tracker')
-        response = requests.patch(
+        url = cache.get_airtable_url('Tracker')
+        response = cache.airtable_request(
+            'PATCH',
             f"{url}/{record_id}",
-            headers=HEADERS,
+            headers=cache.HEADERS,
             json={'fields': airtable_fields}
         )
         response.raise_for_status()
+        mirror.tracker.upsert([response.json()])
+        mirror.save(mirror.tracker)
         
         return jsonify({'success': True})
     
@@ -509,8 +816,59 @@ def update_tracker():
         return jsonify({'error': str(e)}), 500
 
 
+# ===== EVENTS =====
+@app.route('/events')
+def stream_events():
+    """
+    Server-Sent Events: job and tracker changes as the mirrors see them,
+    from our own writes and from background sync.
+    ?client=SKY,TOW narrows the stream to those client codes.
+    """
+    client_codes = [c for c in request.args.get('client', '').split(',') if c]
+    mirror.start_background_sync()
+    
+    subscription = events.bus.subscribe(client_codes or None)
+    if subscription is None:
+        # Every stream holds a worker thread - leave the rest to the JSON routes
+        response = jsonify({'error': 'Too many event listeners, retry later'})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(events.RETRY_AFTER_SECONDS)
+        return response
+    
+    hello = {'jobsVersion': mirror.projects.cursor, 'trackerVersion': mirror.tracker.cursor}
+    
+    response = app.response_class(events.stream(events.bus, subscription, hello), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+# ===== WEBHOOKS =====
+# Traffic notifications are accepted but nothing here caches them
+for table_mirror in mirror.MIRRORS:
+    webhooks.on_table(table_mirror.table)(table_mirror.refresh_records)
+
+
+@app.route('/webhooks/airtable', methods=['POST'])
+def airtable_webhook():
+    """Airtable change notification - patch the mirrors and drop stale snapshots"""
+    try:
+        touched = webhooks.handle_notification(
+            request.get_data(),
+            request.headers.get(webhooks.SIGNATURE_HEADER)
+        )
+        return jsonify({'success': True, 'tables': touched})
+    
+    except webhooks.WebhookError as e:
+        return jsonify({'error': str(e)}), e.status
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 # ===== ASK DOT (Claude) =====
 @app.route('/claude/parse', methods=['POST'])
+@profiler.profiled
 def claude_parse():
     """Process a question through Ask Dot"""
     data = request.get_json()
@@ -8,20 +8,17 @@ import requests
 import os
 import json
 import time
-from datetime import datetime
+
+import budgets
+import cache
+import metrics
+import people
 
 # ===== CONFIGURATION =====
 ANTHROPIC_API_KEY = os.environ.get('ANTHROPIC_API_KEY')
-AIRTABLE_API_KEY = os.environ.get('AIRTABLE_API_KEY')
-AIRTABLE_BASE_ID = os.environ.get('AIRTABLE_BASE_ID', 'app8CI7NAZqhQ4G1Y')
-
-AIRTABLE_HEADERS = {
-    'Authorization': f'Bearer {AIRTABLE_API_KEY}',
-    'Content-Type': 'application/json'
-}
 
-def get_airtable_url(table):
-    return f'https://api.airtable.com/v0/{AIRTABLE_BASE_ID}/{table}'
+# Overridable so benchmarks can point at a local stand-in
+ANTHROPIC_API_URL = os.environ.get('ANTHROPIC_API_URL', 'https://api.anthropic.com')
 
 
 # ===== CONVERSATION MEMORY =====
@@ -65,52 +62,17 @@ def clear_conversation(session_id):
 
 # ===== TOOLS FOR DOT =====
 
+# Fields each tool reads - requested via fields[] so Airtable skips the rest
+CLIENT_DETAIL_FIELDS = [
+    'Clients', 'Year end', 'Current Quarter', 'Monthly Committed',
+    'Quarterly Committed', 'This month', 'This Quarter', 'Rollover Credit',
+    'Next Job #'
+]
+
 def tool_search_people(client_code=None, search_term=None):
-    """Search People table"""
+    """Search the People directory (name or email contains search_term)"""
     try:
-        url = get_airtable_url('People')
-        
-        filters = ["{Active} = TRUE()"]
-        if client_code:
-            filters.append(f"{{Client Link}} = '{client_code}'")
-        
-        params = {
-            'filterByFormula': f"AND({', '.join(filters)})" if len(filters) > 1 else filters[0]
-        }
-        
-        all_people = []
-        offset = None
-        
-        while True:
-            if offset:
-                params['offset'] = offset
-            
-            response = requests.get(url, headers=AIRTABLE_HEADERS, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            for record in data.get('records', []):
-                fields = record.get('fields', {})
-                name = fields.get('Name', fields.get('Full name', ''))
-                if not name:
-                    continue
-                
-                if search_term:
-                    searchable = f"{name} {fields.get('Email Address', '')}".lower()
-                    if search_term.lower() not in searchable:
-                        continue
-                
-                all_people.append({
-                    'name': name,
-                    'email': fields.get('Email Address', ''),
-                    'phone': fields.get('Phone Number', ''),
-                    'clientCode': fields.get('Client Link', '')
-                })
-            
-            offset = data.get('offset')
-            if not offset:
-                break
-        
+        all_people = people.directory.search(client_code, search_term)
         return {'count': len(all_people), 'people': all_people}
     
     except Exception as e:
@@ -120,12 +82,13 @@ def tool_search_people(client_code=None, search_term=None):
 def tool_get_client_detail(client_code):
     """Get detailed client info"""
     try:
-        url = get_airtable_url('Clients')
+        url = cache.get_airtable_url('Clients')
         params = {
             'filterByFormula': f"{{Client code}} = '{client_code}'",
-            'maxRecords': 1
+            'maxRecords': 1,
+            'fields[]': CLIENT_DETAIL_FIELDS
         }
-        response = requests.get(url, headers=AIRTABLE_HEADERS, params=params)
+        response = cache.airtable_request('GET', url, headers=cache.HEADERS, params=params)
         response.raise_for_status()
         
         records = response.json().get('records', [])
@@ -166,106 +129,39 @@ def tool_get_client_detail(client_code):
 def tool_get_spend_summary(client_code, period='this_month'):
     """Get spend summary for a client"""
     try:
-        clients_url = get_airtable_url('Clients')
-        clients_response = requests.get(clients_url, headers=AIRTABLE_HEADERS)
-        clients_response.raise_for_status()
-        
-        client_info = None
-        for record in clients_response.json().get('records', []):
-            fields = record.get('fields', {})
-            if fields.get('Client code', '') == client_code:
-                def parse_currency(val):
-                    if isinstance(val, (int, float)):
-                        return float(val)
-                    if isinstance(val, str):
-                        return float(val.replace('$', '').replace(',', '') or 0)
-                    if isinstance(val, list):
-                        return float(val[0]) if val else 0
-                    return 0
-                
-                monthly = parse_currency(fields.get('Monthly Committed', 0))
-                rollover = parse_currency(fields.get('Rollover Credit', 0))
-                rollover_use = fields.get('Rollover use', '')
-                
-                client_info = {
-                    'name': fields.get('Clients', ''),
-                    'code': client_code,
-                    'monthlyBudget': monthly,
-                    'quarterlyBudget': monthly * 3,
-                    'currentQuarter': fields.get('Current Quarter', ''),
-                    'rollover': rollover,
-                    'rolloverUse': rollover_use,
-                    'JAN-MAR': parse_currency(fields.get('JAN-MAR', 0)),
-                    'APR-JUN': parse_currency(fields.get('APR-JUN', 0)),
-                    'JUL-SEP': parse_currency(fields.get('JUL-SEP', 0)),
-                    'OCT-DEC': parse_currency(fields.get('OCT-DEC', 0)),
-                    'thisMonth': parse_currency(fields.get('This month', 0)),
-                }
-                break
-        
-        if not client_info:
+        view = budgets.view.get(client_code)
+        if not view:
             return {'error': f'Client {client_code} not found'}
         
-        now = datetime.now()
-        current_month_num = now.month
-        
-        calendar_quarters = {
-            1: 'JAN-MAR', 2: 'JAN-MAR', 3: 'JAN-MAR',
-            4: 'APR-JUN', 5: 'APR-JUN', 6: 'APR-JUN',
-            7: 'JUL-SEP', 8: 'JUL-SEP', 9: 'JUL-SEP',
-            10: 'OCT-DEC', 11: 'OCT-DEC', 12: 'OCT-DEC'
-        }
-        current_cal_quarter = calendar_quarters[current_month_num]
-        
-        prev_quarters = {
-            'JAN-MAR': 'OCT-DEC',
-            'APR-JUN': 'JAN-MAR',
-            'JUL-SEP': 'APR-JUN',
-            'OCT-DEC': 'JUL-SEP'
-        }
-        last_cal_quarter = prev_quarters[current_cal_quarter]
-        
-        if period == 'this_quarter':
-            quarter_key = current_cal_quarter
-            period_label = client_info['currentQuarter']
-        elif period == 'last_quarter':
-            quarter_key = last_cal_quarter
-            current_q_num = int(client_info['currentQuarter'].replace('Q', '') or 1)
-            last_q_num = current_q_num - 1 if current_q_num > 1 else 4
-            period_label = f'Q{last_q_num}'
-        elif period in ['JAN-MAR', 'APR-JUN', 'JUL-SEP', 'OCT-DEC']:
-            quarter_key = period
-            period_label = period
-        elif period == 'this_month':
+        if period == 'this_month':
+            figures = view['month']
             return {
-                'client': client_info['name'],
+                'client': view['name'],
                 'clientCode': client_code,
-                'period': now.strftime('%B'),
-                'budget': client_info['monthlyBudget'],
-                'spent': client_info['thisMonth'],
-                'remaining': client_info['monthlyBudget'] - client_info['thisMonth'],
-                'percentUsed': round((client_info['thisMonth'] / client_info['monthlyBudget'] * 100) if client_info['monthlyBudget'] > 0 else 0)
+                'period': figures['period'],
+                'budget': figures['budget'],
+                'spent': figures['spent'],
+                'remaining': figures['remaining'],
+                'percentUsed': figures['percentUsed']
             }
-        else:
-            quarter_key = current_cal_quarter
-            period_label = client_info['currentQuarter']
         
-        spent = client_info.get(quarter_key, 0)
-        budget = client_info['quarterlyBudget']
-        
-        if client_info['rolloverUse'] == quarter_key and client_info['rollover'] > 0:
-            budget += client_info['rollover']
+        if period == 'last_quarter':
+            figures = view['lastQuarter']
+        elif period in view['quarters']:
+            figures = view['quarters'][period]
+        else:
+            figures = view['quarter']
         
         return {
-            'client': client_info['name'],
+            'client': view['name'],
             'clientCode': client_code,
-            'period': period_label,
-            'budget': budget,
-            'spent': spent,
-            'remaining': budget - spent,
-            'percentUsed': round((spent / budget * 100) if budget > 0 else 0),
-            'rolloverApplied': client_info['rolloverUse'] == quarter_key and client_info['rollover'] > 0,
-            'rolloverAmount': client_info['rollover'] if client_info['rolloverUse'] == quarter_key else 0
+            'period': figures['period'],
+            'budget': figures['budget'],
+            'spent': figures['spent'],
+            'remaining': figures['remaining'],
+            'percentUsed': figures['percentUsed'],
+            'rolloverApplied': figures['rolloverApplied'],
+            'rolloverAmount': figures['rolloverAmount']
         }
     
     except Exception as e:
@@ -275,12 +171,13 @@ def tool_get_spend_summary(client_code, period='this_month'):
 def tool_reserve_job_number(client_code):
     """Reserve the next job number for a client"""
     try:
-        url = get_airtable_url('Clients')
+        url = cache.get_airtable_url('Clients')
         params = {
             'filterByFormula': f"{{Client code}} = '{client_code}'",
-            'maxRecords': 1
+            'maxRecords': 1,
+            'fields[]': ['Clients', 'Next Job #']
         }
-        response = requests.get(url, headers=AIRTABLE_HEADERS, params=params)
+        response = cache.airtable_request('GET', url, headers=cache.HEADERS, params=params)
         response.raise_for_status()
         
         records = response.json().get('records', [])
@@ -304,9 +201,10 @@ def tool_reserve_job_number(client_code):
         reserved_job_number = f"{client_code} {next_num:03d}"
         new_next_num = f"{next_num + 1:03d}"
         
-        update_response = requests.patch(
+        update_response = cache.airtable_request(
+            'PATCH',
             f"{url}/{record_id}",
-            headers=AIRTABLE_HEADERS,
+            headers=cache.HEADERS,
             json={'fields': {'Next Job #': new_next_num}}
         )
         update_response.raise_for_status()
@@ -534,6 +432,31 @@ def parse_response(assistant_message):
     return None
 
 
+# ===== CLAUDE API =====
+def call_claude(body):
+    """POST a Messages API request, timed and counted in metrics. Returns the response JSON."""
+    started = time.perf_counter()
+    status = 'error'
+    usage = None
+    try:
+        response = requests.post(
+            f'{ANTHROPIC_API_URL}/v1/messages',
+            headers={
+                'x-api-key': ANTHROPIC_API_KEY,
+                'anthropic-version': '2023-06-01',
+                'content-type': 'application/json'
+            },
+            json=body
+        )
+        status = response.status_code
+        response.raise_for_status()
+        result = response.json()
+        usage = result.get('usage')
+        return result
+    finally:
+        metrics.anthropic_response(status, time.perf_counter() - started, usage)
+
+
 # ===== MAIN PROCESS FUNCTION =====
 
 def process_question(question, clients, session_id='default'):
@@ -563,24 +486,13 @@ def process_question(question, clients, session_id='default'):
         messages.append({'role': 'user', 'content': question})
         
         # Call Claude
-        response = requests.post(
-            'https://api.anthropic.com/v1/messages',
-            headers={
-                'x-api-key': ANTHROPIC_API_KEY,
-                'anthropic-version': '2023-06-01',
-                'content-type': 'application/json'
-            },
-            json={
-                'model': 'claude-sonnet-4-20250514',
-                'max_tokens': 1000,
-                'system': system_prompt,
-                'messages': messages,
-                'tools': CLAUDE_TOOLS
-            }
-        )
-        
-        response.raise_for_status()
-        result = response.json()
+        result = call_claude({
+            'model': 'claude-sonnet-4-20250514',
+            'max_tokens': 1000,
+            'system': system_prompt,
+            'messages': messages,
+            'tools': CLAUDE_TOOLS
+        })
         
         stop_reason = result.get('stop_reason')
         content_blocks = result.get('content', [])
@@ -596,6 +508,7 @@ def process_question(question, clients, session_id='default'):
                     tool_id = block.get('id')
                     
                     print(f"Executing tool: {tool_name} with input: {tool_input}")
+                    metrics.TOOL_CALLS.inc(tool=tool_name)
                     tool_result = execute_tool(tool_name, tool_input)
                     print(f"Tool result: {tool_result}")
                     
@@ -609,23 +522,12 @@ def process_question(question, clients, session_id='default'):
             messages.append({'role': 'user', 'content': tool_results})
             
             # Second Claude call with tool results
-            response2 = requests.post(
-                'https://api.anthropic.com/v1/messages',
-                headers={
-                    'x-api-key': ANTHROPIC_API_KEY,
-                    'anthropic-version': '2023-06-01',
-                    'content-type': 'application/json'
-                },
-                json={
-                    'model': 'claude-sonnet-4-20250514',
-                    'max_tokens': 1000,
-                    'system': system_prompt,
-                    'messages': messages
-                }
-            )
-            
-            response2.raise_for_status()
-            result = response2.json()
+            result = call_claude({
+                'model': 'claude-sonnet-4-20250514',
+                'max_tokens': 1000,
+                'system': system_prompt,
+                'messages': messages
+            })
             content_blocks = result.get('content', [])
         
         # Extract text response
@@ -0,0 +1,307 @@
+"""
+Benchmark: every app.py route and the airtable.py reads/writes, run against
+the local Airtable and Anthropic stand-ins (fake_airtable.py, fake_anthropic.py).
+Reports throughput and p50/p95/p99 latency per scenario.
+
+Everything is seeded (data, latency jitter, which requests get a 429), so
+runs repeat closely enough to compare. Save a run and check later ones
+against it:
+
+    python bench/bench_api.py [--requests 200] [--concurrency 8] [--latency-ms 20]
+    python bench/bench_api.py --save bench-baseline.json
+    python bench/bench_api.py --baseline bench-baseline.json    # exit 1 on a p95 regression
+    python bench/bench_api.py --only jobs --rate-limit-every 25
+"""
+
+import argparse
+import base64
+import contextlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import multiprocessing
+
+import requests
+
+from fake_airtable import FakeAirtable, seed_base
+from fake_anthropic import FakeAnthropic
+
+WEBHOOK_SECRET = base64.b64encode(b'dot-hub-bench-webhook-secret').decode()
+PROFILE_TOKEN = 'bench'
+
+
+# ===== SETUP =====
+def _serve(server_class, kwargs, conn):
+    server = server_class(**kwargs).start()
+    conn.send(server.api_url)
+    server._thread.join()
+
+
+def start_fake(server_class, **kwargs):
+    """
+    Run a stand-in in its own process, so its CPU time (formula scans, JSON)
+    doesn't compete with the app for the GIL. Returns (process, api url).
+    """
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=_serve, args=(server_class, kwargs, child), daemon=True)
+    process.start()
+    return process, parent.recv()
+
+
+def fake_stats(api_url):
+    return requests.get(api_url.rsplit('/v0', 1)[0] + '/_fake/stats').json()
+
+
+def start_app(airtable_url, anthropic_url):
+    """
+    Import the app pointed at the stand-ins. Config is read at import, so
+    this has to run before anything imports app/cache/ask_dot/airtable.
+    """
+    os.environ.update({
+        'AIRTABLE_API_URL': airtable_url,
+        'ANTHROPIC_API_URL': anthropic_url,
+        'AIRTABLE_API_KEY': 'bench',
+        'ANTHROPIC_API_KEY': 'bench',
+        'AIRTABLE_WEBHOOK_SECRET': WEBHOOK_SECRET,
+        'PROFILE_TOKEN': PROFILE_TOKEN,
+        'MIRROR_SNAPSHOT_PATH': '',
+        'METRICS_DIR': '',
+    })
+    import app
+    import mirror
+    mirror.warm()       # as the gunicorn master does before forking
+    try:
+        import airtable
+    except ImportError as e:
+        # airtable.py is shared with Dot Traffic and needs httpx, which the API doesn't
+        print(f"Skipping airtable.py scenarios: {e}", file=sys.stderr)
+        airtable = None
+    return app.app, airtable
+
+
+def percentile(ordered, p):
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    index = max(0, min(len(ordered) - 1, round(p / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+# ===== SCENARIOS =====
+def build_scenarios(flask_app, airtable, tables):
+    """[(name, call(i) -> result, ok(result) -> bool)]"""
+    local = threading.local()
+
+    def client():
+        if not hasattr(local, 'client'):
+            local.client = flask_app.test_client()
+        return local.client
+
+    projects = [r for r in tables['Projects'].values() if r['fields']['Status'] in ('Incoming', 'In Progress', 'On Hold')]
+    job_numbers = [r['fields']['Job Number'] for r in projects]
+    client_codes = sorted({n.split(' ')[0] for n in job_numbers})
+    tracker_ids = list(tables['Tracker'])
+    stages = ['Clarify', 'Simplify', 'Craft', 'Refine', 'Deliver']
+    search_terms = ['campaign', 'brand refresh', 'sky 0', 'update 3', 'digital social']
+    questions = [
+        "What's SKY's spend this month?",
+        "Who's our contact at TOW?",
+        "Tell me about FIS",
+        "Reserve a new job for LAB",
+        "Which jobs are due this week?",
+    ]
+
+    def pick(values, i):
+        return values[i % len(values)]
+
+    def ok_status(response):
+        return response.status_code < 400
+
+    def get(path):
+        return lambda i: client().get(path(i) if callable(path) else path)
+
+    def post(path, body):
+        return lambda i: client().post(path(i) if callable(path) else path, json=body(i))
+
+    def events(i):
+        response = client().get('/events', buffered=False)
+        next(iter(response.response))      # the hello event
+        response.close()
+        return response
+
+    def webhook(i):
+        body = json.dumps({'base': {'id': 'appBENCH'}, 'webhook': {'id': 'achBENCH'}, 'timestamp': '2026-01-01T00:00:00.000Z'}).encode()
+        import webhooks
+        return client().post('/webhooks/airtable', data=body, headers={
+            'Content-Type': 'application/json',
+            webhooks.SIGNATURE_HEADER: webhooks.sign(body, WEBHOOK_SECRET),
+        })
+
+    cursor = client().get('/jobs/changes').get_json()['version']
+    profile_id = client().get('/jobs/all', headers={'X-Dot-Profile': PROFILE_TOKEN}).headers['X-Dot-Profile-Id']
+
+    scenarios = [
+        ('GET /', get('/'), ok_status),
+        ('GET /clients', get('/clients'), ok_status),
+        ('GET /people/<code>', get(lambda i: f'/people/{pick(client_codes, i)}'), ok_status),
+        ('GET /jobs/all', get('/jobs/all'), ok_status),
+        ('GET /jobs/all (card)', get('/jobs/all?view=card'), ok_status),
+        ('GET /jobs/all (ndjson)', get('/jobs/all?format=ndjson'), ok_status),
+        ('GET /jobs/all (page)', get('/jobs/all?limit=100&view=card'), ok_status),
+        ('GET /jobs/client/<code>', get(lambda i: f'/jobs/client/{pick(client_codes, i)}'), ok_status),
+        ('GET /jobs/query', get(lambda i: pick(['/jobs/query?dateRange=week', '/jobs/query?withClient=true',
+                                                 f'/jobs/query?client={pick(client_codes, i)}&status=all'], i)), ok_status),
+        ('GET /jobs/search', get(lambda i: f'/jobs/search?q={pick(search_terms, i)}'), ok_status),
+        ('GET /jobs/changes', get(f'/jobs/changes?since={cursor}'), ok_status),
+        ('GET /job/<n>/history', get(lambda i: f'/job/{pick(job_numbers, i)}/history'), ok_status),
+        ('POST /job/<n>/update', post(lambda i: f'/job/{pick(job_numbers, i)}/update',
+                                      lambda i: {'stage': pick(stages, i)}), ok_status),
+        ('GET /tracker/clients', get('/tracker/clients'), ok_status),
+        ('GET /tracker/data', get(lambda i: f'/tracker/data?client={pick(client_codes, i)}'), ok_status),
+        ('GET /tracker/data (all)', get('/tracker/data?client=all'), ok_status),
+        ('GET /tracker/data (all, ndjson)', get('/tracker/data?client=all&format=ndjson'), ok_status),
+        ('GET /tracker/budget', get(lambda i: f'/tracker/budget?client={pick(client_codes, i)}'), ok_status),
+        ('GET /tracker/summary', get(lambda i: f'/tracker/summary?client={pick(client_codes, i)}'), ok_status),
+        ('POST /tracker/update', post('/tracker/update',
+                                      lambda i: {'id': pick(tracker_ids, i), 'spend': 1000 + i}), ok_status),
+        ('GET /events', events, ok_status),
+        ('POST /webhooks/airtable', webhook, ok_status),
+        ('POST /claude/parse', post('/claude/parse', lambda i: {
+            'question': pick(questions, i), 'sessionId': f'bench-{i % 20}',
+            'clients': [{'code': c, 'name': c} for c in client_codes]}), ok_status),
+        ('POST /claude/clear', post('/claude/clear', lambda i: {'sessionId': f'bench-{i % 20}'}), ok_status),
+        ('GET /metrics', get('/metrics'), ok_status),
+        ('GET /debug/profiles/<id>', get(f'/debug/profiles/{profile_id}?profile={PROFILE_TOKEN}&format=summary'), ok_status),
+    ]
+    if airtable is None:
+        return scenarios
+
+    return scenarios + [
+        ('airtable.get_active_jobs', lambda i: airtable.get_active_jobs(pick(client_codes, i)), lambda r: isinstance(r, list)),
+        ('airtable.get_all_active_jobs', lambda i: airtable.get_all_active_jobs(), lambda r: bool(r)),
+        ('airtable.get_job_by_number', lambda i: airtable.get_job_by_number(pick(job_numbers, i)), lambda r: r is not None),
+        ('airtable.get_project', lambda i: airtable.get_project(pick(job_numbers, i)), lambda r: r is not None),
+        ('airtable.get_team_id', lambda i: airtable.get_team_id(pick(client_codes, i)), lambda r: r is not None),
+        ('airtable.get_client_name', lambda i: airtable.get_client_name(pick(client_codes, i)), lambda r: r is not None),
+        ('airtable.check_duplicate', lambda i: airtable.check_duplicate(f'<bench-{i}@example>'), lambda r: True),
+        ('airtable.check_pending_clarify', lambda i: airtable.check_pending_clarify(f'conv-{i}'), lambda r: True),
+        ('airtable.log_traffic', lambda i: airtable.log_traffic(
+            f'<bench-{i}@example>', f'conv-{i}', 'update', 'processed', pick(job_numbers, i),
+            pick(client_codes, i), 'bench@example.com', 'Bench'), lambda r: r is not None),
+        ('airtable.update_project_record', lambda i: airtable.update_project_record(
+            pick(job_numbers, i), {'Stage': pick(stages, i)}), lambda r: r.get('success')),
+        ('airtable.create_update_record', lambda i: airtable.create_update_record(
+            pick(job_numbers, i), f'Bench update {i}'), lambda r: r.get('success')),
+    ]
+
+
+# ===== RUNNING =====
+def run_scenario(call, ok, requests, concurrency, warmup):
+    for i in range(warmup):
+        call(i)
+
+    def one(i):
+        started = time.perf_counter()
+        try:
+            good = bool(ok(call(i)))
+        except Exception:
+            good = False
+        return time.perf_counter() - started, good
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(one, range(warmup, warmup + requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(seconds * 1000 for seconds, _ in results)
+    return {
+        'requests': requests,
+        'errors': sum(1 for _, good in results if not good),
+        'rps': requests / elapsed,
+        'p50': percentile(latencies, 50),
+        'p95': percentile(latencies, 95),
+        'p99': percentile(latencies, 99),
+    }
+
+
+def compare(results, baseline, tolerance, floor_ms=1.0):
+    """Scenarios whose p95 grew by more than tolerance (and floor_ms) against baseline"""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before and result['p95'] > before['p95'] * (1 + tolerance) and result['p95'] - before['p95'] > floor_ms:
+            regressions.append((name, before['p95'], result['p95']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200, help='measured requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--scale', type=float, default=1.0, help='base size (1 = ~production)')
+    parser.add_argument('--latency-ms', type=float, default=20, help='Airtable latency per call')
+    parser.add_argument('--jitter-ms', type=float, default=5)
+    parser.add_argument('--claude-latency-ms', type=float, default=200)
+    parser.add_argument('--rate-limit-every', type=int, default=0, help='answer every Nth Airtable call with 429')
+    parser.add_argument('--only', help='run scenarios whose name contains this')
+    parser.add_argument('--save', help='write results as JSON')
+    parser.add_argument('--baseline', help='compare against saved results; exit 1 on regression')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed p95 growth vs baseline')
+    args = parser.parse_args()
+
+    _, airtable_url = start_fake(FakeAirtable, seed=args.seed, scale=args.scale, latency_ms=args.latency_ms,
+                                 jitter_ms=args.jitter_ms, rate_limit_every=args.rate_limit_every)
+    _, anthropic_url = start_fake(FakeAnthropic, latency_ms=args.claude_latency_ms)
+    tables = seed_base(args.seed, args.scale)     # the same base the stand-in is serving
+
+    # The app and airtable.py log every call and error - keep the report readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        flask_app, airtable = start_app(airtable_url, anthropic_url)
+        scenarios = build_scenarios(flask_app, airtable, tables)
+
+    counts = ', '.join(f'{name} {len(rows)}' for name, rows in tables.items() if rows)
+    print(f"base: {counts}")
+    print(f"airtable {args.latency_ms:g}±{args.jitter_ms:g}ms, claude {args.claude_latency_ms:g}ms, "
+          f"429 every {args.rate_limit_every or '-'}; {args.requests} requests x {args.concurrency} threads")
+    print(f"{'scenario':<34}{'reqs':>6}{'err':>6}{'req/s':>10}{'p50':>10}{'p95':>10}{'p99':>10}")
+
+    results = {}
+    for name, call, ok in scenarios:
+        if args.only and args.only not in name:
+            continue
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = run_scenario(call, ok, args.requests, args.concurrency, args.warmup)
+        results[name] = result
+        print(f"{name:<34}{result['requests']:>6}{result['errors']:>6}{result['rps']:>10.1f}"
+              f"{result['p50']:>8.1f}ms{result['p95']:>8.1f}ms{result['p99']:>8.1f}ms")
+
+    airtable_stats, anthropic_stats = fake_stats(airtable_url), fake_stats(anthropic_url)
+    print(f"airtable calls: {airtable_stats['requests']} ({airtable_stats['rate_limited']} rate limited), "
+          f"claude calls: {anthropic_stats['requests']}")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for name, before, after in regressions:
+            print(f"REGRESSION {name}: p95 {before:.1f}ms -> {after:.1f}ms")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Memory benchmark: the Projects mirror's job rows as compact Job records
+(transforms.Job) against the plain dicts they replaced, built from the same
+seeded records. Also checks that both serialize to identical JSON.
+
+    python bench/bench_memory.py [--scale 1] [--history text|list]
+
+--history picks how Update history arrives from Airtable: a long-text
+field (one string, split into a list per job by the dict rows) or a list.
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from flask import Flask
+
+from fake_airtable import seed_base
+
+import transforms
+from responses import FastJSONProvider
+
+
+def measure(build):
+    """(result, bytes still allocated after build() returns)"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--scale', type=float, default=1.0, help='base size (1 = ~production)')
+    parser.add_argument('--history', choices=['text', 'list'], default='text')
+    args = parser.parse_args()
+
+    records = list(seed_base(args.seed, args.scale)['Projects'].values())
+    if args.history == 'text':
+        for record in records:
+            record['fields']['Update history'] = '\n'.join(record['fields'].get('Update history', []))
+
+    jobs, job_bytes = measure(lambda: transforms.transform_projects(records))
+    # The old row shape: a dict per job with its history split into a list
+    dicts, dict_bytes = measure(lambda: [job.as_dict() for job in transforms.transform_projects(records)])
+
+    dumps = FastJSONProvider(Flask(__name__)).dumps_bytes
+    identical = dumps(jobs) == dumps(dicts)
+
+    count = len(records)
+    print(f"{count} jobs, update history as {args.history}")
+    print(f"{'dict rows':<14}{dict_bytes / 1024:>10.1f} KiB{dict_bytes / count:>10.0f} B/job")
+    print(f"{'Job records':<14}{job_bytes / 1024:>10.1f} KiB{job_bytes / count:>10.0f} B/job")
+    print(f"reduction: {100 * (1 - job_bytes / dict_bytes):.0f}%, identical JSON: {'yes' if identical else 'NO'}")
+    if not identical:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
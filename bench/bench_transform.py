@@ -0,0 +1,164 @@
+"""
+Micro-benchmark: Projects record transform throughput.
+Compares the old per-record transform_project (uncompiled regexes, a months
+dict and two datetime.now() calls per date) against transforms.transform_projects.
+
+Run from the repo root:
+    python bench/bench_transform.py [--records 2000] [--repeat 20]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transforms import transform_projects
+
+
+# ===== BASELINE (pre-batch transform, kept verbatim for comparison) =====
+def legacy_parse_friendly_date(friendly_str):
+    if not friendly_str or friendly_str.upper() == 'TBC':
+        return None
+    match = re.search(r'(\d{1,2})\s+(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)', friendly_str, re.IGNORECASE)
+    if match:
+        day = int(match.group(1))
+        month_str = match.group(2).capitalize()
+        months = {'Jan': 1, 'Feb': 2, 'Mar': 3, 'Apr': 4, 'May': 5, 'Jun': 6,
+                  'Jul': 7, 'Aug': 8, 'Sep': 9, 'Oct': 10, 'Nov': 11, 'Dec': 12}
+        month = months.get(month_str)
+        if month:
+            year = datetime.now().year
+            try:
+                date = datetime(year, month, day)
+                if (datetime.now() - date).days > 180:
+                    date = datetime(year + 1, month, day)
+                return date.strftime('%Y-%m-%d')
+            except ValueError:
+                return None
+    try:
+        return datetime.strptime(friendly_str, '%d %B %Y').strftime('%Y-%m-%d')
+    except ValueError:
+        pass
+    return None
+
+
+def legacy_parse_status_changed(status_str):
+    if not status_str:
+        return None
+    if 'T' in status_str:
+        return status_str.split('T')[0]
+    match = re.search(r'(\d{1,2})/(\d{1,2})/(\d{4})', status_str)
+    if match:
+        day, month, year = int(match.group(1)), int(match.group(2)), int(match.group(3))
+        try:
+            return datetime(year, month, day).strftime('%Y-%m-%d')
+        except ValueError:
+            return None
+    return None
+
+
+def legacy_transform_project(record):
+    fields = record.get('fields', {})
+    job_number = fields.get('Job Number', '')
+    update_summary = fields.get('Update Summary', '') or fields.get('Update', '')
+    latest_update = update_summary
+    if '|' in update_summary:
+        parts = update_summary.split('|')
+        latest_update = parts[-1].strip() if parts else update_summary
+    update_due = legacy_parse_friendly_date(fields.get('Update due friendly', ''))
+    live_date_raw = fields.get('Live Date', '')
+    live_date = legacy_parse_friendly_date(live_date_raw) if live_date_raw else None
+    last_updated = legacy_parse_status_changed(fields.get('Last update made', ''))
+    update_history_raw = fields.get('Update history', [])
+    if isinstance(update_history_raw, str):
+        update_history = [u.strip() for u in update_history_raw.split('\n') if u.strip()]
+    elif isinstance(update_history_raw, list):
+        update_history = update_history_raw
+    else:
+        update_history = []
+    return {
+        'jobNumber': job_number,
+        'jobName': fields.get('Project Name', ''),
+        'clientCode': job_number.split(' ')[0] if job_number else None,
+        'client': fields.get('Client', ''),
+        'description': fields.get('Description', ''),
+        'projectOwner': fields.get('Project Owner', ''),
+        'update': latest_update,
+        'updateHistory': update_history,
+        'updateDue': update_due,
+        'liveDate': live_date,
+        'lastUpdated': last_updated,
+        'stage': fields.get('Stage', 'Triage'),
+        'status': fields.get('Status', 'Incoming'),
+        'withClient': bool(fields.get('With Client?', False)),
+        'channelUrl': fields.get('Channel Url', ''),
+        'teamsChannelId': fields.get('Teams Channel ID', '')
+    }
+
+
+# ===== FIXTURES =====
+def make_records(count, seed=7):
+    """Projects records shaped like the real table, with realistic date reuse"""
+    rng = random.Random(seed)
+    clients = ['SKY', 'TOW', 'ONE', 'ONB', 'ONS', 'FIS', 'LAB', 'HUN']
+    months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+    friendly = [f"{d} {m}" for d in range(1, 29) for m in months[:3]] + ['TBC', '']
+    records = []
+    for i in range(count):
+        code = rng.choice(clients)
+        history = [f"{rng.randint(1, 28)}/{rng.randint(1, 12)} Update {n} for job {i}" for n in range(rng.randint(0, 12))]
+        records.append({
+            'id': f'rec{i:06d}',
+            'fields': {
+                'Job Number': f'{code} {i % 1000:03d}',
+                'Project Name': f'Project {i}',
+                'Client': code,
+                'Description': 'Campaign refresh across digital and OOH ' * 2,
+                'Project Owner': rng.choice(['Sarah', 'Mike', 'Aroha', 'Jess']),
+                'Update Summary': ' | '.join(history[-3:]) or 'Kicked off',
+                'Update history': history,
+                'Update due friendly': f"{rng.choice(['Mon', 'Tue', 'Wed'])} {rng.choice(friendly)}",
+                'Live Date': rng.choice(friendly),
+                'Last update made': f"{rng.randint(1, 28)}/{rng.randint(1, 12)}/2026",
+                'Stage': rng.choice(['Clarify', 'Simplify', 'Craft', 'Refine', 'Deliver']),
+                'Status': rng.choice(['Incoming', 'In Progress', 'On Hold']),
+                'With Client?': rng.random() < 0.3,
+            }
+        })
+    return records
+
+
+def records_per_second(fn, records, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(records)
+        best = min(best, time.perf_counter() - start)
+    return len(records) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--records', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    records = make_records(args.records)
+    # Jobs are slotted records now (see transforms.Job) - compare their JSON shape
+    assert [legacy_transform_project(r) for r in records] == [job.as_dict() for job in transform_projects(records)]
+
+    before = records_per_second(lambda rs: [legacy_transform_project(r) for r in rs], records, args.repeat)
+    after = records_per_second(transform_projects, records, args.repeat)
+
+    print(f"records: {args.records}  (best of {args.repeat})")
+    print(f"before  transform_project   {before:>12,.0f} records/s")
+    print(f"after   transform_projects  {after:>12,.0f} records/s  ({after / before:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,512 @@
+"""
+Local stand-in for the Airtable REST API, for benchmarks.
+
+Serves list/get/create/update for every table in a seeded base, with the
+behaviour the app depends on: pageSize and offset paging, fields[]
+projection, maxRecords, a single sort, and filterByFormula evaluated against
+the records (the subset of the formula language this repo writes - field
+refs, string and number literals, comparisons, &, AND/OR/NOT, FIND, ARRAYJOIN,
+RECORD_ID, TRUE/FALSE, LAST_MODIFIED_TIME, DATETIME_PARSE, IS_AFTER/IS_BEFORE). Latency and 429s
+are injected deterministically, so runs repeat. GET /_fake/stats reports
+how many calls it served and rate limited.
+
+    server = FakeAirtable(seed=7, latency_ms=20, rate_limit_every=50).start()
+    os.environ['AIRTABLE_API_URL'] = server.api_url     # before importing app
+
+From a shell:
+
+    python bench/fake_airtable.py --port 8765 --latency-ms 150
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+MAX_PAGE_SIZE = 100
+
+
+# ===== SEED DATA =====
+CLIENTS = [
+    ('SKY', 'Sky'), ('TOW', 'Tower'), ('ONE', 'One NZ'), ('ONB', 'One NZ Business'),
+    ('ONS', 'One NZ Simplification'), ('FIS', 'Fisher Funds'), ('LAB', 'Labour'),
+    ('HUN', 'Hunch'), ('KFC', 'KFC'), ('AKL', 'Auckland Council'), ('WEL', 'Wellington Zoo'),
+    ('MER', 'Mercury'), ('ANZ', 'ANZ'), ('AIR', 'Air NZ'), ('NZP', 'NZ Post'),
+    ('BNZ', 'BNZ'), ('SPK', 'Spark'), ('FON', 'Fonterra'), ('ZEN', 'Z Energy'),
+    ('KIW', 'Kiwibank'), ('TVN', 'TVNZ'), ('RNZ', 'RNZ'), ('DOC', 'DOC'), ('ACC', 'ACC'),
+]
+OWNERS = ['Sarah', 'Mike', 'Aroha', 'Jess', 'Tom', 'Priya', 'Hemi', 'Lucy']
+STAGES = ['Clarify', 'Simplify', 'Craft', 'Refine', 'Deliver']
+STATUSES = ['Incoming', 'In Progress', 'On Hold', 'Completed', 'Archived']
+MONTHS = ['January', 'February', 'March', 'April', 'May', 'June', 'July',
+          'August', 'September', 'October', 'November', 'December']
+SHORT_MONTHS = [m[:3] for m in MONTHS]
+
+
+def seed_base(seed=7, scale=1.0):
+    """
+    {table: {record id: record}} shaped like the real base. scale=1 is
+    roughly production size: 1,200 projects, 350 people, 5,000 tracker rows.
+    """
+    rng = random.Random(seed)
+    epoch = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    def record(prefix, n, fields):
+        created = epoch + timedelta(minutes=rng.randint(0, 400_000))
+        return f'rec{prefix}{n:07d}', {'id': f'rec{prefix}{n:07d}', 'createdTime': _iso(created), 'fields': fields}
+
+    tables = {name: {} for name in ('Projects', 'Clients', 'People', 'Tracker', 'Updates', 'Traffic')}
+
+    next_job = {}
+    for n, (code, name) in enumerate(CLIENTS):
+        monthly = rng.choice([0, 5000, 8000, 12000, 20000, 35000])
+        quarters = {q: rng.randint(0, monthly * 3) for q in ('JAN-MAR', 'APR-JUN', 'JUL-SEP', 'OCT-DEC')}
+        next_job[code] = 1
+        rid, rec = record('C', n, {
+            'Client code': code, 'Clients': name,
+            'Teams ID': f'19:{code.lower()}@thread.tacv2', 'Sharepoint ID': f'sp-{code.lower()}',
+            'Monthly Committed': monthly, 'Quarterly Committed': monthly * 3,
+            'Rollover Credit': [rng.randint(0, 5000)], 'Rollover use': rng.choice(['', 'JAN-MAR', 'APR-JUN']),
+            'Year end': rng.choice(['March', 'June', 'December']), 'Current Quarter': 'OCT-DEC',
+            'This month': rng.randint(0, monthly), 'This Quarter': rng.randint(0, monthly * 3),
+            'Next Job #': '001', **quarters,
+        })
+        tables['Clients'][rid] = rec
+
+    projects = []
+    for n in range(int(1200 * scale)):
+        code = rng.choice(CLIENTS)[0]
+        job_number = f'{code} {next_job[code]:03d}'
+        next_job[code] += 1
+        history = [f'{rng.randint(1, 28)}/{rng.randint(1, 12)} - Update {i} on {job_number}'
+                   for i in range(rng.randint(0, 15))]
+        rid, rec = record('P', n, {
+            'Job Number': job_number, 'Project Name': f'{code} campaign {n}', 'Client': code,
+            'Description': 'Brand refresh across digital, social and OOH. ' * rng.randint(1, 4),
+            'Project Owner': rng.choice(OWNERS),
+            'Update Summary': ' | '.join(history[-3:]), 'Update': history[-1] if history else '',
+            'Update history': history,
+            'Update due friendly': f"{rng.choice(['Mon', 'Tue', 'Wed', 'Thu', 'Fri'])} {rng.randint(1, 28)} {rng.choice(SHORT_MONTHS)}",
+            'Live Date': rng.choice(['TBC', f'{rng.randint(1, 28)} {rng.choice(SHORT_MONTHS)}']),
+            'Last update made': f'{rng.randint(1, 28)}/{rng.randint(1, 12)}/2026',
+            'Stage': rng.choice(STAGES), 'Status': rng.choices(STATUSES, (3, 6, 1, 4, 6))[0],
+            'With Client?': rng.random() < 0.3, 'Round': rng.randint(0, 4),
+            'Channel Url': f'https://teams.example/{code.lower()}/{n}', 'Teams Channel ID': f'19:{n}@thread',
+        })
+        tables['Projects'][rid] = rec
+        projects.append(rec['fields'])
+
+    for code, _ in CLIENTS:
+        rid = next(r for r, rec in tables['Clients'].items() if rec['fields']['Client code'] == code)
+        tables['Clients'][rid]['fields']['Next Job #'] = f'{next_job[code]:03d}'
+
+    client_ids = {rec['fields']['Client code']: rid for rid, rec in tables['Clients'].items()}
+    for n in range(int(350 * scale)):
+        code = rng.choice(CLIENTS)[0]
+        first = rng.choice(['Ana', 'Ben', 'Cara', 'Dev', 'Ema', 'Finn', 'Gus', 'Hana', 'Ivy', 'Jack'])
+        last = rng.choice(['Smith', 'Ngata', 'Patel', 'Lee', 'Brown', 'Wilson', 'Tane', 'Chen'])
+        rid, rec = record('E', n, {
+            'Name': f'{first} {last}', 'Full name': f'{first} {last}',
+            'Email Address': f'{first}.{last}{n}@{code.lower()}.example'.lower(),
+            'Phone Number': f'+64 21 {rng.randint(100, 999)} {rng.randint(1000, 9999)}',
+            # A linked field: the API returns Clients record ids (a few old rows hold the code)
+            'Client Link': [client_ids[code] if n % 10 else code], 'Active': rng.random() < 0.85,
+        })
+        tables['People'][rid] = rec
+
+    for n in range(int(5000 * scale)):
+        project = rng.choice(projects)
+        rid, rec = record('T', n, {
+            'Client Code': [project['Client']], 'Job Number': [project['Job Number']],
+            'Project Name': [project['Project Name']], 'Owner': [project['Project Owner']],
+            'Tracker notes': rng.choice(['Design', 'Production', 'Media', 'Shoot', 'Edit', '']),
+            'Spend': rng.choice([0, rng.randint(200, 20000)]), 'Month': rng.choice(MONTHS),
+            'Spend type': rng.choice(['Project budget', 'Project budget', 'Extra budget']),
+            'Ballpark': rng.random() < 0.2,
+        })
+        tables['Tracker'][rid] = rec
+
+    return tables
+
+
+def _iso(moment):
+    return moment.strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+
+# ===== FORMULAS =====
+TOKEN_RE = re.compile(r"""\s*(?:
+    (?P<field>\{[^}]*\}) |
+    (?P<string>'[^']*'|"[^"]*") |
+    (?P<number>\d+(?:\.\d+)?) |
+    (?P<name>[A-Z_][A-Z_0-9]*) |
+    (?P<op>!=|<=|>=|=|<|>|&|\(|\)|,)
+)""", re.VERBOSE | re.IGNORECASE)
+
+
+class Formula:
+    """
+    A parsed filterByFormula. evaluate(record, modified) -> truthy if the
+    record matches. The tree is compiled to nested closures once, since the
+    same few formulas are evaluated against every record of a table.
+    """
+
+    def __init__(self, source):
+        self.tokens = self._tokenize(source)
+        self.pos = 0
+        self.tree = self._comparison()
+        if self.pos != len(self.tokens):
+            raise ValueError(f'Unexpected {self.tokens[self.pos][1]!r} in formula')
+        self.evaluate = self._compile(self.tree)
+
+    @staticmethod
+    def _tokenize(source):
+        tokens, pos = [], 0
+        source = source.strip()
+        while pos < len(source):
+            match = TOKEN_RE.match(source, pos)
+            if not match or match.end() == pos:
+                raise ValueError(f'Cannot parse formula at {source[pos:]!r}')
+            kind = match.lastgroup
+            tokens.append((kind, match.group(kind)))
+            pos = match.end()
+        return tokens
+
+    def _peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def _take(self, value=None):
+        token = self._peek()
+        if value is not None and token[1] != value:
+            raise ValueError(f'Expected {value!r}, got {token[1]!r}')
+        self.pos += 1
+        return token
+
+    def _comparison(self):
+        left = self._concat()
+        if self._peek()[1] in ('=', '!=', '<', '>', '<=', '>='):
+            op = self._take()[1]
+            return ('cmp', op, left, self._concat())
+        return left
+
+    def _concat(self):
+        node = self._primary()
+        while self._peek()[1] == '&':
+            self._take()
+            node = ('concat', node, self._primary())
+        return node
+
+    def _primary(self):
+        kind, value = self._take()
+        if kind == 'field':
+            return ('field', value[1:-1])
+        if kind == 'string':
+            return ('value', value[1:-1])
+        if kind == 'number':
+            return ('value', float(value))
+        if kind == 'op' and value == '(':
+            node = self._comparison()
+            self._take(')')
+            return node
+        if kind == 'name':
+            self._take('(')
+            args = []
+            while self._peek()[1] != ')':
+                args.append(self._comparison())
+                if self._peek()[1] == ',':
+                    self._take()
+            self._take(')')
+            return ('call', value.upper(), args)
+        raise ValueError(f'Unexpected {value!r} in formula')
+
+    def _compile(self, node):
+        """node -> fn(record, modified)"""
+        kind = node[0]
+        if kind == 'value':
+            value = node[1]
+            return lambda record, modified: value
+        if kind == 'field':
+            name = node[1]
+
+            def field(record, modified):
+                value = record['fields'].get(name)
+                # Linked/lookup fields compare as their comma-joined display text
+                return ', '.join(str(v) for v in value) if isinstance(value, list) else value
+            return field
+        if kind == 'concat':
+            left, right = self._compile(node[1]), self._compile(node[2])
+            return lambda record, modified: _text(left(record, modified)) + _text(right(record, modified))
+        if kind == 'cmp':
+            op, left, right = node[1], self._compile(node[2]), self._compile(node[3])
+            return lambda record, modified: _compare(op, left(record, modified), right(record, modified))
+
+        name = node[1]
+        args = [self._compile(arg) for arg in node[2]]
+        if name == 'AND':
+            return lambda record, modified: all(arg(record, modified) for arg in args)
+        if name == 'OR':
+            return lambda record, modified: any(arg(record, modified) for arg in args)
+        if name == 'NOT':
+            return lambda record, modified: not args[0](record, modified)
+        if name in ('TRUE', 'FALSE'):
+            value = name == 'TRUE'
+            return lambda record, modified: value
+        if name == 'RECORD_ID':
+            return lambda record, modified: record['id']
+        if name == 'FIND':
+            return lambda record, modified: _text(args[1](record, modified)).find(_text(args[0](record, modified))) + 1
+        if name == 'ARRAYJOIN':
+            # Lists already read as their joined text (see field above)
+            return lambda record, modified: _text(args[0](record, modified))
+        if name == 'LAST_MODIFIED_TIME':
+            return lambda record, modified: modified
+        if name == 'DATETIME_PARSE':
+            return lambda record, modified: datetime.fromisoformat(_text(args[0](record, modified)).replace('Z', '+00:00'))
+        if name == 'IS_AFTER':
+            return lambda record, modified: args[0](record, modified) > args[1](record, modified)
+        if name == 'IS_BEFORE':
+            return lambda record, modified: args[0](record, modified) < args[1](record, modified)
+        raise ValueError(f'Unsupported formula function {name}')
+
+
+def _text(value):
+    if value is None or value is False:
+        return ''
+    if value is True:
+        return '1'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _compare(op, left, right):
+    if isinstance(left, bool) or isinstance(right, bool):
+        left, right = bool(left), bool(right)
+    elif isinstance(left, (int, float)) and isinstance(right, (int, float)):
+        pass
+    else:
+        left, right = _text(left), _text(right)
+    return {'=': left == right, '!=': left != right, '<': left < right,
+            '>': left > right, '<=': left <= right, '>=': left >= right}[op]
+
+
+class OffsetError(ValueError):
+    """A list request's offset isn't one we handed out"""
+
+
+@lru_cache(maxsize=1024)
+def parse_formula(source):
+    return Formula(source)
+
+
+# ===== SERVER =====
+class FakeAirtable:
+    """
+    tables is {table: {record id: record}} - seeded with seed_base(seed,
+    scale) if not given. Every request waits latency_ms plus up to
+    jitter_ms (seeded); every rate_limit_every-th request gets a 429.
+    """
+
+    def __init__(self, tables=None, seed=7, scale=1.0, latency_ms=0, jitter_ms=0,
+                 rate_limit_every=0, host='127.0.0.1', port=0):
+        self.tables = tables if tables is not None else seed_base(seed, scale)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_limit_every = rate_limit_every
+        self.request_count = 0
+        self.rate_limited = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._modified = {
+            rid: datetime.fromisoformat(record['createdTime'].replace('Z', '+00:00'))
+            for table in self.tables.values() for rid, record in table.items()
+        }
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def api_url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/v0'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    # ----- behaviour -----
+    def _admit(self):
+        """Count the request, sleep the injected latency, and say whether to 429 it"""
+        with self._lock:
+            self.request_count += 1
+            limited = bool(self.rate_limit_every) and self.request_count % self.rate_limit_every == 0
+            if limited:
+                self.rate_limited += 1
+            delay = self.latency_ms + self._rng.uniform(0, self.jitter_ms)
+        if delay:
+            time.sleep(delay / 1000)
+        return not limited
+
+    def list_records(self, table, query):
+        """One page of a list request: (records, offset or None)"""
+        records = list(self.tables.get(table, {}).values())
+
+        formula = query.get('filterByFormula', [''])[0]
+        if formula:
+            compiled = parse_formula(formula)
+            records = [r for r in records if compiled.evaluate(r, self._modified[r['id']])]
+
+        if 'sort[0][field]' in query:
+            field = query['sort[0][field]'][0]
+            descending = query.get('sort[0][direction]', ['asc'])[0] == 'desc'
+            records.sort(key=lambda r: _text(r['fields'].get(field)), reverse=descending)
+
+        if 'maxRecords' in query:
+            records = records[:int(query['maxRecords'][0])]
+
+        try:
+            start = int(query['offset'][0].split('/')[0][3:]) if 'offset' in query else 0
+        except ValueError:
+            raise OffsetError(f"Unknown offset {query['offset'][0]!r}")
+        size = min(int(query.get('pageSize', [MAX_PAGE_SIZE])[0]), MAX_PAGE_SIZE)
+        page = records[start:start + size]
+        offset = f'itr{start + size}/{page[-1]["id"]}' if start + size < len(records) else None
+
+        fields = query.get('fields[]')
+        if fields:
+            page = [dict(r, fields={k: v for k, v in r['fields'].items() if k in fields}) for r in page]
+        return page, offset
+
+    def write_record(self, table, record_id, fields):
+        """Create (record_id None) or update a record; returns it"""
+        with self._lock:
+            rows = self.tables.setdefault(table, {})
+            now = datetime.now(timezone.utc)
+            if record_id is None:
+                record_id = f'recN{len(rows):07d}{self._rng.randint(0, 999):03d}'
+                rows[record_id] = {'id': record_id, 'createdTime': _iso(now), 'fields': {}}
+            elif record_id not in rows:
+                return None
+            rows[record_id]['fields'].update(fields)
+            self._modified[record_id] = now
+            return json.loads(json.dumps(rows[record_id]))
+
+    # ----- HTTP -----
+    def _handler_class(self):
+        source = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _route(self):
+                url = urlparse(self.path)
+                parts = [unquote(p) for p in url.path.strip('/').split('/')]
+                return parts, parse_qs(url.query)
+
+            def _body(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                return json.loads(self.rfile.read(length) or b'{}')
+
+            def do_GET(self):
+                if self.path == '/_fake/stats':
+                    return self._json({'requests': source.request_count, 'rate_limited': source.rate_limited})
+                if not source._admit():
+                    return self._rate_limited()
+                parts, query = self._route()
+
+                # /v0/meta/bases/<base>/tables
+                if parts[1:2] == ['meta']:
+                    return self._json({'tables': [{'id': f'tbl{name}', 'name': name} for name in source.tables]})
+                # /v0/bases/<base>/webhooks
+                if parts[1:2] == ['bases'] and len(parts) == 4:
+                    return self._json({'webhooks': [{'id': 'achBENCH', 'cursorForNextPayload': 1}]})
+                # /v0/bases/<base>/webhooks/<id>/payloads
+                if parts[1:2] == ['bases']:
+                    return self._json({'payloads': [], 'cursor': 1, 'mightHaveMore': False})
+                # /v0/<base>/<table>[/<record>]
+                if len(parts) == 4:
+                    record = source.tables.get(parts[2], {}).get(parts[3])
+                    return self._json(record) if record else self._not_found()
+                if len(parts) == 3:
+                    try:
+                        records, offset = source.list_records(parts[2], query)
+                    except OffsetError as e:
+                        return self._json({'error': {'type': 'LIST_RECORDS_ITERATOR_NOT_AVAILABLE', 'message': str(e)}}, 422)
+                    except ValueError as e:
+                        return self._json({'error': {'type': 'INVALID_FILTER_BY_FORMULA', 'message': str(e)}}, 422)
+                    data = {'records': records}
+                    if offset:
+                        data['offset'] = offset
+                    return self._json(data)
+                self._not_found()
+
+            def do_PATCH(self):
+                if not source._admit():
+                    return self._rate_limited()
+                parts, _ = self._route()
+                if len(parts) != 4:
+                    return self._not_found()
+                record = source.write_record(parts[2], parts[3], self._body().get('fields', {}))
+                return self._json(record) if record else self._not_found()
+
+            def do_POST(self):
+                if not source._admit():
+                    return self._rate_limited()
+                parts, _ = self._route()
+                if len(parts) != 3:
+                    return self._not_found()
+                body = self._body()
+                if 'records' in body:
+                    return self._json({'records': [
+                        source.write_record(parts[2], None, r.get('fields', {})) for r in body['records']
+                    ]})
+                return self._json(source.write_record(parts[2], None, body.get('fields', {})))
+
+            def _rate_limited(self):
+                self._json({'errors': [{'error': 'RATE_LIMIT_REACHED',
+                                        'message': 'Rate limit exceeded. Please try again later'}]}, 429)
+
+            def _not_found(self):
+                self._json({'error': 'NOT_FOUND'}, 404)
+
+            def _json(self, data, status=200):
+                body = json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve a seeded fake Airtable base')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--scale', type=float, default=1.0)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--rate-limit-every', type=int, default=0)
+    args = parser.parse_args()
+
+    server = FakeAirtable(seed=args.seed, scale=args.scale, latency_ms=args.latency_ms,
+                          jitter_ms=args.jitter_ms, rate_limit_every=args.rate_limit_every, port=args.port)
+    counts = ', '.join(f'{name} {len(rows)}' for name, rows in server.tables.items())
+    print(f"Serving {counts} at {server.api_url} - start the app with AIRTABLE_API_URL={server.api_url}")
+    server.start()._thread.join()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""
+Local stand-in for the Anthropic Messages API, for benchmarks.
+
+POST /v1/messages answers from a script: by default a question that
+mentions spend, people or job numbers gets a tool_use turn for the
+matching Ask Dot tool, and anything else (including the follow-up carrying
+tool results) gets a text turn with the JSON Dot is asked to reply in.
+Usage is reported from the request size, so token metrics move too.
+
+    server = FakeAnthropic(latency_ms=400).start()
+    os.environ['ANTHROPIC_API_URL'] = server.api_url    # before importing app
+
+From a shell:
+
+    python bench/fake_anthropic.py --port 8766 --latency-ms 800
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CLIENT_CODE_RE = re.compile(r'\b([A-Z]{3})\b')
+
+# (keyword in the question, tool Dot should call)
+TOOL_RULES = [
+    ('spend', 'get_spend_summary'),
+    ('budget', 'get_spend_summary'),
+    ('who', 'search_people'),
+    ('contact', 'search_people'),
+    ('reserve', 'reserve_job_number'),
+    ('new job', 'reserve_job_number'),
+    ('about', 'get_client_detail'),
+]
+
+
+def default_script(body):
+    """Pick the next assistant turn for a Messages request body"""
+    messages = body.get('messages', [])
+    last = messages[-1]['content'] if messages else ''
+
+    if body.get('tools') and isinstance(last, str):
+        question = last.lower()
+        code = CLIENT_CODE_RE.search(last)
+        for keyword, tool in TOOL_RULES:
+            if keyword in question:
+                tool_input = {'client_code': code.group(1) if code else 'SKY'}
+                if tool == 'search_people':
+                    tool_input['search_term'] = None
+                return [{'type': 'tool_use', 'id': f'toolu_{len(messages):04d}', 'name': tool, 'input': tool_input}], 'tool_use'
+
+    reply = {
+        'type': 'answer',
+        'message': "Here's what I found.",
+        'jobs': None,
+        'nextPrompt': 'Anything else?',
+    }
+    return [{'type': 'text', 'text': json.dumps(reply)}], 'end_turn'
+
+
+class FakeAnthropic:
+    """script(body) -> (content blocks, stop reason); latency_ms is added to every call"""
+
+    def __init__(self, latency_ms=0, script=default_script, host='127.0.0.1', port=0):
+        self.latency_ms = latency_ms
+        self.script = script
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def api_url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler_class(self):
+        source = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != '/_fake/stats':
+                    return self._json({'type': 'error', 'error': {'type': 'not_found_error'}}, 404)
+                self._json({'requests': source.request_count})
+
+            def do_POST(self):
+                if self.path != '/v1/messages':
+                    return self._json({'type': 'error', 'error': {'type': 'not_found_error'}}, 404)
+
+                raw = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                body = json.loads(raw or b'{}')
+                with source._lock:
+                    source.request_count += 1
+                    number = source.request_count
+                if source.latency_ms:
+                    time.sleep(source.latency_ms / 1000)
+
+                content, stop_reason = source.script(body)
+                output = sum(len(json.dumps(block)) for block in content)
+                self._json({
+                    'id': f'msg_fake{number:06d}',
+                    'type': 'message',
+                    'role': 'assistant',
+                    'model': body.get('model'),
+                    'content': content,
+                    'stop_reason': stop_reason,
+                    'usage': {'input_tokens': len(raw) // 4, 'output_tokens': output // 4,
+                              'cache_read_input_tokens': 0, 'cache_creation_input_tokens': 0},
+                })
+
+            def _json(self, data, status=200):
+                out = json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(out)))
+                self.end_headers()
+                self.wfile.write(out)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve a scripted fake Anthropic Messages API')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    args = parser.parse_args()
+
+    server = FakeAnthropic(latency_ms=args.latency_ms, port=args.port)
+    print(f"Serving /v1/messages at {server.api_url} - start the app with ANTHROPIC_API_URL={server.api_url}")
+    server.start()._thread.join()
+
+
+if __name__ == '__main__':
+    main()
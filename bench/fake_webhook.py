@@ -0,0 +1,179 @@
+"""
+Local stand-in for Airtable's side of a webhook.
+
+Serves the list-payloads endpoint (plus a minimal records endpoint that
+answers RECORD_ID() lookups) and sends signed notification pings to the app,
+so /webhooks/airtable can be exercised without a real base.
+
+In-process, against the Flask test client:
+
+    source = FakeWebhookSource(notify=app.test_client(), records={'Projects': {...}})
+    source.start()          # point cache.AIRTABLE_API_URL / webhooks at source.api_url
+    source.send('tblProjects', changed=['rec1'], destroyed=['rec2'])
+
+From a shell, against a running app started with
+AIRTABLE_API_URL=http://127.0.0.1:8765/v0 and the same AIRTABLE_WEBHOOK_SECRET:
+
+    python bench/fake_webhook.py --notify http://localhost:5000/webhooks/airtable
+    > tblProjects changed rec1 rec2
+    > tblTracker destroyed rec9
+"""
+
+import argparse
+import base64
+import json
+import os
+import re
+import sys
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import webhooks
+
+RECORD_ID_RE = re.compile(r"RECORD_ID\(\)\s*=\s*'([^']+)'")
+
+DEFAULT_SECRET = base64.b64encode(b'dot-hub-fake-webhook-secret').decode()
+
+
+class FakeWebhookSource:
+    """
+    notify is the app's webhook URL, or a Flask test client (posted to
+    /webhooks/airtable). records is {table name: {record id: fields}} for
+    the records endpoint the app re-reads changed records from.
+    """
+
+    def __init__(self, notify, records=None, base_id='appFAKE', webhook_id='achFAKE',
+                 secret_b64=DEFAULT_SECRET, host='127.0.0.1', port=0):
+        self.notify = notify
+        self.records = records if records is not None else {}
+        self.base_id = base_id
+        self.webhook_id = webhook_id
+        self.secret_b64 = secret_b64
+        self.payloads = []
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._thread = None
+
+    @property
+    def api_url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/v0'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    # ----- sending -----
+    def send(self, table_id, changed=(), created=(), destroyed=()):
+        """Queue one payload for table_id and ping the app. Returns the app's response."""
+        self.payloads.append({
+            'timestamp': _now(),
+            'baseTransactionNumber': len(self.payloads) + 1,
+            'payloadFormat': 'v0',
+            'actionMetadata': {'source': 'client'},
+            'changedTablesById': {
+                table_id: {
+                    'changedRecordsById': {rid: {'current': {'cellValuesByFieldId': {}}} for rid in changed},
+                    'createdRecordsById': {rid: {'createdTime': _now(), 'cellValuesByFieldId': {}} for rid in created},
+                    'destroyedRecordIds': list(destroyed),
+                }
+            },
+        })
+        return self.ping()
+
+    def ping(self, secret_b64=None):
+        body = json.dumps({
+            'base': {'id': self.base_id},
+            'webhook': {'id': self.webhook_id},
+            'timestamp': _now(),
+        }).encode()
+        headers = {
+            'Content-Type': 'application/json',
+            webhooks.SIGNATURE_HEADER: webhooks.sign(body, secret_b64 or self.secret_b64),
+        }
+        if isinstance(self.notify, str):
+            return requests.post(self.notify, data=body, headers=headers)
+        return self.notify.post('/webhooks/airtable', data=body, headers=headers)
+
+    # ----- serving -----
+    def _handler_class(self):
+        source = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                parts = url.path.strip('/').split('/')
+
+                # /v0/bases/<base>/webhooks/<id>/payloads
+                if len(parts) == 6 and parts[1] == 'bases' and parts[5] == 'payloads':
+                    cursor = int(query.get('cursor', ['1'])[0])
+                    batch = source.payloads[cursor - 1:]
+                    return self._json({
+                        'payloads': batch,
+                        'cursor': cursor + len(batch),
+                        'mightHaveMore': False,
+                    })
+
+                # /v0/<base>/<table>
+                if len(parts) == 3:
+                    table = source.records.get(parts[2], {})
+                    formula = query.get('filterByFormula', [''])[0]
+                    wanted = RECORD_ID_RE.findall(formula)
+                    ids = [rid for rid in wanted if rid in table] if wanted else list(table)
+                    return self._json({'records': [
+                        {'id': rid, 'createdTime': _now(), 'fields': table[rid]} for rid in ids
+                    ]})
+
+                self._json({'error': 'NOT_FOUND'}, status=404)
+
+            def _json(self, data, status=200):
+                body = json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Send fake Airtable webhook notifications')
+    parser.add_argument('--notify', default='http://localhost:5000/webhooks/airtable')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--secret', default=os.environ.get('AIRTABLE_WEBHOOK_SECRET', DEFAULT_SECRET))
+    args = parser.parse_args()
+
+    source = FakeWebhookSource(args.notify, secret_b64=args.secret, port=args.port).start()
+    print(f"Serving payloads at {source.api_url} - start the app with AIRTABLE_API_URL={source.api_url}")
+    print("Enter: <table id> changed|created|destroyed <record id>...")
+
+    for line in sys.stdin:
+        words = line.split()
+        if len(words) < 3 or words[1] not in ('changed', 'created', 'destroyed'):
+            print("? <table id> changed|created|destroyed <record id>...")
+            continue
+        response = source.send(words[0], **{words[1]: words[2:]})
+        print(response.status_code, response.text.strip())
+
+
+if __name__ == '__main__':
+    main()
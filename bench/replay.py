@@ -0,0 +1,322 @@
+"""
+Replay captured traffic (see traces.py) against the app and the local
+Airtable and Anthropic stand-ins, at 1x-20x the recorded pace. Reports
+per-route latency percentiles and error rates next to the latency that
+was recorded in production, so worker/thread counts can be sized on the
+real traffic mix.
+
+Requests are sent open-loop: each goes out at its recorded offset divided
+by --speed, whether or not earlier ones have finished. Latency is counted
+from that scheduled time, so a saturated app shows up as latency rather
+than as a slower replay.
+
+Capture in production, then replay in-process or against a running server:
+
+    TRACE_PATH=/var/log/dot-hub/traces.jsonl gunicorn -c gunicorn.conf.py app:app
+    python bench/replay.py traces.jsonl --speed 5
+    python bench/replay.py traces.jsonl --speed 10 --target http://localhost:8000 --save replay.json
+
+With --target the server must already point at the stand-ins:
+
+    python bench/fake_airtable.py --port 8765 --latency-ms 150 &
+    python bench/fake_anthropic.py --port 8766 --latency-ms 1500 &
+    AIRTABLE_API_URL=http://127.0.0.1:8765/v0 ANTHROPIC_API_URL=http://127.0.0.1:8766 \\
+        AIRTABLE_WEBHOOK_SECRET=<bench_api.WEBHOOK_SECRET> gunicorn -c gunicorn.conf.py app:app
+
+The stand-ins don't hold production data, so client codes, job numbers and
+record IDs in the traces are mapped onto the seeded base (consistently, so
+requests for the same job still hit the same job). Strings that capture
+reduced to their length are filled back in at that length.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+import zlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import requests
+
+from bench_api import WEBHOOK_SECRET, fake_stats, percentile, start_app, start_fake
+from fake_airtable import FakeAirtable, seed_base
+from fake_anthropic import FakeAnthropic
+
+import traces
+
+PLACEHOLDER_PREFIX = '<str:'
+
+# Stand-in questions for Ask Dot, so replayed sessions still reach the tools
+QUESTIONS = [
+    "What's {code}'s spend this month?",
+    "Who's our contact at {code}?",
+    "Tell me about {code}",
+    "Reserve a new job for {code}",
+    "Which {code} jobs are due this week?",
+]
+
+
+# ===== REMAPPING =====
+class Remapper:
+    """Maps production codes and IDs onto the seeded base, first come first served"""
+
+    def __init__(self, tables):
+        self.client_codes = sorted(r['fields']['Client code'] for r in tables['Clients'].values())
+        self.jobs_by_client = defaultdict(list)
+        for record in tables['Projects'].values():
+            job_number = record['fields']['Job Number']
+            self.jobs_by_client[job_number.split(' ')[0]].append(job_number)
+        self.all_jobs = sorted(job for jobs in self.jobs_by_client.values() for job in jobs)
+        self.tracker_ids = sorted(tables['Tracker'])
+        self._maps = defaultdict(dict)
+
+    def _pick(self, kind, value, pool):
+        mapping = self._maps[kind]
+        if value not in mapping:
+            mapping[value] = pool[len(mapping) % len(pool)]
+        return mapping[value]
+
+    def client(self, code):
+        return self._pick('client', code, self.client_codes)
+
+    def job(self, job_number):
+        code = self.client(job_number.split(' ')[0])
+        return self._pick('job', job_number, sorted(self.jobs_by_client[code]) or self.all_jobs)
+
+    def record_id(self, record_id):
+        return self._pick('record', record_id, self.tracker_ids)
+
+    def path(self, route, path):
+        """Recorded path with its <client_code>/<job_number> segments remapped"""
+        if not route:
+            return path
+        parts = path.split('/')
+        for i, part in enumerate(route.split('/')):
+            if i >= len(parts):
+                break
+            if part == '<client_code>':
+                parts[i] = self.client(parts[i])
+            elif part == '<job_number>':
+                parts[i] = self.job(parts[i])
+        return '/'.join(parts)
+
+
+def fill(value, key, remap, salt):
+    """Rebuild a sanitized body: placeholders back to strings, IDs remapped"""
+    if isinstance(value, dict):
+        return {k: fill(v, k, remap, salt) for k, v in value.items()}
+    if isinstance(value, list):
+        return [fill(item, key, remap, salt) for item in value]
+    if isinstance(value, str):
+        if value.startswith(PLACEHOLDER_PREFIX) and value.endswith('>'):
+            length = int(value[len(PLACEHOLDER_PREFIX):-1])
+            if key == 'question':
+                question = QUESTIONS[salt % len(QUESTIONS)].format(code=remap.client_codes[salt % len(remap.client_codes)])
+                return (question + ' ' + 'x' * length)[:max(length, len(question))]
+            return 'x' * length
+        if key == 'code':
+            return remap.client(value)
+        if key == 'id':
+            return remap.record_id(value)
+    return value
+
+
+def build_requests(recorded, remap, speed, max_gap):
+    """[(offset seconds, trace, path, query, body)] in send order"""
+    planned = []
+    offset, previous = 0.0, None
+    for n, trace in enumerate(recorded):
+        if previous is not None:
+            offset += min(trace['ts'] - previous, max_gap) / speed
+        previous = trace['ts']
+
+        query = {k: remap.client(v) if k == 'client' else ('x' * int(v[len(PLACEHOLDER_PREFIX):-1])
+                                                            if v.startswith(PLACEHOLDER_PREFIX) else v)
+                 for k, v in trace.get('args', {}).items()
+                 # A page cursor only means something against the recorded base - ask for page one
+                 if k != 'cursor'}
+        body = trace.get('body')
+        if body is not None:
+            salt = zlib.crc32((trace.get('session') or str(n)).encode())
+            body = fill(body, None, remap, salt)
+            if trace.get('session') and isinstance(body, dict):
+                body['sessionId'] = f"replay-{trace['session']}"
+        planned.append((offset, trace, remap.path(trace['route'], trace['path']), query, body))
+    return planned
+
+
+# ===== SENDING =====
+def in_process_sender(flask_app):
+    import webhooks     # after start_app, which sets the config it reads at import
+    local = threading.local()
+
+    def send(method, path, query, body):
+        if not hasattr(local, 'client'):
+            local.client = flask_app.test_client()
+        headers, data = {}, None
+        if body is not None:
+            data = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+            if path == '/webhooks/airtable':
+                headers[webhooks.SIGNATURE_HEADER] = webhooks.sign(data, WEBHOOK_SECRET)
+        if path == '/events':
+            response = local.client.get(path, query_string=query, buffered=False)
+            next(iter(response.response))
+            response.close()
+            return response.status_code
+        return local.client.open(path, method=method, query_string=query, data=data, headers=headers).status_code
+
+    return send
+
+
+def http_sender(target):
+    import webhooks
+    local = threading.local()
+
+    def send(method, path, query, body):
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        headers, data = {}, None
+        if body is not None:
+            data = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+            if path == '/webhooks/airtable':
+                headers[webhooks.SIGNATURE_HEADER] = webhooks.sign(data, WEBHOOK_SECRET)
+        with local.session.request(method, target + path, params=query, data=data, headers=headers,
+                                   stream=path == '/events', timeout=120) as response:
+            if path == '/events':
+                next(response.iter_lines(), None)
+            else:
+                response.content
+            return response.status_code
+
+    return send
+
+
+def replay(planned, send, max_inflight):
+    """[(route, status or None, latency ms, lateness ms)] - latency counts from the scheduled time"""
+    results = []
+    lock = threading.Lock()
+
+    def one(scheduled, trace, path, query, body):
+        started = time.perf_counter()
+        try:
+            status = send(trace['method'], path, query, body)
+        except Exception:
+            status = None
+        finished = time.perf_counter()
+        with lock:
+            results.append((trace['route'], status, (finished - scheduled) * 1000, (started - scheduled) * 1000))
+
+    begin = time.perf_counter()
+    with ThreadPoolExecutor(max_inflight) as pool:
+        for offset, trace, path, query, body in planned:
+            delay = begin + offset - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(one, begin + offset, trace, path, query, body)
+    return results, time.perf_counter() - begin
+
+
+def summarize(results, recorded):
+    """Per-route and overall stats, with the production p95 for comparison"""
+    recorded_ms = defaultdict(list)
+    for trace in recorded:
+        recorded_ms[trace['route']].append(trace['ms'])
+
+    by_route = defaultdict(list)
+    for route, status, latency, lateness in results:
+        by_route[route].append((status, latency, lateness))
+
+    def stats(rows, recorded_rows):
+        latencies = sorted(latency for _, latency, _ in rows)
+        return {
+            'requests': len(rows),
+            'errors': sum(1 for status, _, _ in rows if status is None or status >= 500),
+            'client_errors': sum(1 for status, _, _ in rows if status is not None and 400 <= status < 500),
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99),
+            'recorded_p95': percentile(sorted(recorded_rows), 95),
+            'late_p95': percentile(sorted(lateness for _, _, lateness in rows), 95),
+        }
+
+    summary = {route: stats(rows, recorded_ms[route]) for route, rows in sorted(by_route.items(), key=lambda item: str(item[0]))}
+    summary['ALL'] = stats([row for rows in by_route.values() for row in rows],
+                           [ms for rows in recorded_ms.values() for ms in rows])
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('traces', help='capture file (TRACE_PATH)')
+    parser.add_argument('--speed', type=float, default=1.0, help='replay pace, e.g. 1-20 (x recorded)')
+    parser.add_argument('--max-gap', type=float, default=10.0, help='cap idle gaps between requests (recorded seconds)')
+    parser.add_argument('--limit', type=int, help='replay only the first N traces')
+    parser.add_argument('--max-inflight', type=int, default=64, help='requests in flight at once')
+    parser.add_argument('--target', help='base URL of a running server (default: the app in-process)')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--scale', type=float, default=1.0, help='base size (1 = ~production)')
+    parser.add_argument('--latency-ms', type=float, default=150, help='Airtable latency per call')
+    parser.add_argument('--jitter-ms', type=float, default=50)
+    parser.add_argument('--claude-latency-ms', type=float, default=1500)
+    parser.add_argument('--rate-limit-every', type=int, default=0, help='answer every Nth Airtable call with 429')
+    parser.add_argument('--save', help='write the summary as JSON')
+    args = parser.parse_args()
+    if args.speed <= 0:
+        parser.error('--speed must be positive')
+
+    recorded = traces.read(args.traces)[:args.limit]
+    if not recorded:
+        parser.error(f'no traces in {args.traces}')
+
+    tables = seed_base(args.seed, args.scale)     # the base the stand-ins serve
+    planned = build_requests(recorded, Remapper(tables), args.speed, args.max_gap)
+
+    airtable_url = anthropic_url = None
+    if args.target:
+        send = http_sender(args.target.rstrip('/'))
+    else:
+        _, airtable_url = start_fake(FakeAirtable, seed=args.seed, scale=args.scale, latency_ms=args.latency_ms,
+                                     jitter_ms=args.jitter_ms, rate_limit_every=args.rate_limit_every)
+        _, anthropic_url = start_fake(FakeAnthropic, latency_ms=args.claude_latency_ms)
+        with contextlib.redirect_stdout(io.StringIO()):
+            flask_app, _ = start_app(airtable_url, anthropic_url)
+        send = in_process_sender(flask_app)
+
+    span = recorded[-1]['ts'] - recorded[0]['ts']
+    print(f"{len(recorded)} traces over {span:.0f}s recorded, replaying at {args.speed:g}x "
+          f"(~{planned[-1][0]:.0f}s) against {args.target or 'the app in-process'}")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        results, elapsed = replay(planned, send, args.max_inflight)
+    summary = summarize(results, recorded)
+
+    print(f"{'route':<34}{'reqs':>6}{'err%':>7}{'4xx':>5}{'p50':>10}{'p95':>10}{'p99':>10}{'prod p95':>11}")
+    for route, s in summary.items():
+        print(f"{str(route):<34}{s['requests']:>6}{100 * s['errors'] / s['requests']:>6.1f}%{s['client_errors']:>5}"
+              f"{s['p50']:>8.1f}ms{s['p95']:>8.1f}ms{s['p99']:>8.1f}ms{s['recorded_p95']:>9.1f}ms")
+    print(f"{len(results) / elapsed:.1f} req/s over {elapsed:.1f}s; send lateness p95 {summary['ALL']['late_p95']:.1f}ms "
+          f"(high = --max-inflight or the replay host is the bottleneck)")
+
+    if airtable_url:
+        airtable_stats, anthropic_stats = fake_stats(airtable_url), fake_stats(anthropic_url)
+        print(f"airtable calls: {airtable_stats['requests']} ({airtable_stats['rate_limited']} rate limited), "
+              f"claude calls: {anthropic_stats['requests']}")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+Dot Remote API - Budget View
+Per-client budget figures, worked out once and kept in memory: this month,
+this and last calendar quarter, every named quarter, rollover, remaining
+and percent used. Ask Dot's spend tool, /tracker/clients and /tracker/budget
+all read the same view, so a budget question is a dictionary lookup.
+
+The view is rebuilt when the Clients mirror changes, or on the first read
+of a new day (the current month and quarter move with the date). Spend
+totals are Airtable rollups of Tracker on the Clients table, so a Tracker
+change re-reads the affected clients' records in the background. The view
+then rebuilds from the fresh totals.
+"""
+
+import threading
+from datetime import date, datetime
+
+import mirror
+
+QUARTERS = ['JAN-MAR', 'APR-JUN', 'JUL-SEP', 'OCT-DEC']
+
+
+def parse_amount(value):
+    """Currency field to a number - '$1,200' -> 1200, lookups take their first value"""
+    if isinstance(value, list):
+        value = value[0] if value else 0
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        amount = float(value.replace('$', '').replace(',', '') or 0)
+        return int(amount) if amount.is_integer() else amount
+    return 0
+
+
+def calendar_quarter(month):
+    return QUARTERS[(month - 1) // 3]
+
+
+def previous_quarter(quarter):
+    return QUARTERS[QUARTERS.index(quarter) - 1]
+
+
+def spend(period, budget, spent, **extra):
+    return dict(period=period, budget=budget, spent=spent, remaining=budget - spent,
+                percentUsed=round((spent / budget * 100) if budget > 0 else 0), **extra)
+
+
+def client_view(fields, today):
+    """One client's budget view from its Clients fields"""
+    monthly = parse_amount(fields.get('Monthly Committed', 0))
+    rollover = parse_amount(fields.get('Rollover Credit', 0))
+    rollover_use = fields.get('Rollover use', '')
+    current_label = fields.get('Current Quarter', '')
+
+    def quarter(key, label):
+        applied = rollover_use == key and rollover > 0
+        budget = monthly * 3 + (rollover if applied else 0)
+        return spend(label, budget, parse_amount(fields.get(key, 0)), quarterKey=key,
+                     rolloverApplied=applied, rolloverAmount=rollover if rollover_use == key else 0)
+
+    this_quarter = calendar_quarter(today.month)
+    last_quarter = previous_quarter(this_quarter)
+    try:
+        current_number = int(current_label.replace('Q', '') or 1)
+        last_label = f'Q{current_number - 1 if current_number > 1 else 4}'
+    except ValueError:
+        last_label = last_quarter
+
+    return {
+        'code': fields.get('Client code', ''),
+        'name': fields.get('Clients', ''),
+        'yearEnd': fields.get('Year end', ''),
+        'currentQuarter': current_label,
+        'committed': monthly,
+        'rollover': rollover,
+        'rolloverUseIn': rollover_use,
+        'month': spend(today.strftime('%B'), monthly, parse_amount(fields.get('This month', 0))),
+        'quarter': quarter(this_quarter, current_label),
+        'lastQuarter': quarter(last_quarter, last_label),
+        'quarters': {key: quarter(key, key) for key in QUARTERS},
+    }
+
+
+class BudgetView(mirror.DerivedView):
+    """Budget views for every client, rebuilt from the Clients mirror when stale"""
+
+    def __init__(self, clients, tracker):
+        self.clients = clients
+        self._views = {}
+        self._built_on = None
+        super().__init__(clients)
+        tracker.on_change(self._tracker_changed)
+
+    def get(self, client_code):
+        """A client's view, or None"""
+        self.ensure_built()
+        return self._views.get(client_code)
+
+    def retainers(self):
+        """Clients with a monthly commitment, by name - /tracker/clients"""
+        self.ensure_built()
+        views = [view for view in self._views.values() if view['committed'] > 0]
+        return sorted(views, key=lambda view: view['name'])
+
+    def build(self):
+        now = datetime.now()
+        self._views = {row.get('Client code', ''): client_view(row, now) for row in self.clients.rows()}
+        self._built_on = now.date()
+
+    def expired(self):
+        # The current month and quarter move with the date
+        return self._built_on != date.today()
+
+    def _tracker_changed(self, changed, removed, previous):
+        # The Clients rollups (This month, JAN-MAR...) just moved in Airtable,
+        # for the old client as well when a row moved. Only the leader reads
+        # them back (its save reaches the other workers), and only once the
+        # view is in use - never in the gunicorn master while it warms up.
+        if not (self._built and mirror.leading() and mirror.syncing()):
+            return
+        codes = {row['client'] for _, row in changed + removed}
+        codes.update(row['client'] for row in previous.values())
+        record_ids = [row['id'] for code in codes for row in self.clients.lookup('code', code)]
+        if not record_ids:
+            return
+
+        def run():
+            try:
+                self.clients.refresh_records(record_ids)
+            except Exception as e:
+                print(f"[budgets] Refreshing client totals failed: {e}")
+
+        threading.Thread(target=run, name='budget-refresh', daemon=True).start()
+
+
+view = BudgetView(mirror.clients, mirror.tracker)
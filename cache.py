@@ -0,0 +1,236 @@
+"""
+Dot Remote API - Read Cache
+Coalesced Airtable reads and serialized snapshots shared by app.py,
+ask_dot.py and the mirrors
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+import requests
+from collections import OrderedDict
+
+import metrics
+import responses
+
+# ===== CONFIGURATION =====
+AIRTABLE_API_KEY = os.environ.get('AIRTABLE_API_KEY')
+AIRTABLE_BASE_ID = os.environ.get('AIRTABLE_BASE_ID', 'app8CI7NAZqhQ4G1Y')
+
+# Overridable so tests and benchmarks can point at a local stand-in
+AIRTABLE_API_URL = os.environ.get('AIRTABLE_API_URL', 'https://api.airtable.com/v0')
+
+# How long a serialized snapshot is served before it's reloaded from Airtable
+SNAPSHOT_TTL = float(os.environ.get('SNAPSHOT_TTL', 10))
+
+# Snapshots kept per cache; the least recently read go first. Keys come from
+# query strings, so without a cap any caller could grow the cache at will
+SNAPSHOT_MAX_ENTRIES = int(os.environ.get('SNAPSHOT_MAX_ENTRIES', 256))
+
+HEADERS = {
+    'Authorization': f'Bearer {AIRTABLE_API_KEY}',
+    'Content-Type': 'application/json'
+}
+
+def get_airtable_url(table):
+    return f'{AIRTABLE_API_URL}/{AIRTABLE_BASE_ID}/{table}'
+
+
+def airtable_request(method, url, **kwargs):
+    """requests.request for the Airtable API, timed and counted in metrics"""
+    started = time.perf_counter()
+    status = 'error'
+    try:
+        response = requests.request(method, url, **kwargs)
+        status = response.status_code
+        return response
+    finally:
+        metrics.airtable_response(method, url, status, time.perf_counter() - started)
+
+
+# ===== SINGLEFLIGHT =====
+class _Call:
+    """One in-flight call and the outcome its waiters will share"""
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Collapse concurrent identical calls into one.
+    The first caller for a key runs the function. Callers arriving while it is
+    still running wait for it and get the same result (or the same exception).
+    Nothing is kept once the call finishes - this is coalescing, not caching.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result
+
+
+flights = SingleFlight()
+
+
+def _flight_key(table, params):
+    """Hashable key for table + formula + params"""
+    items = []
+    for key, value in sorted((params or {}).items()):
+        if isinstance(value, list):
+            value = tuple(value)
+        items.append((key, value))
+    return (table, tuple(items))
+
+
+# ===== AIRTABLE READS =====
+def fetch_all(table, params=None, fields=None):
+    """
+    Page through an Airtable table and return every raw record.
+    fields limits the columns Airtable sends back (fields[]) - pass the
+    field list declared next to the transformer that consumes the records.
+    Concurrent identical reads (same table, formula and params) share one
+    paging loop. The returned list is shared between callers - don't mutate it.
+    """
+    params = dict(params or {})
+    if fields:
+        params['fields[]'] = list(fields)
+
+    def fetch():
+        url = get_airtable_url(table)
+        page_params = dict(params)
+        records = []
+
+        while True:
+            response = airtable_request('GET', url, headers=HEADERS, params=page_params)
+            response.raise_for_status()
+            with metrics.timed('decode'):
+                data = response.json()
+
+            records.extend(data.get('records', []))
+
+            offset = data.get('offset')
+            if not offset:
+                break
+            page_params['offset'] = offset
+
+        return records
+
+    return flights.do(_flight_key(table, params), fetch)
+
+
+# ===== SNAPSHOTS =====
+class Snapshot:
+    """
+    One serialized payload. The version is a digest of the body, so it's the
+    same in every worker and only moves when the bytes actually change -
+    safe to hand out as a strong ETag.
+    """
+
+    def __init__(self, body, loaded_at):
+        self.body = body
+        self.version = hashlib.blake2b(body, digest_size=12).hexdigest()
+        self.loaded_at = loaded_at
+        self._encoded = {}
+
+    @property
+    def etag(self):
+        return self.version
+
+    def etag_for(self, encoding):
+        """Each Content-Encoding is its own representation, so its own strong ETag"""
+        return f'{self.version}-{encoding}' if encoding else self.version
+
+    def encoded(self, encoding):
+        """Body compressed with encoding - compressed once per version, then reused"""
+        if not encoding:
+            return self.body
+        body = self._encoded.get(encoding)
+        if body is None:
+            body = self._encoded[encoding] = responses.compress(self.body, encoding, cached=True)
+        return body
+
+
+class SnapshotCache:
+    """
+    Serialized read results, refreshed at most once per ttl.
+    load(key) builds the payload (key is None for unkeyed reads); it runs
+    under singleflight so a burst of pollers triggers one reload. Writes
+    should call invalidate() so the next read sees them. At most
+    max_entries snapshots are kept, least recently read dropped first.
+    """
+
+    def __init__(self, name, load, dumps=json.dumps, ttl=SNAPSHOT_TTL, max_entries=SNAPSHOT_MAX_ENTRIES):
+        self.name = name
+        self.load = load
+        self.dumps = dumps
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._snapshots = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    def get(self, key=None):
+        with self._lock:
+            snapshot = self._snapshots.get(key)
+            if snapshot is not None:
+                self._snapshots.move_to_end(key)
+        if snapshot is not None and time.monotonic() - snapshot.loaded_at < self.ttl:
+            metrics.cache_read(self.name, hit=True)
+            return snapshot
+        metrics.cache_read(self.name, hit=False)
+        return flights.do(('snapshot', self.name, key), lambda: self._refresh(key))
+
+    def invalidate(self, *keys):
+        """Drop the given keys, or every snapshot if none are given"""
+        with self._lock:
+            self._generation += 1
+            if not keys:
+                self._snapshots.clear()
+            for key in keys:
+                self._snapshots.pop(key, None)
+
+    def _refresh(self, key):
+        generation = self._generation
+        payload = self.load() if key is None else self.load(key)
+        body = self.dumps(payload)
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        snapshot = Snapshot(body, time.monotonic())
+        # A write that landed mid-load invalidated this data - serve it to
+        # this caller but don't keep it
+        with self._lock:
+            if generation == self._generation:
+                self._snapshots[key] = snapshot
+                self._snapshots.move_to_end(key)
+                while len(self._snapshots) > self.max_entries:
+                    self._snapshots.popitem(last=False)
+        return snapshot
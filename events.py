@@ -0,0 +1,121 @@
+"""
+Dot Remote API - Event Stream
+In-process pub/sub for job and tracker changes, served to the Hub as
+Server-Sent Events from /events.
+
+Each open stream holds one thread blocked on its own queue, so /events needs
+a threaded worker (gunicorn gthread) - on a sync worker a single listener
+would tie up the whole process. Listeners are capped per worker
+(SSE_MAX_LISTENERS, below the worker's thread count) so the rest of the
+threads are always free for the JSON routes; past the cap /events answers
+503 with Retry-After and the Hub's EventSource reconnects later.
+"""
+
+import os
+import json
+import queue
+import threading
+
+# ===== CONFIGURATION =====
+# Seconds between keep-alive comments (proxies drop idle connections)
+HEARTBEAT_SECONDS = float(os.environ.get('SSE_HEARTBEAT_SECONDS', 15))
+
+# Events buffered per listener before it's considered stuck and told to resync
+SUBSCRIBER_QUEUE_SIZE = int(os.environ.get('SSE_QUEUE_SIZE', 500))
+
+# Open streams per worker - keep well under GUNICORN_THREADS (16), each one holds a thread
+MAX_LISTENERS = int(os.environ.get('SSE_MAX_LISTENERS', 8))
+
+# Seconds a refused listener is told to wait before reconnecting
+RETRY_AFTER_SECONDS = int(os.environ.get('SSE_RETRY_AFTER_SECONDS', 30))
+
+
+class Subscription:
+    """One listener: a queue of pending events and the client codes it wants"""
+
+    def __init__(self, client_codes=None):
+        self.client_codes = set(client_codes) if client_codes else None
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+
+    def wants(self, client_code):
+        return self.client_codes is None or client_code in self.client_codes
+
+    def put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except queue.Full:
+            self.overflowed = True
+
+
+class EventBus:
+    """Fan events out to every subscription interested in their client code"""
+
+    def __init__(self, max_listeners=MAX_LISTENERS):
+        self.max_listeners = max_listeners
+        self._lock = threading.Lock()
+        self._subscriptions = set()
+
+    def subscribe(self, client_codes=None):
+        """A new Subscription, or None if this worker already has max_listeners"""
+        subscription = Subscription(client_codes)
+        with self._lock:
+            if len(self._subscriptions) >= self.max_listeners:
+                return None
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, event, data, client_code=None):
+        message = format_event(event, data)
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            if client_code is None or subscription.wants(client_code):
+                subscription.put(message)
+
+    @property
+    def listener_count(self):
+        return len(self._subscriptions)
+
+
+def _encode(o):
+    # Compact records (transforms.Job) go out as the dict they stand in for
+    if hasattr(o, 'as_dict'):
+        return o.as_dict()
+    raise TypeError(f'{type(o).__name__} is not JSON serializable')
+
+
+def format_event(event, data):
+    """Encode one SSE message"""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'), default=_encode)}\n\n"
+
+
+def stream(bus, subscription, hello=None):
+    """
+    Generator for a text/event-stream response. Yields a hello event, then
+    events as they're published, with heartbeat comments in between.
+    Unsubscribes when the client goes away.
+    """
+    try:
+        if hello is not None:
+            yield format_event('hello', hello)
+        while True:
+            try:
+                message = subscription.queue.get(timeout=HEARTBEAT_SECONDS)
+            except queue.Empty:
+                yield ': keep-alive\n\n'
+                continue
+            yield message
+            if subscription.overflowed and subscription.queue.empty():
+                # We dropped events for this listener - make it start over
+                yield format_event('resync', {})
+                return
+    finally:
+        bus.unsubscribe(subscription)
+
+
+bus = EventBus()
@@ -0,0 +1,62 @@
+"""
+Dot Remote API - Gunicorn Config
+Production entry point: gunicorn -c gunicorn.conf.py app:app
+
+The app is imported once in the master (preload), which restores the saved
+mirrors, and syncs any that didn't restore, before any worker is forked.
+Workers inherit the warm mirrors copy-on-write instead of each loading their
+own. From there one worker (the leader, see mirror.claim_leadership) syncs
+with Airtable and the others apply its saved changes, so Airtable traffic
+doesn't grow with the worker count.
+"""
+
+import gc
+import os
+import multiprocessing
+
+# ===== SERVER =====
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+preload_app = True
+
+# Threaded workers: /events holds a thread per listener, and most request
+# time is spent waiting on Airtable or Claude rather than on the CPU.
+# events.MAX_LISTENERS (SSE_MAX_LISTENERS) caps the threads /events can take
+worker_class = 'gthread'
+workers = int(os.environ.get('WEB_CONCURRENCY', min(multiprocessing.cpu_count() + 1, 4)))
+threads = int(os.environ.get('GUNICORN_THREADS', 16))
+
+# Ask Dot requests wait on Claude - give them room before a worker is killed
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = 30
+keepalive = 5
+
+
+# ===== HOOKS =====
+def on_starting(server):
+    """Master, first thing - drop metrics left by a previous run"""
+    import metrics
+    metrics.clear_dir()
+
+
+def when_ready(server):
+    """Master, after the app is imported and before workers fork"""
+    import mirror
+    warmed = mirror.warm()
+    server.log.info(f"Warmed mirrors: {', '.join(warmed) or 'none'}")
+
+    # Move everything loaded so far out of the GC's reach, so collections in
+    # the workers don't touch (and un-share) the inherited pages
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    """Worker - the background sync claims leadership or follows the leader"""
+    import mirror
+    mirror.after_fork()
+    mirror.start_background_sync()
+
+
+def worker_exit(server, worker):
+    """Write the exiting worker's final metrics so its totals aren't lost"""
+    import metrics
+    metrics.flush()
@@ -0,0 +1,381 @@
+"""
+Dot Remote API - Metrics
+Counters and histograms for routes, Airtable, the snapshot caches and
+Claude, served in Prometheus text format from /metrics.
+
+Each process counts in memory and writes its totals to METRICS_DIR/<pid>.json
+every few seconds. /metrics adds every file up, so a scrape sees the whole
+server whichever gunicorn worker answers it. gunicorn.conf.py empties the
+directory when the master starts; until then totals from exited workers
+keep counting, as counters should.
+"""
+
+import os
+import json
+import time
+import bisect
+import tempfile
+import threading
+import contextvars
+from contextlib import contextmanager
+from urllib.parse import urlparse, unquote
+
+# ===== CONFIGURATION =====
+# Shared by all workers of one server ('' keeps metrics per process)
+METRICS_DIR = os.environ.get('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'dot-hub-metrics'))
+
+# Seconds between writes of this process's totals
+FLUSH_SECONDS = float(os.environ.get('METRICS_FLUSH_SECONDS', 5))
+
+# Bearer token required by /metrics (unset = open)
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+# Requests slower than this are logged with their timing breakdown (0 = off)
+SLOW_REQUEST_MS = float(os.environ.get('SLOW_REQUEST_MS', 0))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50)
+
+
+# ===== REGISTRY =====
+_registry = []
+_values = {}            # (name, label values) -> count, or histogram [bucket counts..., sum, count]
+_lock = threading.Lock()
+_pid = None
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        _registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = (self.name, tuple(str(labels[label]) for label in self.labels))
+        with _lock:
+            _ensure_process()
+            _values[key] = _values.get(key, 0) + amount
+
+
+class Histogram(Counter):
+    """Bucket counts are kept per bucket and only made cumulative when rendered"""
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = (self.name, tuple(str(labels[label]) for label in self.labels))
+        index = bisect.bisect_left(self.buckets, value)
+        with _lock:
+            _ensure_process()
+            entry = _values.get(key)
+            if entry is None:
+                entry = _values[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                entry[index] += 1
+            entry[-2] += value
+            entry[-1] += 1
+
+
+def _ensure_process():
+    """
+    Called under _lock. A forked worker inherits its parent's totals, which
+    the parent is already reporting - start from zero and flush on our own.
+    """
+    global _pid
+    if _pid == os.getpid():
+        return
+    _pid = os.getpid()
+    _values.clear()
+    if METRICS_DIR:
+        threading.Thread(target=_flush_loop, name='metrics-flush', daemon=True).start()
+
+
+# ===== METRICS =====
+HTTP_REQUESTS = Counter(
+    'dot_http_requests_total', 'Requests served, by route, method and status',
+    ('route', 'method', 'status'))
+HTTP_ERRORS = Counter(
+    'dot_http_request_errors_total', 'Requests that ended in a 5xx, by route',
+    ('route',))
+HTTP_SECONDS = Histogram(
+    'dot_http_request_duration_seconds', 'Time to build the response, by route',
+    ('route', 'method'))
+HTTP_AIRTABLE_CALLS = Histogram(
+    'dot_http_request_airtable_calls', 'Airtable API calls made while serving one request',
+    ('route',), buckets=COUNT_BUCKETS)
+HTTP_AIRTABLE_PAGES = Histogram(
+    'dot_http_request_airtable_pages', 'Airtable list pages fetched while serving one request',
+    ('route',), buckets=COUNT_BUCKETS)
+
+AIRTABLE_REQUESTS = Counter(
+    'dot_airtable_requests_total', 'Airtable API calls, by table, method and status',
+    ('table', 'method', 'status'))
+AIRTABLE_SECONDS = Histogram(
+    'dot_airtable_request_duration_seconds', 'Airtable API call latency, by table and method',
+    ('table', 'method'))
+AIRTABLE_PAGES = Counter(
+    'dot_airtable_pages_total', 'Airtable list pages fetched, by table',
+    ('table',))
+AIRTABLE_RATE_LIMITED = Counter(
+    'dot_airtable_rate_limited_total', 'Airtable 429 responses, by table',
+    ('table',))
+
+CACHE_REQUESTS = Counter(
+    'dot_cache_requests_total', 'Snapshot cache reads, by cache and hit/miss',
+    ('cache', 'result'))
+
+ANTHROPIC_REQUESTS = Counter(
+    'dot_anthropic_requests_total', 'Claude API calls, by status',
+    ('status',))
+ANTHROPIC_SECONDS = Histogram(
+    'dot_anthropic_request_duration_seconds', 'Claude API call latency')
+ANTHROPIC_TOKENS = Counter(
+    'dot_anthropic_tokens_total', 'Claude tokens, by type (input, output, cache_read, cache_creation)',
+    ('type',))
+TOOL_CALLS = Counter(
+    'dot_ask_dot_tool_calls_total', 'Ask Dot tool calls, by tool',
+    ('tool',))
+
+
+# ===== PER-REQUEST ACCOUNTING =====
+# Where a request's time went. Phases are timed with timed(); Airtable calls
+# and cache reads add themselves. Work done on another thread - e.g. a
+# singleflight load led by a different request - lands on that request.
+PHASES = ('airtable', 'decode', 'transform', 'serialize', 'compress')
+
+_request = contextvars.ContextVar('metrics_request', default=None)
+
+def start_request():
+    """Begin accounting for the request on this thread"""
+    stats = {phase: 0.0 for phase in PHASES}
+    stats.update(started=time.perf_counter(), airtable_calls=0, airtable_pages=0,
+                 cache_hits=0, cache_misses=0)
+    _request.set(stats)
+
+
+@contextmanager
+def timed(phase):
+    """Add the block's wall time to phase for the current request, if any"""
+    stats = _request.get()
+    if stats is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats[phase] += time.perf_counter() - started
+
+
+def cache_read(cache, hit):
+    CACHE_REQUESTS.inc(cache=cache, result='hit' if hit else 'miss')
+    stats = _request.get()
+    if stats is not None:
+        stats['cache_hits' if hit else 'cache_misses'] += 1
+
+
+def finish_request(route, method, status):
+    """
+    Record a finished request. route is the URL rule, not the path.
+    Returns the request's accounting (with 'total' in seconds), or None.
+    """
+    stats = _request.get()
+    _request.set(None)
+    if stats is None:
+        return None
+
+    stats['total'] = time.perf_counter() - stats['started']
+    HTTP_REQUESTS.inc(route=route, method=method, status=status)
+    HTTP_SECONDS.observe(stats['total'], route=route, method=method)
+    HTTP_AIRTABLE_CALLS.observe(stats['airtable_calls'], route=route)
+    HTTP_AIRTABLE_PAGES.observe(stats['airtable_pages'], route=route)
+    if status >= 500:
+        HTTP_ERRORS.inc(route=route)
+    return stats
+
+
+def server_timing(stats):
+    """Server-Timing header value for a finished request's accounting"""
+    entries = [f'{phase};dur={stats[phase] * 1000:.1f}' for phase in PHASES if stats[phase]]
+    entries.append(f'airtable-calls;desc="{stats["airtable_calls"]}"')
+    entries.append(f'airtable-pages;desc="{stats["airtable_pages"]}"')
+    entries.append(f'cache-hits;desc="{stats["cache_hits"]}"')
+    entries.append(f'cache-misses;desc="{stats["cache_misses"]}"')
+    entries.append(f'total;dur={stats["total"] * 1000:.1f}')
+    return ', '.join(entries)
+
+
+def log_if_slow(method, path, stats):
+    """Print the breakdown of a request that took longer than SLOW_REQUEST_MS"""
+    total_ms = stats['total'] * 1000
+    if not SLOW_REQUEST_MS or total_ms < SLOW_REQUEST_MS:
+        return
+    phases = ' '.join(f'{phase}={stats[phase] * 1000:.0f}ms' for phase in PHASES)
+    print(f"[slow] {method} {path} {total_ms:.0f}ms {phases} "
+          f"airtable_calls={stats['airtable_calls']} airtable_pages={stats['airtable_pages']} "
+          f"cache_hits={stats['cache_hits']} cache_misses={stats['cache_misses']}")
+
+
+def _airtable_target(url):
+    """
+    (table, is list page) for an Airtable API URL. Meta and webhook calls
+    report 'meta' / 'webhooks'; a table URL without a record ID is a list page.
+    """
+    parts = [unquote(part) for part in urlparse(url).path.split('/') if part]
+    if 'v0' in parts:
+        parts = parts[parts.index('v0') + 1:]
+    if not parts:
+        return 'unknown', False
+    if parts[0] in ('meta', 'bases'):
+        return 'meta' if parts[0] == 'meta' else 'webhooks', False
+    if len(parts) < 2:
+        return 'unknown', False
+    return parts[1], len(parts) == 2
+
+
+def airtable_response(method, url, status, seconds):
+    """Record one Airtable API call. status is the HTTP status, or 'error' if none came back."""
+    table, is_page = _airtable_target(url)
+    method = method.upper()
+
+    AIRTABLE_REQUESTS.inc(table=table, method=method, status=status)
+    AIRTABLE_SECONDS.observe(seconds, table=table, method=method)
+    if status == 429:
+        AIRTABLE_RATE_LIMITED.inc(table=table)
+    page = is_page and method == 'GET'
+    if page:
+        AIRTABLE_PAGES.inc(table=table)
+
+    stats = _request.get()
+    if stats is not None:
+        stats['airtable'] += seconds
+        stats['airtable_calls'] += 1
+        stats['airtable_pages'] += page
+
+
+def anthropic_response(status, seconds, usage=None):
+    """Record one Claude API call and its token usage"""
+    ANTHROPIC_REQUESTS.inc(status=status)
+    ANTHROPIC_SECONDS.observe(seconds)
+    for kind, field in (('input', 'input_tokens'), ('output', 'output_tokens'),
+                        ('cache_read', 'cache_read_input_tokens'),
+                        ('cache_creation', 'cache_creation_input_tokens')):
+        if usage and usage.get(field):
+            ANTHROPIC_TOKENS.inc(usage[field], type=kind)
+
+
+# ===== SHARING BETWEEN WORKERS =====
+def _flush_loop():
+    pid = os.getpid()
+    while pid == os.getpid():
+        time.sleep(FLUSH_SECONDS)
+        flush()
+
+
+def flush():
+    """Write this process's totals to METRICS_DIR/<pid>.json"""
+    if not METRICS_DIR:
+        return
+    with _lock:
+        data = [[name, list(labels), value] for (name, labels), value in _values.items()]
+    try:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        path = os.path.join(METRICS_DIR, f'{os.getpid()}.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump(data, f)
+        os.replace(path + '.tmp', path)
+    except OSError as e:
+        print(f"[metrics] Flush failed: {e}")
+
+
+def clear_dir():
+    """Forget totals from a previous server - the gunicorn master calls this at startup"""
+    if not METRICS_DIR or not os.path.isdir(METRICS_DIR):
+        return
+    for filename in os.listdir(METRICS_DIR):
+        try:
+            os.remove(os.path.join(METRICS_DIR, filename))
+        except OSError:
+            pass
+
+
+def collect():
+    """Every process's totals added up: {(name, label values): value}"""
+    totals = {}
+
+    def add(key, value):
+        if isinstance(value, list):
+            current = totals.setdefault(key, [0] * len(value))
+            for i, v in enumerate(value):
+                current[i] += v
+        else:
+            totals[key] = totals.get(key, 0) + value
+
+    own = f'{os.getpid()}.json'
+    if METRICS_DIR and os.path.isdir(METRICS_DIR):
+        for filename in os.listdir(METRICS_DIR):
+            if not filename.endswith('.json') or filename == own:
+                continue
+            try:
+                with open(os.path.join(METRICS_DIR, filename)) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for name, labels, value in data:
+                add((name, tuple(labels)), value)
+
+    with _lock:
+        own_values = [(key, list(value) if isinstance(value, list) else value) for key, value in _values.items()]
+    for key, value in own_values:
+        add(key, value)
+    return totals
+
+
+# ===== EXPOSITION =====
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (
+        f'{name}="' + str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        for name, value in pairs
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def _number(value):
+    """Sample value at full precision - whole numbers as integers, never 1.23457e+06"""
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def render():
+    """Prometheus text exposition format (0.0.4)"""
+    totals = collect()
+    lines = []
+
+    for metric in _registry:
+        lines.append(f'# HELP {metric.name} {metric.help}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        series = sorted((labels, value) for (name, labels), value in totals.items() if name == metric.name)
+
+        for labels, value in series:
+            if metric.kind == 'counter':
+                lines.append(f'{metric.name}{_labels(metric.labels, labels)} {_number(value)}')
+                continue
+            cumulative = 0
+            for bound, count in zip(metric.buckets, value):
+                cumulative += count
+                le = _labels(metric.labels, labels, [('le', _number(bound))])
+                lines.append(f'{metric.name}_bucket{le} {cumulative}')
+            lines.append(f'{metric.name}_bucket{_labels(metric.labels, labels, [("le", "+Inf")])} {value[-1]}')
+            lines.append(f'{metric.name}_sum{_labels(metric.labels, labels)} {_number(value[-2])}')
+            lines.append(f'{metric.name}_count{_labels(metric.labels, labels)} {value[-1]}')
+
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,1056 @@
+"""
+Dot Remote API - Table Mirrors
+In-memory copies of Airtable tables. Each mirror keeps the raw records, their
+transformed rows, a version counter and a bounded change log, so endpoints
+can answer from memory and clients can ask for deltas instead of full lists.
+Mirrors are saved to a local SQLite file so a restarted worker starts warm.
+
+Under gunicorn, one worker leads: it holds a lock file next to the SQLite
+file and is the only one syncing with Airtable. Every save, by any worker,
+also appends the changed records to a change feed in the same file, and the
+other workers apply that feed every SYNC_INTERVAL instead of syncing
+themselves. Cursors for /jobs/changes are positions in the same feed, so
+whichever worker a poll lands on can answer it.
+"""
+
+import os
+import json
+import time
+import uuid
+import bisect
+import sqlite3
+import tempfile
+import threading
+from collections import defaultdict, deque
+from datetime import date, datetime, timedelta, timezone
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+import cache
+import metrics
+from transforms import (
+    CLIENT_FIELDS, PEOPLE_FIELDS, PROJECT_FIELDS, TRACKER_FIELDS,
+    record_fields, transform_projects, transform_tracker_rows
+)
+
+# ===== CONFIGURATION =====
+# Full resync interval - how stale a mirror may get before a read reloads it
+MIRROR_TTL = float(os.environ.get('MIRROR_TTL', 30))
+
+# Tracker is the biggest table and only grows - resync it less often
+TRACKER_MIRROR_TTL = float(os.environ.get('TRACKER_MIRROR_TTL', 120))
+
+# How often the background thread checks mirrors for staleness
+SYNC_INTERVAL = float(os.environ.get('MIRROR_SYNC_INTERVAL', 5))
+
+# Between full reloads, syncs only fetch records modified since the last one.
+# LAST_MODIFIED_TIME() ignores computed fields, so lookups and rollups fed by
+# other tables (e.g. Update Summary) only catch up on the full reload.
+# A sync only runs once a mirror's ttl is up, so the full reload interval is
+# counted in ttls: every FULL_SYNC_EVERY-th sync is a full one.
+FULL_SYNC_EVERY = int(os.environ.get('MIRROR_FULL_SYNC_EVERY', 4))
+
+# Delta syncs overlap the previous one by this much to absorb clock skew
+WATERMARK_OVERLAP = timedelta(seconds=60)
+
+# More changed records than this in one go and a full resync is cheaper
+REFRESH_BATCH_LIMIT = 50
+
+# Where mirrors are saved between restarts ('' disables persistence)
+SNAPSHOT_PATH = os.environ.get(
+    'MIRROR_SNAPSHOT_PATH', os.path.join(tempfile.gettempdir(), 'dot-hub-mirrors.sqlite3')
+)
+
+# Changes remembered per mirror; older cursors are told to resync
+CHANGE_LOG_SIZE = int(os.environ.get('CHANGE_LOG_SIZE', 5000))
+
+# Saved changes kept for other workers to apply; one further behind reloads the saved copy
+CHANGE_FEED_SIZE = int(os.environ.get('CHANGE_FEED_SIZE', 20000))
+
+
+class TableMirror:
+    """
+    Mirror of one Airtable table (optionally narrowed by a formula).
+
+    transform is a batch function: list of raw records -> list of rows, in the
+    same order. Rows are recomputed only for records whose fields changed.
+
+    The version moves by one per changed record. Versions are only comparable
+    within one mirror instance, so they're only handed to clients without a
+    saved copy, along with the instance's epoch. With one, cursors are
+    positions in the change feed every worker shares (see cursor /
+    changes_since), so any worker can answer them.
+    """
+
+    def __init__(self, table, fields, transform, formula=None, ttl=MIRROR_TTL, log_size=CHANGE_LOG_SIZE,
+                 full_sync_every=FULL_SYNC_EVERY):
+        self.table = table
+        self.fields = list(fields)
+        self.transform = transform
+        self.formula = formula
+        self.ttl = ttl
+        # Seconds between full reloads - a whole number of ttls, see FULL_SYNC_EVERY
+        self.full_sync_interval = ttl * max(full_sync_every, 1)
+
+        self.epoch = uuid.uuid4().hex[:8]
+        self.version = 0
+        self.synced_at = None           # monotonic time of the last sync (None = never loaded)
+        self.full_synced_at = None      # wall time of the last full reload
+        self.watermark = None           # delta syncs fetch records modified after this
+        self.saved_version = None       # (epoch, version) last written to disk
+        self._persisted = False         # the saved copy holds every record but those in _dirty
+        self._dirty = set()             # record ids changed or removed since the last save
+        self.feed_seq = 0               # last change feed entry applied (see pull)
+        self._transformed_on = date.today()
+        self._refreshing = threading.Lock()
+        self._pulling = threading.Lock()
+
+        self._records = {}       # record id -> raw Airtable record
+        self._rows = {}          # record id -> transformed row
+        self._removed = {}       # record id -> (version, last row) for the change feed
+        self._log = deque(maxlen=log_size)   # (version, record id)
+        self._indexes = {}       # name -> (key function, {key: {record id: row}})
+        self._sorted = {}        # name -> (key function, sorted [(key, record id)])
+        self._lock = threading.RLock()
+        self._listeners = []
+
+    # ----- reads -----
+    def rows(self):
+        """Current rows, in Airtable order"""
+        self.ensure_fresh()
+        with self._lock:
+            return list(self._rows.values())
+
+    def items(self):
+        """Current (record id, row) pairs, in Airtable order"""
+        self.ensure_fresh()
+        with self._lock:
+            return list(self._rows.items())
+
+    def get(self, record_id):
+        self.ensure_fresh()
+        return self._rows.get(record_id)
+
+    def lookup(self, index, value):
+        """Rows whose key in the named index equals value (see add_index)"""
+        self.ensure_fresh()
+        with self._lock:
+            return list(self._indexes[index][1].get(value, {}).values())
+
+    def has(self, index, value):
+        """Whether any row's key in the named index equals value"""
+        self.ensure_fresh()
+        with self._lock:
+            return value in self._indexes[index][1]
+
+    def keys(self, index):
+        """Values the named index currently holds"""
+        self.ensure_fresh()
+        with self._lock:
+            return list(self._indexes[index][1])
+
+    def between(self, index, low=None, high=None):
+        """Rows whose key in the named sorted index is within [low, high], in key order"""
+        return self.query(ranges=[(index, low, high)])
+
+    def query(self, equals=(), ranges=()):
+        """
+        Rows matching every condition, answered from the indexes alone.
+        equals is [(index, value or set of values)], ranges is
+        [(sorted index, low, high)] with None for an open end. Rows come in
+        the first range's key order, else in the order of the smallest match.
+        """
+        self.ensure_fresh()
+        with self._lock:
+            matches, ranged = [], []
+            for index, values in equals:
+                groups = self._indexes[index][1]
+                if not isinstance(values, (set, frozenset, list, tuple)):
+                    values = [values]
+                ids = []
+                for value in values:
+                    ids.extend(groups.get(value, ()))
+                matches.append(ids)
+            for index, low, high in ranges:
+                entries = self._sorted[index][1]
+                start = 0 if low is None else bisect.bisect_left(entries, (low,))
+                end = len(entries) if high is None else bisect.bisect_right(entries, (high, '\uffff'))
+                ranged.append([record_id for _, record_id in entries[start:end]])
+                matches.append(ranged[-1])
+
+            if not matches:
+                return list(self._rows.values())
+            order = ranged[0] if ranged else min(matches, key=len)
+            others = [set(ids) for ids in matches if ids is not order]
+            return [self._rows[record_id] for record_id in order
+                    if all(record_id in ids for ids in others)]
+
+    # ----- indexes -----
+    def add_index(self, name, key):
+        """
+        Keep rows grouped by key(row), so lookup(name, value) reads one group
+        instead of scanning the table. Groups are patched as rows change.
+        """
+        with self._lock:
+            self._indexes[name] = (key, defaultdict(dict))
+            self._reindex()
+
+    def add_sorted_index(self, name, key):
+        """
+        Keep (key(row), record id) in key order, for range reads with
+        between() and query(). Rows whose key is None are left out.
+        """
+        with self._lock:
+            self._sorted[name] = (key, [])
+            self._reindex()
+
+    def _reindex(self):
+        for key, groups in self._indexes.values():
+            groups.clear()
+            for record_id, row in self._rows.items():
+                groups[key(row)][record_id] = row
+        for key, entries in self._sorted.values():
+            entries[:] = sorted((key(row), record_id) for record_id, row in self._rows.items()
+                                if key(row) is not None)
+
+    def _set_row(self, record_id, row):
+        """Store a row and move it between index groups if its key changed"""
+        old = self._rows.get(record_id)
+        self._rows[record_id] = row
+        for key, groups in self._indexes.values():
+            value = key(row)
+            if old is not None:
+                old_value = key(old)
+                if old_value != value:
+                    self._discard(groups, old_value, record_id)
+            groups[value][record_id] = row
+        for key, entries in self._sorted.values():
+            value = key(row)
+            old_value = key(old) if old is not None else None
+            if old is not None and old_value == value:
+                continue
+            if old_value is not None:
+                self._discard_sorted(entries, old_value, record_id)
+            if value is not None:
+                bisect.insort(entries, (value, record_id))
+
+    def _pop_row(self, record_id):
+        row = self._rows.pop(record_id)
+        for key, groups in self._indexes.values():
+            self._discard(groups, key(row), record_id)
+        for key, entries in self._sorted.values():
+            if key(row) is not None:
+                self._discard_sorted(entries, key(row), record_id)
+        return row
+
+    @staticmethod
+    def _discard_sorted(entries, value, record_id):
+        i = bisect.bisect_left(entries, (value, record_id))
+        if i < len(entries) and entries[i] == (value, record_id):
+            del entries[i]
+
+    @staticmethod
+    def _discard(groups, value, record_id):
+        group = groups.get(value)
+        if group is not None:
+            group.pop(record_id, None)
+            if not group:
+                del groups[value]
+
+    @property
+    def cursor(self):
+        """
+        Where a client is up to, for changes_since: the last change feed entry
+        this worker has applied, or without a saved copy this instance's version
+        """
+        feed = feed_id()
+        if feed:
+            return f'{feed}.{self.feed_seq}'
+        return f'{self.epoch}.{self.version}'
+
+    def changes_since(self, cursor):
+        """
+        Rows changed and removed since cursor, as (changed, removed, cursor)
+        where changed is [(record id, row)], removed is [(record id, last row)]
+        and cursor is the version the delta brings the caller up to.
+        Returns None when the cursor is from another change feed or mirror
+        instance (a deleted saved copy, a restart without one) or older than
+        the feed or change log - the caller must resync.
+        """
+        self.ensure_fresh()
+        try:
+            epoch, version = cursor.split('.', 1)
+            since = int(version)
+        except (AttributeError, ValueError):
+            return None
+
+        feed = feed_id()
+        if feed and epoch == feed:
+            return self._feed_changes(feed, since)
+
+        with self._lock:
+            if epoch != self.epoch or since > self.version:
+                return None
+            oldest = self._log[0][0] if self._log else self.version + 1
+            if since < oldest - 1:
+                return None
+
+            changed, removed = [], []
+            seen = set()
+            for version, record_id in reversed(self._log):
+                if version <= since:
+                    break
+                if record_id in seen:
+                    continue
+                seen.add(record_id)
+                if record_id in self._rows:
+                    changed.append((record_id, self._rows[record_id]))
+                elif record_id in self._removed:
+                    removed.append((record_id, self._removed[record_id][1]))
+
+            changed.reverse()
+            removed.reverse()
+            return changed, removed, f'{self.epoch}.{self.version}'
+
+    def _feed_changes(self, feed, since):
+        """changes_since for a feed cursor: records saved after since, as this worker holds them now"""
+        until = self.feed_seq
+        if since >= until:
+            # Handed out by a worker further along the feed - nothing new here yet
+            return [], [], f'{feed}.{since}'
+        record_ids = feed_changes(self, since, until)
+        if record_ids is None:
+            return None
+
+        changed, removed = [], []
+        with self._lock:
+            for record_id in record_ids:
+                if record_id in self._rows:
+                    changed.append((record_id, self._rows[record_id]))
+                elif record_id in self._removed:
+                    removed.append((record_id, self._removed[record_id][1]))
+                else:
+                    # Removed so long ago its last row is gone
+                    return None
+        return changed, removed, f'{feed}.{until}'
+
+    # ----- sync -----
+    def ensure_fresh(self):
+        """
+        Load the mirror if it never has been. If it's merely older than ttl,
+        keep serving it and resync in the background (stale-while-revalidate),
+        so reads never wait on Airtable once we have data.
+        """
+        if self.synced_at is None:
+            cache.flights.do(('mirror', self.table), self.sync)
+        elif time.monotonic() - self.synced_at >= self.ttl:
+            self._sync_in_background()
+
+    def _sync_in_background(self):
+        if not self._refreshing.acquire(blocking=False):
+            return
+
+        def run():
+            try:
+                if leading():
+                    cache.flights.do(('mirror', self.table), self.sync)
+                else:
+                    self.pull()
+            except Exception as e:
+                print(f"[mirror] Background sync of {self.table} failed: {e}")
+            finally:
+                self._refreshing.release()
+
+        threading.Thread(target=run, name=f'mirror-{self.table}', daemon=True).start()
+
+    def sync(self, full=None):
+        """
+        Bring the mirror up to date. A full reload (applied as a diff) when
+        there's no watermark or the last one is full_sync_interval old,
+        otherwise just the records modified since the watermark.
+        """
+        if full is None:
+            # Syncs start a little after the ttl is up, so the elapsed time
+            # passes a multiple of the ttl on that many syncs, not before
+            full = (self.watermark is None or self.full_synced_at is None
+                    or time.time() - self.full_synced_at >= self.full_sync_interval)
+        started = datetime.now(timezone.utc)
+
+        if full:
+            params = {'filterByFormula': self.formula} if self.formula else None
+            records = cache.fetch_all(self.table, params, fields=self.fields)
+
+            with self._lock:
+                seen = {record['id'] for record in records}
+                gone = [record_id for record_id in self._records if record_id not in seen]
+            self.upsert(records)
+            self.remove(gone)
+            self.full_synced_at = time.time()
+        else:
+            modified = f"IS_AFTER(LAST_MODIFIED_TIME(), DATETIME_PARSE('{self.watermark}'))"
+            formula = f'AND({self.formula}, {modified})' if self.formula else modified
+            self.upsert(cache.fetch_all(self.table, {'filterByFormula': formula}, fields=self.fields))
+            if self.formula:
+                # Records edited out of the formula (e.g. archived) since the watermark
+                left = cache.fetch_all(
+                    self.table,
+                    {'filterByFormula': f'AND(NOT({self.formula}), {modified})'},
+                    fields=self.fields[:1]
+                )
+                self.remove([record['id'] for record in left])
+
+        self.watermark = (started - WATERMARK_OVERLAP).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+        if self._transformed_on != date.today():
+            self.retransform()
+        self.synced_at = time.monotonic()
+        save(self)
+
+    def pull(self):
+        """
+        Follower sync: apply the changes other workers saved since the last
+        pull (see the module docstring). Reloads the whole saved copy when
+        the feed has moved past us or a full save replaced it.
+        """
+        with self._pulling:
+            changes = read_changes(self)
+            if changes is not None:
+                reload, records, removed, latest = changes
+                with self._lock:
+                    if reload:
+                        removed = [record_id for record_id in self._records
+                                   if record_id not in records and record_id not in self._dirty]
+                    # Local writes are saved as they're made, so a record still
+                    # dirty here failed to save - the feed's later copy wins
+                    self._dirty.difference_update(records, removed)
+                self.upsert(list(records.values()), dirty=False)
+                self.remove(removed, dirty=False)
+                # Only now - cursors handed out from here on count these as applied
+                self.feed_seq = latest
+            if self._transformed_on != date.today():
+                self.retransform()
+            if self._dirty:
+                # Retry local writes whose save failed, for the other workers
+                save(self)
+        if not leading():
+            # A follower is as fresh as the leader's saves; the leader keeps its own ttl
+            self.synced_at = time.monotonic()
+
+    def retransform(self):
+        """
+        Recompute every row. Rows can depend on today's date (friendly dates
+        pick their year relative to today), so this runs once a day on sync.
+        The leader saves the rows that moved, so feed cursors hear of them.
+        """
+        with self._lock:
+            self._transformed_on = date.today()
+            records = list(self._records.values())
+            with metrics.timed('transform'):
+                rows = self.transform(records)
+            changed = []
+            previous = {}
+            for record, row in zip(records, rows):
+                old = self._rows.get(record['id'])
+                if old != row:
+                    self.version += 1
+                    self._set_row(record['id'], row)
+                    self._log.append((self.version, record['id']))
+                    changed.append((record['id'], row))
+                    if old is not None:
+                        previous[record['id']] = old
+                    if leading():
+                        self._dirty.add(record['id'])
+
+        if changed:
+            self._notify(changed, [], previous)
+
+    def refresh_records(self, record_ids, destroyed_ids=()):
+        """
+        Re-read just these records (one query) and apply them. Records that
+        no longer match the mirror's formula, or were destroyed, are removed.
+        The changes are saved straight away, so other workers pick them up
+        from the change feed too.
+        """
+        record_ids = list(record_ids)
+        try:
+            if len(record_ids) > REFRESH_BATCH_LIMIT:
+                self.sync()
+            elif record_ids:
+                ids_formula = 'OR(' + ', '.join(f"RECORD_ID() = '{r}'" for r in record_ids) + ')'
+                formula = f'AND({self.formula}, {ids_formula})' if self.formula else ids_formula
+                records = cache.fetch_all(self.table, {'filterByFormula': formula}, fields=self.fields)
+                found = {record['id'] for record in records}
+                self.upsert(records)
+                self.remove([r for r in record_ids if r not in found])
+            self.remove(destroyed_ids)
+            save(self)
+        except Exception:
+            # We've lost track of these changes - resync on the next read
+            self.synced_at = None
+            raise
+
+    # ----- writes -----
+    def upsert(self, records, dirty=True):
+        """
+        Apply fresh copies of records (e.g. a PATCH response); unchanged ones
+        are skipped. dirty=False for records read back from the saved copy.
+        """
+        wanted = set(self.fields)
+        fresh = []
+        for record in records:
+            fields = {k: v for k, v in record.get('fields', {}).items() if k in wanted}
+            fresh.append({'id': record['id'], 'createdTime': record.get('createdTime'), 'fields': fields})
+
+        with self._lock:
+            changed = [r for r in fresh if self._records.get(r['id'], {}).get('fields') != r['fields']]
+            if not changed:
+                return
+            with metrics.timed('transform'):
+                rows = self.transform(changed)
+            previous = {}
+            for record, row in zip(changed, rows):
+                if record['id'] in self._rows:
+                    previous[record['id']] = self._rows[record['id']]
+                self.version += 1
+                self._records[record['id']] = record
+                if dirty:
+                    self._dirty.add(record['id'])
+                self._set_row(record['id'], row)
+                self._removed.pop(record['id'], None)
+                self._log.append((self.version, record['id']))
+            self._prune_removed()
+
+        self._notify([(record['id'], row) for record, row in zip(changed, rows)], [], previous)
+
+    def remove(self, record_ids, dirty=True):
+        """Drop records deleted (or filtered out) upstream"""
+        removed = []
+        with self._lock:
+            for record_id in record_ids:
+                if record_id not in self._records:
+                    continue
+                self.version += 1
+                del self._records[record_id]
+                if dirty:
+                    self._dirty.add(record_id)
+                row = self._pop_row(record_id)
+                self._removed[record_id] = (self.version, row)
+                self._log.append((self.version, record_id))
+                removed.append((record_id, row))
+            self._prune_removed()
+
+        if removed:
+            self._notify([], removed, {})
+
+    def _prune_removed(self):
+        # Tombstones older than the change log can never be asked for again
+        if self._removed and self._log:
+            oldest = self._log[0][0]
+            for record_id, (version, _) in list(self._removed.items()):
+                if version < oldest:
+                    del self._removed[record_id]
+
+    # ----- listeners -----
+    def on_change(self, callback):
+        """
+        Call callback(changed, removed, previous) after every applied change,
+        with the same [(record id, row)] lists changes_since returns. previous
+        maps each changed record that was already here to its row before the
+        change, so a listener can tell when a row moved (e.g. client).
+        """
+        self._listeners.append(callback)
+        return callback
+
+    def _notify(self, changed, removed, previous):
+        for callback in self._listeners:
+            try:
+                callback(changed, removed, previous)
+            except Exception as e:
+                print(f"[mirror] {self.table} listener failed: {e}")
+
+
+# ===== DERIVED VIEWS =====
+class DerivedView:
+    """
+    Something worked out from mirrors' rows and kept in step with them - a
+    search index, rollup columns, a directory. Built on the first read, and
+    patched by the mirrors' change listeners after that. A view that can't
+    patch itself in place returns False from patch() and is rebuilt on the
+    next read instead.
+
+    build() and patch() run under one re-entrant lock: building reads (and
+    can sync) a mirror, which calls the listener back on the same thread.
+    """
+
+    def __init__(self, *mirrors):
+        self.mirrors = mirrors
+        self._lock = threading.RLock()
+        self._built = False
+        for table_mirror in mirrors:
+            table_mirror.on_change(self._changed)
+
+    def ensure_built(self):
+        if self._built and not self.expired():
+            return
+        # Outside the lock - a sync in another thread may be waiting on it to notify
+        for table_mirror in self.mirrors:
+            table_mirror.ensure_fresh()
+        with self._lock:
+            if not self._built or self.expired():
+                self.build()
+                self._built = True
+
+    def _changed(self, changed, removed, previous):
+        with self._lock:
+            # Not built yet: the build will read these rows from the mirror
+            if not self._built:
+                return
+            if not self.patch(changed, removed):
+                self._built = False
+
+    def build(self):
+        """Work the view out from the mirrors' current rows"""
+        raise NotImplementedError
+
+    def patch(self, changed, removed):
+        """Apply a change listener's rows in place; False to rebuild on the next read"""
+        return False
+
+    def expired(self):
+        """True if the view is out of date even without a change (e.g. it depends on today)"""
+        return False
+
+
+# ===== PERSISTENCE =====
+_store_lock = threading.Lock()
+
+def _connect(path):
+    db = sqlite3.connect(path, timeout=5)
+    db.execute('PRAGMA journal_mode=WAL')
+    db.execute("""CREATE TABLE IF NOT EXISTS mirrors (
+        name TEXT PRIMARY KEY, spec TEXT, epoch TEXT, version INTEGER,
+        watermark TEXT, full_synced_at REAL, saved_at REAL)""")
+    db.execute("""CREATE TABLE IF NOT EXISTS records (
+        mirror TEXT, id TEXT, record TEXT, PRIMARY KEY (mirror, id))""")
+    # Saved changes for other workers: record NULL = removed, id NULL = everything replaced
+    db.execute("""CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT)""")
+    db.execute("""CREATE TABLE IF NOT EXISTS changes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT, mirror TEXT, id TEXT, record TEXT, worker INTEGER)""")
+    return db
+
+
+def _spec(table_mirror):
+    """What a saved copy must match to be reusable - a changed field list or formula invalidates it"""
+    return json.dumps({'fields': table_mirror.fields, 'formula': table_mirror.formula})
+
+
+def save(table_mirror, path=None):
+    """
+    Write a mirror to disk if it changed since the last save. Only records
+    changed or removed since then are written, unless the saved copy isn't
+    ours to patch (first save, or a different field list). Never raises.
+    """
+    path = SNAPSHOT_PATH if path is None else path
+    if not path:
+        return
+    table = table_mirror.table
+    with table_mirror._lock:
+        state = (table_mirror.epoch, table_mirror.version)
+        if state == table_mirror.saved_version:
+            return
+        # Records are replaced on change, never mutated, so they can be
+        # serialized after the lock is released
+        full = not table_mirror._persisted
+        if full:
+            dirty = dict(table_mirror._records)
+        else:
+            dirty = {rid: table_mirror._records.get(rid) for rid in table_mirror._dirty}
+        table_mirror._dirty = set()
+        meta = (table, _spec(table_mirror), table_mirror.epoch, table_mirror.version,
+                table_mirror.watermark, table_mirror.full_synced_at, time.time())
+
+    written = [(table, rid, json.dumps(r)) for rid, r in dirty.items() if r is not None]
+    deleted = [(table, rid) for rid, r in dirty.items() if r is None]
+    try:
+        with _store_lock:
+            db = _connect(path)
+            try:
+                with db:
+                    worker = os.getpid()
+                    # Nothing from other workers since our feed_seq: our own
+                    # entries can count as applied (they're in memory already)
+                    caught_up = not db.execute(
+                        'SELECT 1 FROM changes WHERE seq > ? AND mirror = ? AND worker != ? LIMIT 1',
+                        (table_mirror.feed_seq, table, worker)
+                    ).fetchone()
+                    if full:
+                        db.execute('DELETE FROM records WHERE mirror = ?', (table,))
+                        db.execute('INSERT INTO changes (mirror, worker) VALUES (?, ?)', (table, worker))
+                    else:
+                        db.executemany('INSERT INTO changes (mirror, id, record, worker) VALUES (?, ?, ?, ?)',
+                                       [row + (worker,) for row in written]
+                                       + [(table, rid, None, worker) for _, rid in deleted])
+                    db.executemany('INSERT OR REPLACE INTO records VALUES (?, ?, ?)', written)
+                    db.executemany('DELETE FROM records WHERE mirror = ? AND id = ?', deleted)
+                    db.execute('INSERT OR REPLACE INTO mirrors VALUES (?, ?, ?, ?, ?, ?, ?)', meta)
+                    latest = db.execute('SELECT COALESCE(MAX(seq), 0) FROM changes').fetchone()[0]
+                    db.execute('DELETE FROM changes WHERE seq <= ? - ?', (latest, CHANGE_FEED_SIZE))
+            finally:
+                db.close()
+        table_mirror.saved_version = state
+        table_mirror._persisted = True
+        if caught_up:
+            table_mirror.feed_seq = max(table_mirror.feed_seq, latest)
+    except Exception as e:
+        # Still unsaved - write these with the next save
+        if not full:
+            with table_mirror._lock:
+                table_mirror._dirty.update(dirty)
+        print(f"[mirror] Saving {table} failed: {e}")
+
+
+def load(table_mirror, path=None):
+    """
+    Restore a mirror saved by save(). If the copy is younger than the ttl it
+    counts as fresh; otherwise it's served while a sync catches up.
+    The restored mirror gets a new epoch: the change log isn't saved, and
+    several workers may restore the same copy and then move on separately,
+    so cursors from before the restart must resync.
+    Returns True if anything was loaded.
+    """
+    path = SNAPSHOT_PATH if path is None else path
+    if not path or not os.path.exists(path) or table_mirror.synced_at is not None:
+        return False
+
+    try:
+        with _store_lock:
+            db = _connect(path)
+            try:
+                meta = db.execute(
+                    'SELECT spec, epoch, version, watermark, full_synced_at, saved_at FROM mirrors WHERE name = ?',
+                    (table_mirror.table,)
+                ).fetchone()
+                if not meta or meta[0] != _spec(table_mirror):
+                    return False
+                with db:
+                    rows = db.execute('SELECT record FROM records WHERE mirror = ?', (table_mirror.table,)).fetchall()
+                    feed_seq = db.execute('SELECT COALESCE(MAX(seq), 0) FROM changes').fetchone()[0]
+            finally:
+                db.close()
+    except Exception as e:
+        print(f"[mirror] Loading {table_mirror.table} failed: {e}")
+        return False
+
+    _, _, version, watermark, full_synced_at, saved_at = meta
+    epoch = uuid.uuid4().hex[:8]
+    records = [json.loads(row[0]) for row in rows]
+    transformed = table_mirror.transform(records)
+
+    with table_mirror._lock:
+        table_mirror._records = {r['id']: r for r in records}
+        table_mirror._rows = {r['id']: row for r, row in zip(records, transformed)}
+        table_mirror._reindex()
+        table_mirror.epoch = epoch
+        table_mirror.version = version
+        table_mirror.watermark = watermark
+        table_mirror.full_synced_at = full_synced_at
+        table_mirror.saved_version = (epoch, version)
+        table_mirror._persisted = True
+        table_mirror._dirty = set()
+        table_mirror.feed_seq = feed_seq
+        table_mirror.synced_at = time.monotonic() - max(0, time.time() - saved_at)
+
+    print(f"[mirror] Restored {len(records)} {table_mirror.table} records from {path}")
+    return True
+
+
+def read_changes(table_mirror, path=None):
+    """
+    Changes other workers saved to a mirror since its feed_seq, as
+    (reload, {record id: record}, [removed ids], latest seq) with only the
+    latest change per record. reload means apply the records as the whole
+    table. None if nothing changed. The caller moves feed_seq on to latest
+    once the changes are applied.
+    """
+    path = SNAPSHOT_PATH if path is None else path
+    if not path or not os.path.exists(path):
+        return None
+    table = table_mirror.table
+    with _store_lock:
+        db = _connect(path)
+        try:
+            with db:
+                since = table_mirror.feed_seq
+                oldest, latest = db.execute('SELECT MIN(seq), MAX(seq) FROM changes').fetchone()
+                if latest is None or latest <= since:
+                    return None
+                changes = db.execute(
+                    'SELECT id, record FROM changes WHERE seq > ? AND mirror = ? AND worker != ? ORDER BY seq',
+                    (since, table, os.getpid())
+                ).fetchall()
+                # Entries we needed were pruned, or a full save replaced the table
+                reload = oldest > since + 1 or any(record_id is None for record_id, _ in changes)
+                if reload:
+                    meta = db.execute('SELECT spec FROM mirrors WHERE name = ?', (table,)).fetchone()
+                    if not meta or meta[0] != _spec(table_mirror):
+                        return None
+                    changes = db.execute('SELECT id, record FROM records WHERE mirror = ?', (table,)).fetchall()
+        finally:
+            db.close()
+
+    latest_change = dict(changes)
+    records = {rid: json.loads(record) for rid, record in latest_change.items() if record is not None}
+    removed = [rid for rid, record in latest_change.items() if record is None]
+    return reload, records, removed, latest
+
+
+def feed_changes(table_mirror, since, until, path=None):
+    """
+    Ids of a mirror's records saved to the change feed after since, up to
+    until, in the order of their last change. None if the feed no longer
+    reaches back to since, or a full save replaced the table in between.
+    """
+    path = SNAPSHOT_PATH if path is None else path
+    if not path or not os.path.exists(path):
+        return None
+    with _store_lock:
+        db = _connect(path)
+        try:
+            oldest = db.execute('SELECT MIN(seq) FROM changes').fetchone()[0]
+            if oldest is None or oldest > since + 1:
+                return None
+            changes = db.execute(
+                'SELECT id FROM changes WHERE seq > ? AND seq <= ? AND mirror = ? ORDER BY seq',
+                (since, until, table_mirror.table)
+            ).fetchall()
+        finally:
+            db.close()
+
+    record_ids = {}
+    for (record_id,) in changes:
+        if record_id is None:
+            return None
+        record_ids.pop(record_id, None)
+        record_ids[record_id] = True
+    return list(record_ids)
+
+
+_feed_ids = {}      # SQLite path -> id of the change feed in it
+
+def feed_id(path=None):
+    """
+    Names the change feed in the SQLite file, for cursors: a cursor from a
+    deleted and recreated file must resync. None without persistence.
+    """
+    path = SNAPSHOT_PATH if path is None else path
+    if not path:
+        return None
+    if path not in _feed_ids:
+        try:
+            with _store_lock:
+                db = _connect(path)
+                try:
+                    with db:
+                        db.execute('INSERT OR IGNORE INTO state VALUES (?, ?)',
+                                   ('feed-id', json.dumps(uuid.uuid4().hex[:8])))
+                        value = db.execute("SELECT value FROM state WHERE key = 'feed-id'").fetchone()[0]
+                finally:
+                    db.close()
+        except Exception as e:
+            print(f"[mirror] Reading the change feed id failed: {e}")
+            return None
+        _feed_ids[path] = json.loads(value)
+    return _feed_ids[path]
+
+
+def load_state(key, path=None):
+    """A small value kept beside the mirrors (e.g. a webhook cursor), or None"""
+    path = SNAPSHOT_PATH if path is None else path
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with _store_lock:
+            db = _connect(path)
+            try:
+                row = db.execute('SELECT value FROM state WHERE key = ?', (key,)).fetchone()
+            finally:
+                db.close()
+    except Exception as e:
+        print(f"[mirror] Loading {key} failed: {e}")
+        return None
+    return json.loads(row[0]) if row else None
+
+
+def save_state(key, value, path=None):
+    """Keep value under key for load_state - shared by every worker, kept across restarts"""
+    path = SNAPSHOT_PATH if path is None else path
+    if not path:
+        return
+    try:
+        with _store_lock:
+            db = _connect(path)
+            try:
+                with db:
+                    db.execute('INSERT OR REPLACE INTO state VALUES (?, ?)', (key, json.dumps(value)))
+            finally:
+                db.close()
+    except Exception as e:
+        print(f"[mirror] Saving {key} failed: {e}")
+
+
+def load_all(path=None):
+    """Restore every mirror from disk - call once at boot"""
+    return [m.table for m in MIRRORS if load(m, path)]
+
+
+# ===== WARM-UP =====
+def warm():
+    """
+    Sync every mirror that didn't restore from disk, blocking. The gunicorn
+    master calls this before forking so workers start with the data already
+    in (shared) memory. Restored mirrors are served as they are and caught
+    up by the leading worker's delta syncs - reloading them here would hit
+    Airtable for every table on every restart.
+    A table that fails is left for the workers' background sync to retry.
+    Returns the tables that synced.
+    """
+    warmed = []
+    for table_mirror in MIRRORS:
+        if table_mirror.synced_at is not None:
+            continue
+        try:
+            cache.flights.do(('mirror', table_mirror.table), table_mirror.sync)
+            warmed.append(table_mirror.table)
+        except Exception as e:
+            print(f"[mirror] Warming {table_mirror.table} failed: {e}")
+    return warmed
+
+
+def ready():
+    """True once every mirror holds data, from disk or Airtable"""
+    return all(table_mirror.synced_at is not None for table_mirror in MIRRORS)
+
+
+def after_fork():
+    """
+    Run in each forked worker. Workers apply changes separately from here
+    on (the leader's syncs, everyone's saves), so their versions diverge -
+    each needs its own epoch for version cursors to stay unambiguous. With
+    a saved copy, cursors are change feed positions instead, which every
+    worker shares, so a poll can land on any worker.
+    Every lock is replaced rather than acquired: one held by a master thread
+    at the fork would never be released in the child.
+    """
+    global _store_lock, _sync_lock
+    _store_lock = threading.Lock()
+    _sync_lock = threading.Lock()
+    for table_mirror in MIRRORS:
+        table_mirror._lock = threading.RLock()
+        table_mirror._refreshing = threading.Lock()
+        table_mirror._pulling = threading.Lock()
+        table_mirror.epoch = uuid.uuid4().hex[:8]
+        table_mirror._log.clear()
+        table_mirror._removed.clear()
+        table_mirror.saved_version = None
+
+
+# ===== MIRRORS =====
+# Everything but archived jobs - covers /jobs/all (active) and /jobs/client (incl. completed)
+projects = TableMirror('Projects', PROJECT_FIELDS, transform_projects, formula="{Status} != 'Archived'")
+
+# Job queries - by number, client, status, stage, with-client, and due/live date windows
+projects.add_index('jobNumber', lambda job: job['jobNumber'])
+projects.add_index('client', lambda job: job['clientCode'])
+projects.add_index('status', lambda job: job['status'])
+projects.add_index('stage', lambda job: job['stage'])
+projects.add_index('withClient', lambda job: job['withClient'])
+projects.add_sorted_index('updateDue', lambda job: job['updateDue'])
+projects.add_sorted_index('liveDate', lambda job: job['liveDate'])
+
+tracker = TableMirror('Tracker', TRACKER_FIELDS, transform_tracker_rows, ttl=TRACKER_MIRROR_TTL)
+
+# /tracker/data reads one client at a time
+tracker.add_index('client', lambda row: row['client'])
+
+clients = TableMirror('Clients', CLIENT_FIELDS, record_fields)
+clients.add_index('code', lambda row: row.get('Client code', ''))
+
+people = TableMirror('People', PEOPLE_FIELDS, record_fields, formula='{Active} = TRUE()')
+
+MIRRORS = [projects, tracker, clients, people]
+
+
+# ===== LEADERSHIP =====
+_leader_file = None
+_leading = True         # until a background sync loop finds another worker leads
+
+def claim_leadership(path=None):
+    """
+    Try to become (or stay) the worker that syncs with Airtable: whoever
+    holds an exclusive lock on the lock file beside the SQLite file. The
+    lock goes with the process, so if the leader dies another worker takes
+    over on its next attempt. Without persistence (or fcntl) every worker leads.
+    """
+    global _leader_file, _leading
+    path = SNAPSHOT_PATH if path is None else path
+    if not path or fcntl is None:
+        _leading = True
+    elif _leader_file is None:
+        lock_file = open(f'{path}.leader', 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            _leader_file = lock_file
+            _leading = True
+        except OSError:
+            lock_file.close()
+            _leading = False
+    return _leading
+
+
+def leading():
+    return _leading
+
+
+def syncing():
+    """Whether this process runs the background sync - workers do, the gunicorn master doesn't"""
+    return _sync_thread is not None and _sync_thread.is_alive()
+
+
+# ===== BACKGROUND SYNC =====
+_sync_thread = None
+_sync_lock = threading.Lock()
+
+def start_background_sync(interval=SYNC_INTERVAL):
+    """
+    Keep every mirror within its ttl from a daemon thread, so changes made
+    in Airtable reach listeners without waiting for a read. The leading
+    worker syncs with Airtable; the others apply its saved changes each
+    round. Idempotent, and per process - call it after forking, not before
+    (the master must never hold the leader lock its workers would inherit).
+    """
+    global _sync_thread
+    with _sync_lock:
+        if _sync_thread is not None and _sync_thread.is_alive():
+            return _sync_thread
+
+        def run():
+            while True:
+                try:
+                    claim_leadership()
+                except OSError as e:
+                    print(f"[mirror] Leader lock failed: {e}")
+                for table_mirror in MIRRORS:
+                    try:
+                        if table_mirror.synced_at is not None:
+                            table_mirror.pull()
+                        if leading() or table_mirror.synced_at is None:
+                            table_mirror.ensure_fresh()
+                    except Exception as e:
+                        print(f"[mirror] Background sync of {table_mirror.table} failed: {e}")
+                time.sleep(interval)
+
+        _sync_thread = threading.Thread(target=run, name='mirror-sync', daemon=True)
+        _sync_thread.start()
+        return _sync_thread
@@ -0,0 +1,112 @@
+"""
+Dot Remote API - People Directory
+Active contacts from the People mirror, grouped by client and indexed for
+search, shared by /people/<client_code> and Ask Dot's search_people tool.
+
+One NZ's divisions (ONE, ONB, ONS) share their contacts, so they form one
+group: asking for any of them returns all three. Search is a case-insensitive
+substring match on name and email, answered from an n-gram index: every
+1-3 character slice of "name email" maps to the people containing it. A
+short term is one lookup. A longer one intersects the sets for its
+trigrams, then checks the few candidates left.
+
+Client Link is a linked-record field, which the REST API returns as Clients
+record ids (recXXX), not the codes a formula would compare. Ids are mapped
+to client codes through the Clients mirror; plain codes (older rows) pass
+through as they are.
+
+The directory is rebuilt on the first read after the People or Clients
+mirror changes. It is a few hundred rows, so a rebuild takes milliseconds.
+"""
+
+from collections import defaultdict
+
+import mirror
+
+# Client codes that share one contact list
+GROUPS = {'ONE': 'ONE', 'ONB': 'ONE', 'ONS': 'ONE'}
+
+GRAM_SIZE = 3
+
+
+def group_of(client_code):
+    return GROUPS.get(client_code, client_code)
+
+
+def grams(text, size):
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def client_codes(links, codes_by_id):
+    """Client Link value -> client codes, mapping Clients record ids to their code"""
+    if not links:
+        return []
+    if isinstance(links, str):
+        links = [links]
+    return [codes_by_id.get(link, link) for link in links]
+
+
+class Directory(mirror.DerivedView):
+    def __init__(self, table_mirror, clients_mirror):
+        self.mirror = table_mirror
+        self.clients = clients_mirror
+        self._state = None
+        super().__init__(table_mirror, clients_mirror)
+
+    def search(self, client_code=None, term=None):
+        """People for a client's group (or everyone), optionally matching term, by name"""
+        self.ensure_built()
+        people, by_group, index = self._state
+        candidates = by_group.get(group_of(client_code), ()) if client_code else range(len(people))
+
+        term = (term or '').strip().lower()
+        if term:
+            if len(term) <= GRAM_SIZE:
+                matches = index.get(term, set())
+            else:
+                sets = sorted((index.get(gram, set()) for gram in grams(term, GRAM_SIZE)), key=len)
+                matches = {i for i in sets[0].intersection(*sets[1:]) if term in people[i]['searchable']}
+            candidates = [i for i in candidates if i in matches]
+
+        return [people[i]['person'] for i in candidates]
+
+    def build(self):
+        codes_by_id = {row['id']: row.get('Client code', '') for row in self.clients.rows()}
+        self._state = self._index(self.mirror.rows(), codes_by_id)
+
+    @staticmethod
+    def _index(rows, codes_by_id):
+        people = []
+        for fields in rows:
+            name = fields.get('Name', fields.get('Full name', ''))
+            if not name:
+                continue
+            email = fields.get('Email Address', '')
+            links = fields.get('Client Link', '')
+            codes = client_codes(links, codes_by_id)
+            people.append({
+                'person': {
+                    'name': name,
+                    'email': email,
+                    'phone': fields.get('Phone Number', ''),
+                    # Same shape as the field - a list, or a bare string in older rows
+                    'clientCode': codes if isinstance(links, list) else (codes[0] if codes else links)
+                },
+                'codes': codes,
+                'searchable': f'{name} {email}'.lower(),
+            })
+        people.sort(key=lambda entry: entry['person']['name'])
+
+        by_group = defaultdict(list)
+        index = defaultdict(set)
+        for i, entry in enumerate(people):
+            for group in {group_of(code) for code in entry['codes']}:
+                by_group[group].append(i)
+            for size in range(1, GRAM_SIZE + 1):
+                for gram in grams(entry['searchable'], size):
+                    index[gram].add(i)
+
+        return people, dict(by_group), dict(index)
+
+
+directory = Directory(mirror.people, mirror.clients)
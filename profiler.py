@@ -0,0 +1,169 @@
+"""
+Dot Remote API - Request Profiler
+On-demand sampling of single requests. A request opts in by sending
+PROFILE_TOKEN in the X-Dot-Profile header or the ?profile= query param;
+its thread's stack is then sampled every few milliseconds and saved in
+collapsed-stack format ("a;b;c <weight>" lines), which flamegraph.pl,
+speedscope and inferno all read.
+
+Sampling is by wall clock and each sample is weighted by the microseconds
+since the previous one, so time spent waiting on Airtable or Claude shows
+up under the airtable/ask_dot/cache function that waited for it.
+Requests that don't opt in go straight to the view.
+"""
+
+import os
+import re
+import sys
+import hmac
+import time
+import uuid
+import tempfile
+import threading
+from collections import Counter
+from functools import wraps
+
+from flask import current_app, request
+
+# ===== CONFIGURATION =====
+# Profiling is off unless a token is set
+PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN')
+
+# Shared by all workers, so a profile can be fetched from any of them
+PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'dot-hub-profiles'))
+
+PROFILE_INTERVAL = float(os.environ.get('PROFILE_INTERVAL_MS', 2)) / 1000
+
+# Newest profiles kept on disk
+PROFILE_KEEP = int(os.environ.get('PROFILE_KEEP', 50))
+
+PROFILE_HEADER = 'X-Dot-Profile'
+
+PROFILE_ID_RE = re.compile(r'^[\w.-]+$')
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+# ===== OPT-IN =====
+def authorized(token):
+    return bool(PROFILE_TOKEN and token and hmac.compare_digest(token, PROFILE_TOKEN))
+
+
+def requested():
+    """Does the current request ask to be profiled (with the right token)?"""
+    return authorized(request.headers.get(PROFILE_HEADER) or request.args.get('profile'))
+
+
+# ===== SAMPLING =====
+def _frame_name(code):
+    """cache.py:fetch_all for our modules, requests/sessions.py:send for libraries"""
+    path = code.co_filename
+    if path.startswith(APP_DIR + os.sep):
+        path = os.path.relpath(path, APP_DIR)
+    else:
+        path = '/'.join(path.split(os.sep)[-2:])
+    return f'{path}:{code.co_name}'
+
+
+class Sampler:
+    """Samples one thread's stack from a background thread until stopped"""
+
+    def __init__(self, thread_id, interval=PROFILE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()     # collapsed stack -> microseconds
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            if frame is None:
+                break
+            names = []
+            while frame is not None:
+                names.append(_frame_name(frame.f_code))
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(names))] += int((now - last) * 1_000_000)
+            self.samples += 1
+            last = now
+
+
+# ===== STORAGE =====
+def save(sampler, label):
+    """Write a sampler's stacks to PROFILE_DIR and return the profile ID"""
+    profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{label}-{uuid.uuid4().hex[:6]}"
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    with open(os.path.join(PROFILE_DIR, f'{profile_id}.folded'), 'w') as f:
+        for stack, weight in sampler.stacks.most_common():
+            f.write(f'{stack} {weight}\n')
+
+    profiles = sorted(name for name in os.listdir(PROFILE_DIR) if name.endswith('.folded'))
+    for name in profiles[:-PROFILE_KEEP]:
+        try:
+            os.remove(os.path.join(PROFILE_DIR, name))
+        except OSError:
+            pass
+    return profile_id
+
+
+def load(profile_id):
+    """Collapsed stacks of a saved profile, or None"""
+    if not PROFILE_ID_RE.match(profile_id):
+        return None
+    try:
+        with open(os.path.join(PROFILE_DIR, f'{profile_id}.folded')) as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def summarize(folded):
+    """
+    Inclusive wall time (ms) per function in our own modules, slowest
+    first - {'cache.py:fetch_all': 812.4, 'ask_dot.py:call_claude': ...}
+    """
+    totals = Counter()
+    for line in folded.splitlines():
+        stack, _, weight = line.rpartition(' ')
+        own = {frame for frame in stack.split(';') if '/' not in frame.split(':', 1)[0]}
+        for frame in own:
+            totals[frame] += int(weight)
+    return {frame: round(us / 1000, 1) for frame, us in totals.most_common()}
+
+
+# ===== VIEWS =====
+def profiled(view):
+    """
+    Decorate a view so it can be profiled on request. The saved profile's
+    ID comes back in the X-Dot-Profile-Id response header.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not PROFILE_TOKEN or not requested():
+            return view(*args, **kwargs)
+
+        sampler = Sampler(threading.get_ident()).start()
+        try:
+            response = current_app.make_response(view(*args, **kwargs))
+        finally:
+            sampler.stop()
+
+        try:
+            response.headers['X-Dot-Profile-Id'] = save(sampler, request.endpoint)
+        except OSError as e:
+            print(f"[profiler] Saving profile failed: {e}")
+        return response
+    return wrapper
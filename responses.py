@@ -0,0 +1,170 @@
+"""
+Dot Remote API - Response Bodies
+Fast JSON encoding for the Flask app, negotiated gzip/brotli compression,
+and the paging and NDJSON streaming behind the large list endpoints.
+orjson and brotli are optional - without them we fall back to the stdlib
+encoder and gzip only.
+"""
+
+import os
+import gzip
+import base64
+import bisect
+
+from flask.json.provider import DefaultJSONProvider
+
+import metrics
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this go out uncompressed - not worth the CPU or the header
+COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', 1024))
+
+# Rows per NDJSON chunk - one encode and one write per chunk, not per row
+STREAM_CHUNK_ROWS = int(os.environ.get('STREAM_CHUNK_ROWS', 200))
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'application/x-ndjson', 'text/plain', 'text/html'}
+
+
+# ===== JSON =====
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson when it's installed.
+    Keeps Flask's output contract: sorted keys, and dates/dataclasses/etc.
+    still go through Flask's default() hook.
+    """
+
+    if orjson is not None:
+        OPTIONS = (orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+                   | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS)
+
+    @staticmethod
+    def default(o):
+        # Compact records (transforms.Job) serialize as the dict they stand in for
+        as_dict = getattr(o, 'as_dict', None)
+        if as_dict is not None:
+            return as_dict()
+        return DefaultJSONProvider.default(o)
+
+    def dumps_bytes(self, obj):
+        """Serialize straight to UTF-8 bytes (what responses and snapshots want)"""
+        with metrics.timed('serialize'):
+            if orjson is None:
+                return super().dumps(obj).encode('utf-8')
+            return orjson.dumps(obj, default=self.default, option=self.OPTIONS)
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Pretty-printing (debug mode) stays on the stdlib path
+        if orjson is None or self.compact is False or (self.compact is None and self._app.debug):
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj) + b'\n', mimetype=self.mimetype)
+
+
+# ===== COMPRESSION =====
+def available_encodings():
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def negotiate_encoding(request, size):
+    """Best Content-Encoding the client accepts for a body of this size, or None"""
+    if size < COMPRESS_MIN_BYTES:
+        return None
+    return request.accept_encodings.best_match(available_encodings())
+
+
+def compress(body, encoding, cached=False):
+    """
+    Compress body with the negotiated encoding. cached=True means the result
+    will be reused across requests, so it's worth spending more CPU on it.
+    """
+    with metrics.timed('compress'):
+        if encoding == 'br':
+            return brotli.compress(body, quality=8 if cached else 4)
+        if encoding == 'gzip':
+            return gzip.compress(body, compresslevel=9 if cached else 6)
+        return body
+
+
+def compress_response(request, response):
+    """after_request hook: compress large uncached JSON/text bodies on the fly"""
+    if (response.status_code != 200
+            or response.direct_passthrough
+            or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    body = response.get_data()
+    encoding = negotiate_encoding(request, len(body))
+    response.vary.add('Accept-Encoding')
+    if not encoding:
+        return response
+
+    response.set_data(compress(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+# ===== LISTS =====
+def encode_cursor(key):
+    """Opaque page cursor for the last key a page returned"""
+    return base64.urlsafe_b64encode(key.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    try:
+        return base64.b64decode(cursor.encode('ascii'), altchars=b'-_', validate=True).decode('utf-8')
+    except (ValueError, UnicodeError):
+        raise ValueError('cursor is invalid')
+
+
+def paginate(rows, key, limit, cursor=None):
+    """
+    One page of rows in key order: (page, next cursor or None). The cursor
+    is the last key served, not a position, so rows added or removed
+    between requests don't shift later pages.
+    """
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        raise ValueError(f'limit must be between 1 and {MAX_PAGE_SIZE}')
+    ordered = sorted(rows, key=key)
+    start = 0
+    if cursor:
+        start = bisect.bisect_right([key(row) for row in ordered], decode_cursor(cursor))
+    page = ordered[start:start + limit]
+    more = start + limit < len(ordered)
+    return page, (encode_cursor(key(page[-1])) if more else None)
+
+
+def ndjson_chunks(rows, dumps, project=None, chunk_rows=STREAM_CHUNK_ROWS):
+    """
+    Yield rows as NDJSON, a chunk at a time. Only one chunk is encoded at
+    once, so memory stays flat however many rows there are. project(row)
+    shapes each row just before it's encoded.
+    """
+    for start in range(0, len(rows), chunk_rows):
+        chunk = rows[start:start + chunk_rows]
+        if project is not None:
+            chunk = [project(row) for row in chunk]
+        yield b''.join(dumps(row) + b'\n' for row in chunk)
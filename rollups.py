@@ -0,0 +1,175 @@
+"""
+Dot Remote API - Tracker Rollups
+Spend totals per month, quarter, job and spend type, with ballpark and
+confirmed amounts kept apart. /tracker/summary serves them, so the Hub no
+longer has to sum every tracker row in the browser.
+
+The tracker mirror is kept here a second time, as columns: flat arrays for
+spend, month, job, spend type and ballpark, one slot per record. Strings are
+stored once, in a table, and the arrays only hold their integer codes. A
+mirror listener keeps the columns current one slot at a time. A rollup reads
+just the slots of one client and never builds row dicts.
+"""
+
+from array import array
+from collections import defaultdict
+
+import mirror
+
+MONTHS = ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec']
+QUARTERS = ['JAN-MAR', 'APR-JUN', 'JUL-SEP', 'OCT-DEC']
+
+
+def month_number(month):
+    """1-12 for 'January', 'Jan 2026' and the like, else None"""
+    prefix = str(month or '').strip()[:3].lower()
+    return MONTHS.index(prefix) + 1 if prefix in MONTHS else None
+
+
+def quarter_for(month):
+    """Calendar quarter label ('JAN-MAR'...) for a month, as Ask Dot uses"""
+    number = month_number(month)
+    return QUARTERS[(number - 1) // 3] if number else None
+
+
+# ===== COLUMNS =====
+class Codes:
+    """Interned strings: value -> small int, and back"""
+
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+
+    def code(self, value):
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class TrackerColumns(mirror.DerivedView):
+    """Column-wise copy of the tracker mirror, patched as it changes"""
+
+    def __init__(self, table_mirror):
+        self.mirror = table_mirror
+        self._reset()
+        super().__init__(table_mirror)
+
+    def _reset(self):
+        self.spend = array('d')
+        self.month = array('i')
+        self.job = array('i')
+        self.spend_type = array('i')
+        self.ballpark = array('b')
+
+        self.months = Codes()
+        self.jobs = Codes()             # job number
+        self.spend_types = Codes()
+        self.project_names = {}         # job code -> project name
+
+        self._slots = {}                # record id -> slot
+        self._client_of = {}            # slot -> client code
+        self._by_client = defaultdict(set)
+        self._free = []
+
+    def build(self):
+        self._reset()
+        for row in self.mirror.rows():
+            self._put(row)
+
+    def patch(self, changed, removed):
+        """Patch the slots of changed and removed records"""
+        for _, row in changed:
+            self._put(row)
+        for record_id, _ in removed:
+            self._drop(record_id)
+        return True
+
+    def _put(self, row):
+        slot = self._slots.get(row['id'])
+        if slot is None:
+            if self._free:
+                slot = self._free.pop()
+            else:
+                slot = len(self.spend)
+                for column in (self.spend, self.month, self.job, self.spend_type, self.ballpark):
+                    column.append(0)
+            self._slots[row['id']] = slot
+        else:
+            self._by_client[self._client_of[slot]].discard(slot)
+
+        job = self.jobs.code(row['jobNumber'])
+        self.spend[slot] = row['spend'] or 0
+        self.month[slot] = self.months.code(row['month'])
+        self.job[slot] = job
+        self.spend_type[slot] = self.spend_types.code(row['spendType'])
+        self.ballpark[slot] = row['ballpark']
+        if row['projectName']:
+            self.project_names[job] = row['projectName']
+
+        self._client_of[slot] = row['client']
+        self._by_client[row['client']].add(slot)
+
+    def _drop(self, record_id):
+        slot = self._slots.pop(record_id, None)
+        if slot is None:
+            return
+        self._by_client[self._client_of.pop(slot)].discard(slot)
+        self.spend[slot] = 0
+        self._free.append(slot)
+
+    # ----- rollups -----
+    def summarize(self, client_code):
+        """Totals for one client's tracker rows - the /tracker/summary payload"""
+        self.ensure_built()
+        with self._lock:
+            slots = list(self._by_client.get(client_code, ()))
+            spend, month, job, spend_type, ballpark = self.spend, self.month, self.job, self.spend_type, self.ballpark
+
+            # [ballpark, confirmed, rows] per code
+            by_month = defaultdict(lambda: [0.0, 0.0, 0])
+            by_job = defaultdict(lambda: [0.0, 0.0, 0])
+            by_type = defaultdict(lambda: [0.0, 0.0, 0])
+            for slot in slots:
+                amount = spend[slot]
+                if not amount:
+                    continue
+                side = 0 if ballpark[slot] else 1
+                for totals in (by_month[month[slot]], by_job[job[slot]], by_type[spend_type[slot]]):
+                    totals[side] += amount
+                    totals[2] += 1
+
+            months = {self.months.values[code]: totals for code, totals in by_month.items()}
+            jobs = {self.jobs.values[code]: (self.project_names.get(code, ''), totals) for code, totals in by_job.items()}
+            spend_types = {self.spend_types.values[code]: totals for code, totals in by_type.items()}
+
+        by_quarter = defaultdict(lambda: [0.0, 0.0, 0])
+        for name, totals in months.items():
+            quarter = by_quarter[quarter_for(name)]
+            for i in range(3):
+                quarter[i] += totals[i]
+
+        def entry(totals, **keys):
+            return dict(keys, spend=totals[0] + totals[1], ballpark=totals[0], confirmed=totals[1], rows=totals[2])
+
+        def month_order(name):
+            return (month_number(name) or 13, str(name or ''))
+
+        overall = [sum(totals[i] for totals in months.values()) for i in range(3)]
+        return {
+            'client': client_code,
+            'total': entry(overall),
+            'months': [entry(months[name], month=name, quarter=quarter_for(name))
+                       for name in sorted(months, key=month_order)],
+            'quarters': [entry(by_quarter[quarter], quarter=quarter)
+                         for quarter in sorted(by_quarter, key=lambda q: QUARTERS.index(q) if q else 4)],
+            'jobs': sorted((entry(totals, jobNumber=job_number, projectName=name)
+                            for job_number, (name, totals) in jobs.items()),
+                           key=lambda item: (-item['spend'], item['jobNumber'])),
+            'spendTypes': sorted((entry(totals, spendType=name) for name, totals in spend_types.items()),
+                                 key=lambda item: -item['spend']),
+        }
+
+
+tracker = TrackerColumns(mirror.tracker)
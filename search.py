@@ -0,0 +1,148 @@
+"""
+Dot Remote API - Job Search
+Full-text search over the Projects mirror: job number, name, owner,
+description and update history, for /jobs/search and Dot's search terms.
+
+The index is inverted: each token maps to the jobs containing it, with a
+weight for where it appears (a hit in the job name counts more than one in
+an old update). A query matches jobs containing every query token. The
+last token also matches as a prefix, so results follow the search box as
+the user types. Jobs are ranked by summed weight, scaled by how rare each
+token is (idf).
+
+A mirror listener re-indexes only the jobs that changed.
+"""
+
+import re
+import math
+import bisect
+from collections import defaultdict
+
+import mirror
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+# Where a token was found -> how much it counts
+FIELD_WEIGHTS = {
+    'jobNumber': 8.0,
+    'jobName': 4.0,
+    'projectOwner': 2.0,
+    'description': 1.0,
+    'update': 1.0,
+    'updateHistory': 0.5,
+}
+
+# A prefix match counts for less than the whole word
+PREFIX_FACTOR = 0.6
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(str(text or '').lower())
+
+
+def job_tokens(job):
+    """token -> weight for one job"""
+    weights = defaultdict(float)
+    for field, weight in FIELD_WEIGHTS.items():
+        value = job.get(field)
+        texts = value if isinstance(value, list) else [value]
+        for text in texts:
+            for token in tokenize(text):
+                weights[token] += weight
+    return weights
+
+
+class JobIndex(mirror.DerivedView):
+    """Inverted index over a mirror's job rows, patched as they change"""
+
+    def __init__(self, table_mirror):
+        self.mirror = table_mirror
+        self._reset()
+        super().__init__(table_mirror)
+
+    def _reset(self):
+        self._postings = {}          # token -> {record id: weight}
+        self._vocabulary = []        # sorted tokens, for prefix lookups
+        self._tokens = {}            # record id -> tokens it's posted under
+        self._jobs = {}              # record id -> row
+
+    def build(self):
+        self._reset()
+        for record_id, job in self.mirror.items():
+            self._put(record_id, job)
+
+    def patch(self, changed, removed):
+        """Re-index changed jobs, drop removed ones"""
+        for record_id, job in changed:
+            self._drop(record_id)
+            self._put(record_id, job)
+        for record_id, _ in removed:
+            self._drop(record_id)
+        return True
+
+    def _put(self, record_id, job):
+        weights = job_tokens(job)
+        for token, weight in weights.items():
+            posting = self._postings.get(token)
+            if posting is None:
+                posting = self._postings[token] = {}
+                bisect.insort(self._vocabulary, token)
+            posting[record_id] = weight
+        self._tokens[record_id] = list(weights)
+        self._jobs[record_id] = job
+
+    def _drop(self, record_id):
+        for token in self._tokens.pop(record_id, ()):
+            posting = self._postings[token]
+            del posting[record_id]
+            if not posting:
+                del self._postings[token]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, token)]
+        self._jobs.pop(record_id, None)
+
+    def _prefixed(self, prefix):
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        end = bisect.bisect_left(self._vocabulary, prefix + '\uffff', start)
+        return self._vocabulary[start:end]
+
+    def search(self, query, limit=None, where=None):
+        """
+        [(score, job)] best first. Every token in query must match; the last
+        may match as a prefix. where(job) -> bool narrows the results.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        self.ensure_built()
+
+        with self._lock:
+            total = max(len(self._jobs), 1)
+            scores = None
+            for position, token in enumerate(tokens):
+                matched = [(token, 1.0)] if token in self._postings else []
+                if position == len(tokens) - 1:
+                    matched += [(t, PREFIX_FACTOR) for t in self._prefixed(token) if t != token]
+
+                token_scores = defaultdict(float)
+                for match, factor in matched:
+                    posting = self._postings[match]
+                    idf = math.log(1 + total / len(posting))
+                    for record_id, weight in posting.items():
+                        token_scores[record_id] = max(token_scores[record_id], weight * factor * idf)
+
+                if scores is None:
+                    scores = token_scores
+                else:
+                    scores = {r: s + token_scores[r] for r, s in scores.items() if r in token_scores}
+                if not scores:
+                    return []
+
+            results = [(score, self._jobs[record_id]) for record_id, score in scores.items()]
+
+        if where is not None:
+            results = [result for result in results if where(result[1])]
+        results.sort(key=lambda result: (-result[0], result[1]['jobNumber']))
+        return results[:limit] if limit else results
+
+
+jobs = JobIndex(mirror.projects)
@@ -0,0 +1,89 @@
+"""
+Dot Remote API - Tests
+Plain pytest, no network: the modules live at the repo root, as under gunicorn.
+
+    python -m pytest -q
+
+Config is read at import, so it's set here first: no saved mirrors and no
+metrics files (tests that want a saved copy point mirror.SNAPSHOT_PATH at
+tmp_path themselves). The app fixture serves mirrors loaded with the SEED
+records below instead of syncing with Airtable.
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+os.environ.update({'MIRROR_SNAPSHOT_PATH': '', 'METRICS_DIR': ''})
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mirror
+
+
+# ===== SEED =====
+STATUSES = ['Incoming', 'In Progress', 'On Hold', 'Completed']
+
+def project(n, code, **fields):
+    return {'id': f'recP{n:03d}', 'fields': dict({
+        'Job Number': f'{code} {n:03d}',
+        'Project Name': f'{code} campaign {n}',
+        'Client': f'{code} Ltd',
+        'Description': 'Brand refresh across digital and OOH',
+        'Project Owner': ['Sarah', 'Mike', 'Aroha'][n % 3],
+        'Update Summary': f'Brief in | Round {n} sent',
+        'Update history': f'Round {n} sent\nBrief in',
+        'Update due friendly': 'TBC',
+        'Stage': ['Clarify', 'Craft', 'Deliver'][n % 3],
+        'Status': STATUSES[n % 4],
+        'With Client?': n % 2 == 0,
+    }, **fields)}
+
+
+def tracker_row(n, code, spend, month, **fields):
+    return {'id': f'recT{n:03d}', 'fields': dict({
+        'Client Code': [code], 'Job Number': [f'{code} {n % 3 + 1:03d}'],
+        'Project Name': [f'{code} campaign {n % 3 + 1}'], 'Spend': spend, 'Month': month,
+        'Spend type': 'Project budget', 'Ballpark': n % 4 == 0,
+    }, **fields)}
+
+
+def client(record_id, code, **fields):
+    return {'id': record_id, 'fields': dict({'Client code': code, 'Clients': f'{code} Ltd'}, **fields)}
+
+
+def person(n, name, email, *links):
+    return {'id': f'recH{n:03d}', 'fields': {'Name': name, 'Email Address': email, 'Client Link': list(links)}}
+
+
+SEED = {
+    'Projects': [project(n, code) for n, code in enumerate(['SKY'] * 8 + ['HUN'] * 6 + ['ONE'] * 4, 1)],
+    'Tracker': [tracker_row(n, code, 1000 + n * 100, month)
+                for n, (code, month) in enumerate([('SKY', 'January'), ('SKY', 'February'), ('SKY', 'May'),
+                                                   ('HUN', 'January'), ('SKY', 'January'), ('ONE', 'July')], 1)],
+    'Clients': [client('recC1', 'SKY', **{'Monthly Committed': '$10,000', 'This month': '$2,500'}),
+                client('recC2', 'HUN'), client('recC3', 'ONE'), client('recC4', 'ONB')],
+    'People': [person(1, 'Aroha Smith', 'aroha@sky.example', 'recC1'),
+               person(2, 'Mike Jones', 'mike@hun.example', 'recC2'),
+               person(3, 'Sarah Lee', 'sarah@one.example', 'recC3'),
+               person(4, 'Bo Tan', 'bo@onb.example', 'recC4'),
+               person(5, 'Jess Brown', 'jess@sky.example', 'recC1', 'recC2')],
+}
+
+
+def load_seed(monkeypatch):
+    """Replace every mirror's rows with SEED, as if just synced, and never sync again"""
+    for table_mirror in mirror.MIRRORS:
+        monkeypatch.setattr(table_mirror, 'ttl', float('inf'))
+        monkeypatch.setattr(table_mirror, 'synced_at', time.monotonic())
+        table_mirror.remove(list(table_mirror._records))
+        table_mirror.upsert(SEED[table_mirror.table])
+
+
+@pytest.fixture
+def client_app(monkeypatch):
+    """A test client for the app over the SEED mirrors"""
+    import app
+    load_seed(monkeypatch)
+    return app.app.test_client()
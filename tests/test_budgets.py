@@ -0,0 +1,117 @@
+"""
+Budget view: the figures worked out per client, and when the view rebuilds
+or re-reads client totals
+"""
+
+import threading
+import time
+from datetime import date, datetime
+
+import budgets
+import mirror
+from transforms import CLIENT_FIELDS, record_fields
+
+
+def loaded(table_mirror):
+    table_mirror.synced_at = time.monotonic()
+    return table_mirror
+
+
+def client(record_id, code, **fields):
+    return {'id': record_id, 'fields': dict({'Client code': code, 'Clients': f'{code} Ltd'}, **fields)}
+
+
+def tracker_rows(records):
+    return [{'id': record['id'], 'client': record['fields'].get('Client')} for record in records]
+
+
+def make_view():
+    clients = loaded(mirror.TableMirror('Clients', CLIENT_FIELDS, record_fields, ttl=float('inf')))
+    clients.add_index('code', lambda row: row.get('Client code', ''))
+    tracker = loaded(mirror.TableMirror('Tracker', ['Client'], tracker_rows, ttl=float('inf')))
+    return budgets.BudgetView(clients, tracker), clients, tracker
+
+
+# ===== FIGURES =====
+def test_parse_amount():
+    assert budgets.parse_amount('$1,200') == 1200
+    assert budgets.parse_amount('$12.50') == 12.5
+    assert budgets.parse_amount(['$300', '$1']) == 300
+    assert budgets.parse_amount([]) == 0
+    assert budgets.parse_amount(None) == 0
+
+
+def test_client_view_applies_rollover_to_its_quarter_only():
+    fields = client('rec1', 'SKY', **{
+        'Monthly Committed': '$10,000', 'Rollover Credit': '$3,000', 'Rollover use': 'APR-JUN',
+        'Current Quarter': 'Q2', 'This month': '$2,500', 'APR-JUN': '$16,500', 'JAN-MAR': '$30,000',
+    })['fields']
+    view = budgets.client_view(fields, datetime(2026, 5, 14))
+
+    assert view['month'] == dict(period='May', budget=10000, spent=2500, remaining=7500, percentUsed=25)
+    assert view['quarter']['quarterKey'] == 'APR-JUN' and view['quarter']['period'] == 'Q2'
+    assert view['quarter']['budget'] == 33000 and view['quarter']['rolloverApplied']
+    assert view['quarter']['percentUsed'] == 50
+    assert view['lastQuarter']['quarterKey'] == 'JAN-MAR' and view['lastQuarter']['period'] == 'Q1'
+    assert view['lastQuarter']['budget'] == 30000 and not view['lastQuarter']['rolloverApplied']
+    assert view['quarters']['JUL-SEP']['spent'] == 0
+
+
+def test_client_view_without_commitment():
+    view = budgets.client_view(client('rec1', 'ONE')['fields'], datetime(2026, 1, 3))
+    assert view['committed'] == 0
+    assert view['month']['percentUsed'] == 0
+    assert view['lastQuarter']['quarterKey'] == 'OCT-DEC'
+
+
+# ===== VIEW =====
+def test_view_rebuilds_when_clients_change():
+    view, clients, _ = make_view()
+    clients.upsert([client('rec1', 'SKY', **{'Monthly Committed': '$100'}), client('rec2', 'ONE')])
+    assert view.get('SKY')['committed'] == 100
+    assert [v['code'] for v in view.retainers()] == ['SKY']
+
+    clients.upsert([client('rec2', 'ONE', **{'Monthly Committed': '$50'})])
+    clients.remove(['rec1'])
+    assert view.get('SKY') is None
+    assert [v['code'] for v in view.retainers()] == ['ONE']
+
+
+def test_view_rebuilds_on_a_new_day():
+    view, clients, _ = make_view()
+    clients.upsert([client('rec1', 'SKY')])
+    view.get('SKY')
+    assert not view.expired()
+    view._built_on = date(2000, 1, 1)
+    assert view.expired()
+    view.get('SKY')
+    assert view._built_on == date.today()
+
+
+def test_tracker_changes_refresh_totals_only_on_a_syncing_leader(monkeypatch):
+    view, clients, tracker = make_view()
+    clients.upsert([client('rec1', 'SKY'), client('rec2', 'ONE'), client('rec3', 'HUN')])
+    refreshed = []
+    done = threading.Event()
+
+    def refresh_records(record_ids):
+        refreshed.append(sorted(record_ids))
+        done.set()
+
+    monkeypatch.setattr(clients, 'refresh_records', refresh_records)
+
+    # Not built yet, then not syncing (the gunicorn master warming up)
+    tracker.upsert([{'id': 'row1', 'fields': {'Client': 'SKY'}}])
+    view.get('SKY')
+    tracker.upsert([{'id': 'row1', 'fields': {'Client': 'HUN'}}])
+    # A follower leaves it to the leader
+    monkeypatch.setattr(mirror, 'syncing', lambda: True)
+    monkeypatch.setattr(mirror, 'leading', lambda: False)
+    tracker.upsert([{'id': 'row1', 'fields': {'Client': 'SKY'}}])
+    assert refreshed == []
+
+    # The leader re-reads the old client's totals and the new one's
+    monkeypatch.setattr(mirror, 'leading', lambda: True)
+    tracker.upsert([{'id': 'row1', 'fields': {'Client': 'ONE'}}])
+    assert done.wait(5)
+    assert refreshed == [['rec1', 'rec2']]
@@ -0,0 +1,113 @@
+"""
+Snapshot caches and conditional GETs: ETags follow the bytes, 304s skip
+the body, writes invalidate
+"""
+
+import threading
+
+import app
+import cache
+from conftest import tracker_row
+
+
+def counting_cache(**kwargs):
+    loads = []
+
+    def load(key=None):
+        loads.append(key)
+        return {'key': key, 'loads': len([k for k in loads if k == key])}
+
+    return cache.SnapshotCache('test', load, **kwargs), loads
+
+
+# ===== SNAPSHOTS =====
+def test_version_is_a_digest_of_the_body():
+    first = cache.Snapshot(b'{"a":1}', 0)
+    assert first.version == cache.Snapshot(b'{"a":1}', 5).version
+    assert first.version != cache.Snapshot(b'{"a":2}', 0).version
+    assert first.etag_for('gzip') == f'{first.version}-gzip'
+
+
+def test_snapshots_are_reused_until_invalidated():
+    snapshots, loads = counting_cache()
+    first = snapshots.get('SKY')
+    assert snapshots.get('SKY') is first
+    snapshots.get('HUN')
+
+    snapshots.invalidate('SKY')
+    assert snapshots.get('SKY') is not first
+    assert snapshots.get('HUN') is snapshots.get('HUN')
+    assert loads == ['SKY', 'HUN', 'SKY']
+
+    snapshots.invalidate()
+    snapshots.get('HUN')
+    assert loads[-1] == 'HUN'
+
+
+def test_least_recently_read_snapshots_are_dropped():
+    snapshots, loads = counting_cache(max_entries=2)
+    snapshots.get('a')
+    snapshots.get('b')
+    snapshots.get('a')
+    snapshots.get('c')              # drops b, read longest ago
+    loads.clear()
+    snapshots.get('a')
+    snapshots.get('c')
+    snapshots.get('b')
+    assert loads == ['b']
+
+
+def test_a_load_overtaken_by_a_write_is_not_kept():
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def load():
+        calls.append(1)
+        if len(calls) == 1:
+            started.set()
+            release.wait(5)
+        return len(calls)
+
+    snapshots = cache.SnapshotCache('test', load)
+    result = []
+    reader = threading.Thread(target=lambda: result.append(snapshots.get()))
+    reader.start()
+    assert started.wait(5)
+    snapshots.invalidate()
+    release.set()
+    reader.join(5)
+
+    assert result[0].body == b'1'
+    assert snapshots.get().body == b'2'
+
+
+# ===== CONDITIONAL GETS =====
+def test_list_routes_answer_304_for_the_current_etag(client_app):
+    for url in ['/jobs/all', '/clients', '/tracker/data?client=SKY', '/tracker/summary?client=SKY']:
+        response = client_app.get(url)
+        etag = response.headers['ETag']
+        assert response.status_code == 200 and etag
+
+        again = client_app.get(url, headers={'If-None-Match': etag})
+        assert again.status_code == 304, url
+        assert again.data == b''
+        assert again.headers['ETag'] == etag
+
+
+def test_a_write_moves_the_etag(client_app):
+    etag = client_app.get('/tracker/data?client=SKY').headers['ETag']
+    other = client_app.get('/tracker/data?client=HUN').headers['ETag']
+    app.mirror.tracker.upsert([tracker_row(99, 'SKY', 5000, 'March')])
+
+    response = client_app.get('/tracker/data?client=SKY', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert 'recT099' in [row['id'] for row in response.get_json()]
+    assert client_app.get('/tracker/data?client=HUN', headers={'If-None-Match': other}).status_code == 304
+
+
+def test_unknown_clients_get_no_snapshot(client_app):
+    assert client_app.get('/tracker/data?client=NOPE').get_json() == []
+    assert client_app.get('/tracker/budget?client=NOPE').status_code == 404
+    assert 'NOPE' not in app.tracker_snapshots._snapshots
+    assert 'NOPE' not in app.summary_snapshots._snapshots
@@ -0,0 +1,89 @@
+"""
+Event stream: fan-out by client code, the listener cap, and /events pushing
+mirror changes
+"""
+
+import json
+
+import pytest
+
+import app
+import events
+from conftest import SEED, project
+
+
+def parse(message):
+    """(event, data) from one SSE message"""
+    lines = dict(line.split(': ', 1) for line in message.strip().split('\n'))
+    return lines['event'], json.loads(lines['data'])
+
+
+@pytest.fixture
+def no_background_sync(monkeypatch):
+    # /events starts it; tests serve the seed mirrors as they are
+    monkeypatch.setattr(app.mirror, 'start_background_sync', lambda: None)
+
+
+# ===== BUS =====
+def test_events_reach_listeners_for_their_clients():
+    bus = events.EventBus()
+    sky, everyone = bus.subscribe(['SKY']), bus.subscribe()
+    bus.publish('job', {'jobNumber': 'SKY 001'}, 'SKY')
+    bus.publish('job', {'jobNumber': 'HUN 001'}, 'HUN')
+
+    assert [parse(sky.queue.get_nowait())[1]['jobNumber'] for _ in range(sky.queue.qsize())] == ['SKY 001']
+    assert everyone.queue.qsize() == 2
+
+
+def test_listeners_are_capped():
+    bus = events.EventBus(max_listeners=2)
+    first, second = bus.subscribe(), bus.subscribe()
+    assert bus.subscribe() is None
+    bus.unsubscribe(first)
+    assert bus.subscribe() is not None
+    assert bus.listener_count == 2
+
+
+def test_stream_sends_hello_heartbeats_and_resync_on_overflow(monkeypatch):
+    monkeypatch.setattr(events, 'HEARTBEAT_SECONDS', 0.01)
+    monkeypatch.setattr(events, 'SUBSCRIBER_QUEUE_SIZE', 2)
+    bus = events.EventBus()
+    subscription = bus.subscribe()
+    stream = events.stream(bus, subscription, hello={'jobsVersion': 'x.1'})
+
+    assert parse(next(stream)) == ('hello', {'jobsVersion': 'x.1'})
+    assert next(stream) == ': keep-alive\n\n'
+
+    for n in range(3):
+        bus.publish('job', {'n': n})
+    assert [parse(next(stream))[1] for _ in range(2)] == [{'n': 0}, {'n': 1}]
+    assert parse(next(stream))[0] == 'resync'
+    with pytest.raises(StopIteration):
+        next(stream)
+    assert bus.listener_count == 0
+
+
+# ===== /events =====
+def test_events_route_pushes_job_changes(client_app, no_background_sync):
+    response = client_app.get('/events?client=HUN', buffered=False)
+    assert response.mimetype == 'text/event-stream'
+    stream = iter(response.response)
+    event, hello = parse(next(stream).decode())
+    assert event == 'hello' and hello['jobsVersion'] == app.mirror.projects.cursor
+
+    # A SKY job renamed (not for us), then moved to HUN
+    record = SEED['Projects'][0]
+    app.mirror.projects.upsert([dict(record, fields=dict(record['fields'], **{'Project Name': 'Renamed'}))])
+    moved = project(1, 'HUN')
+    app.mirror.projects.upsert([moved])
+    event, job = parse(next(stream).decode())
+    assert event == 'job' and job['jobNumber'] == 'HUN 001' and job['clientCode'] == 'HUN'
+    response.close()
+    assert events.bus.listener_count == 0
+
+
+def test_events_route_refuses_past_the_cap(client_app, no_background_sync, monkeypatch):
+    monkeypatch.setattr(events.bus, 'max_listeners', 0)
+    response = client_app.get('/events')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == str(events.RETRY_AFTER_SECONDS)
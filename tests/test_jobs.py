@@ -0,0 +1,111 @@
+"""
+Job query routes over the Projects indexes, checked against filtering the
+seed jobs by hand, and job history pages from the Updates table
+"""
+
+import pytest
+
+import app
+import cache
+from conftest import SEED
+
+ACTIVE = set(app.ACTIVE_STATUSES)
+
+
+def seed_jobs(**wanted):
+    """Job numbers of the seed projects whose fields match wanted"""
+    return sorted(record['fields']['Job Number'] for record in SEED['Projects']
+                  if all(record['fields'].get(field) in values for field, values in wanted.items()))
+
+
+def numbers(jobs):
+    return [job['jobNumber'] for job in jobs]
+
+
+def test_all_jobs_are_the_active_ones_by_status(client_app):
+    jobs = client_app.get('/jobs/all').get_json()
+    assert sorted(numbers(jobs)) == seed_jobs(Status=ACTIVE)
+    # Read from the status index: grouped by status, in ACTIVE_STATUSES order
+    statuses = [job['status'] for job in jobs]
+    assert statuses == sorted(statuses, key=app.ACTIVE_STATUSES.index)
+
+
+def test_all_jobs_follow_status_changes(client_app):
+    record = dict(SEED['Projects'][0], fields=dict(SEED['Projects'][0]['fields'], Status='Completed'))
+    app.mirror.projects.upsert([record])
+    assert record['fields']['Job Number'] not in numbers(client_app.get('/jobs/all').get_json())
+
+
+def test_query_filters_match_a_scan(client_app):
+    def query(**args):
+        return sorted(numbers(client_app.get('/jobs/query', query_string=args).get_json()))
+
+    assert query() == seed_jobs(Status=ACTIVE)
+    assert query(client='SKY') == [n for n in seed_jobs(Status=ACTIVE) if n.startswith('SKY')]
+    assert query(status='Completed') == seed_jobs(Status={'Completed'})
+    assert query(status='all', stage='Craft') == seed_jobs(Stage={'Craft'})
+    assert query(withClient='true') == seed_jobs(Status=ACTIVE, **{'With Client?': {True}})
+    assert query(client='HUN', status='all', withClient='false') == [
+        n for n in seed_jobs(**{'With Client?': {False}}) if n.startswith('HUN')]
+
+
+def test_client_jobs_include_completed(client_app):
+    jobs = client_app.get('/jobs/client/ONE').get_json()
+    assert sorted(numbers(jobs)) == [n for n in seed_jobs() if n.startswith('ONE')]
+
+
+# ===== HISTORY =====
+class Response:
+    def __init__(self, status_code, data):
+        self.status_code = status_code
+        self.data = data
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f'{self.status_code} from Airtable')
+
+    def json(self):
+        return self.data
+
+
+def updates_api(monkeypatch, *responses):
+    """Answer Airtable calls with responses in turn, recording their params"""
+    calls = []
+
+    def fake(method, url, **kwargs):
+        calls.append(kwargs.get('params'))
+        return responses[len(calls) - 1]
+
+    monkeypatch.setattr(cache, 'airtable_request', fake)
+    return calls
+
+
+def test_history_pages_through_updates(client_app, monkeypatch):
+    calls = updates_api(monkeypatch, Response(200, {
+        'records': [{'id': 'recU1', 'createdTime': '2026-03-04T00:00:00.000Z', 'fields': {'Update': 'Sent'}}],
+        'offset': 'itr1/recU1'}))
+    page = client_app.get('/job/SKY 001/history?limit=1').get_json()
+
+    assert page['updates'] == [{'id': 'recU1', 'update': 'Sent', 'updateDue': None, 'created': '2026-03-04T00:00:00.000Z'}]
+    assert page['nextCursor'] == 'itr1/recU1'
+    assert calls[0]['pageSize'] == 1 and calls[0]['sort[0][field]'] == app.UPDATES_SORT_FIELD
+
+
+@pytest.mark.parametrize('limit', ['x', '0', '-3', str(app.HISTORY_MAX_PAGE_SIZE + 1)])
+def test_history_rejects_a_bad_limit(client_app, monkeypatch, limit):
+    calls = updates_api(monkeypatch)
+    assert client_app.get(f'/job/SKY 001/history?limit={limit}').status_code == 400
+    assert calls == []
+
+
+def test_history_tells_an_expired_cursor_from_a_bad_sort_field(client_app, monkeypatch):
+    updates_api(monkeypatch, Response(422, {'error': {'type': 'LIST_RECORDS_ITERATOR_NOT_AVAILABLE'}}))
+    response = client_app.get('/job/SKY 001/history?cursor=itr1/recU1')
+    assert response.status_code == 400 and 'expired' in response.get_json()['error']
+
+    unknown_field = Response(422, {'error': {'type': 'UNKNOWN_FIELD_NAME', 'message': 'Unknown field name: "Created"'}})
+    for url in ['/job/SKY 001/history', '/job/SKY 001/history?cursor=itr1/recU1']:
+        updates_api(monkeypatch, unknown_field)
+        response = client_app.get(url)
+        assert response.status_code == 500
+        assert 'Unknown field name' in response.get_json()['error']
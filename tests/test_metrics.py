@@ -0,0 +1,125 @@
+"""
+Metrics: counters and histograms in Prometheus text format, totals added up
+across workers, and per-request accounting on real routes
+"""
+
+import json
+import os
+
+import pytest
+
+import metrics
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """An empty registry, so metrics made here don't reach /metrics"""
+    monkeypatch.setattr(metrics, '_registry', [])
+    monkeypatch.setattr(metrics, '_values', {})
+    monkeypatch.setattr(metrics, 'METRICS_DIR', '')
+
+
+def sample(text, line_start):
+    """Value of the one sample line starting with line_start"""
+    [value] = [line.rsplit(' ', 1)[1] for line in text.splitlines() if line.startswith(line_start + ' ')]
+    return value
+
+
+# ===== EXPOSITION =====
+def test_counters_render_by_label(registry):
+    calls = metrics.Counter('test_calls_total', 'Calls, by table', ('table',))
+    calls.inc(table='Projects')
+    calls.inc(2, table='Projects')
+    calls.inc(table='Say "hi"\n')
+    text = metrics.render()
+
+    assert '# HELP test_calls_total Calls, by table\n# TYPE test_calls_total counter\n' in text
+    assert sample(text, 'test_calls_total{table="Projects"}') == '3'
+    assert sample(text, 'test_calls_total{table="Say \\"hi\\"\\n"}') == '1'
+
+
+def test_histograms_render_cumulative_buckets(registry):
+    seconds = metrics.Histogram('test_seconds', 'Latency', buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 3):
+        seconds.observe(value)
+    text = metrics.render()
+
+    assert sample(text, 'test_seconds_bucket{le="0.1"}') == '2'
+    assert sample(text, 'test_seconds_bucket{le="1"}') == '3'
+    assert sample(text, 'test_seconds_bucket{le="+Inf"}') == '4'
+    assert sample(text, 'test_seconds_sum') == '3.65'
+    assert sample(text, 'test_seconds_count') == '4'
+
+
+def test_numbers_keep_full_precision():
+    assert metrics._number(1234567) == '1234567'
+    assert metrics._number(1234567.0) == '1234567'
+    assert metrics._number(0.1 + 0.2) == repr(0.1 + 0.2)
+    assert metrics._number(10 ** 17) == str(10 ** 17)
+
+
+def test_totals_add_up_across_workers(registry, monkeypatch, tmp_path):
+    calls = metrics.Counter('test_calls_total', 'Calls', ('table',))
+    seconds = metrics.Histogram('test_seconds', 'Latency', buckets=(1,))
+    calls.inc(table='Projects')
+    seconds.observe(0.5)
+    (tmp_path / '1.json').write_text(json.dumps([
+        ['test_calls_total', ['Projects'], 4], ['test_seconds', [], [2, 1.5, 2]]]))
+    (tmp_path / 'broken.json').write_text('{')
+    (tmp_path / f'{os.getpid()}.json').write_text(json.dumps([['test_calls_total', ['Projects'], 100]]))
+    monkeypatch.setattr(metrics, 'METRICS_DIR', str(tmp_path))
+
+    text = metrics.render()
+    # Our own file is stale: our counts come from memory
+    assert sample(text, 'test_calls_total{table="Projects"}') == '5'
+    assert sample(text, 'test_seconds_bucket{le="1"}') == '3'
+    assert sample(text, 'test_seconds_sum') == '2'
+    assert sample(text, 'test_seconds_count') == '3'
+
+
+# ===== AIRTABLE =====
+@pytest.mark.parametrize('url, target', [
+    ('https://api.airtable.com/v0/appX/Projects', ('Projects', True)),
+    ('https://api.airtable.com/v0/appX/Projects/recP001', ('Projects', False)),
+    ('https://api.airtable.com/v0/appX/Tracker%20Rows', ('Tracker Rows', True)),
+    ('https://api.airtable.com/v0/meta/bases/appX/tables', ('meta', False)),
+    ('https://api.airtable.com/v0/bases/appX/webhooks', ('webhooks', False)),
+])
+def test_airtable_calls_are_labelled_by_table(url, target):
+    assert metrics._airtable_target(url) == target
+
+
+def test_airtable_responses_count_pages_and_rate_limits(monkeypatch):
+    monkeypatch.setattr(metrics, '_values', {})
+    metrics.start_request()
+    metrics.airtable_response('get', 'https://api.airtable.com/v0/appX/Projects', 200, 0.2)
+    metrics.airtable_response('get', 'https://api.airtable.com/v0/appX/Projects', 429, 0.1)
+    metrics.airtable_response('patch', 'https://api.airtable.com/v0/appX/Projects/recP001', 200, 0.3)
+    stats = metrics.finish_request('/test', 'GET', 200)
+
+    assert metrics._values[('dot_airtable_requests_total', ('Projects', 'GET', '200'))] == 1
+    assert metrics._values[('dot_airtable_pages_total', ('Projects',))] == 2
+    assert metrics._values[('dot_airtable_rate_limited_total', ('Projects',))] == 1
+    assert stats['airtable_calls'] == 3 and stats['airtable_pages'] == 2
+    assert stats['airtable'] == pytest.approx(0.6)
+
+
+# ===== /metrics =====
+def test_requests_are_counted_by_route(client_app, monkeypatch):
+    monkeypatch.setattr(metrics, '_values', {})
+    response = client_app.get('/jobs/client/SKY')
+    assert 'total;dur=' in response.headers['Server-Timing']
+    client_app.get('/jobs/client/HUN')
+
+    text = client_app.get('/metrics').get_data(as_text=True)
+    route = 'route="/jobs/client/<client_code>"'
+    assert sample(text, f'dot_http_requests_total{{{route},method="GET",status="200"}}') == '2'
+    assert sample(text, f'dot_http_request_duration_seconds_count{{{route},method="GET"}}') == '2'
+
+
+def test_metrics_token_is_required_when_set(client_app, monkeypatch):
+    monkeypatch.setattr(metrics, 'METRICS_TOKEN', 'secret')
+    assert client_app.get('/metrics').status_code == 401
+    response = client_app.get('/metrics', headers={'Authorization': 'Bearer secret'})
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
@@ -0,0 +1,295 @@
+"""
+TableMirror indexes, change log and saved copy, checked against plain scans
+of the rows after random upserts and removes
+"""
+
+import random
+import time
+
+import mirror
+from transforms import record_fields
+
+
+def make_mirror(**kwargs):
+    table_mirror = mirror.TableMirror('Test', ['Group', 'Score'], record_fields, ttl=float('inf'), **kwargs)
+    # Loaded as far as reads go - they never sync
+    table_mirror.synced_at = time.monotonic()
+    table_mirror.add_index('group', lambda row: row.get('Group'))
+    table_mirror.add_sorted_index('score', lambda row: row.get('Score'))
+    return table_mirror
+
+
+def record(record_id, group, score):
+    return {'id': record_id, 'fields': {'Group': group, 'Score': score}}
+
+
+def random_step(table_mirror, rng):
+    """Upsert a few new or changed records, or remove a few"""
+    ids = [row['id'] for row in table_mirror.rows()]
+    if ids and rng.random() < 0.3:
+        table_mirror.remove(rng.sample(ids, min(len(ids), rng.randint(1, 3))))
+    else:
+        table_mirror.upsert([
+            record(f'rec{rng.randint(0, 80):03d}', rng.choice('ABCD'), rng.choice([None] + list(range(20))))
+            for _ in range(rng.randint(1, 5))
+        ])
+
+
+def ids(rows):
+    return [row['id'] for row in rows]
+
+
+def scan_range(rows, low, high):
+    """between() by linear scan: in (score, record id) order, None scores left out"""
+    matches = [row for row in rows if row['Score'] is not None
+               and (low is None or row['Score'] >= low) and (high is None or row['Score'] <= high)]
+    return sorted(matches, key=lambda row: (row['Score'], row['id']))
+
+
+# ===== INDEXES =====
+def test_indexes_match_linear_scan():
+    rng = random.Random(7)
+    table_mirror = make_mirror()
+    for _ in range(400):
+        random_step(table_mirror, rng)
+        rows = table_mirror.rows()
+
+        group = rng.choice('ABCDE')
+        assert sorted(ids(table_mirror.lookup('group', group))) == sorted(
+            row['id'] for row in rows if row['Group'] == group)
+        assert table_mirror.has('group', group) == any(row['Group'] == group for row in rows)
+        assert sorted(table_mirror.keys('group')) == sorted({row['Group'] for row in rows})
+
+        low = rng.choice([None, rng.randint(0, 19)])
+        high = rng.choice([None, rng.randint(0, 19)])
+        assert ids(table_mirror.between('score', low, high)) == ids(scan_range(rows, low, high))
+
+        expected = [row for row in scan_range(rows, low, high) if row['Group'] == group]
+        assert ids(table_mirror.query(equals=[('group', group)], ranges=[('score', low, high)])) == ids(expected)
+
+
+def test_index_added_late_covers_existing_rows():
+    table_mirror = mirror.TableMirror('Test', ['Group', 'Score'], record_fields, ttl=float('inf'))
+    table_mirror.synced_at = time.monotonic()
+    table_mirror.upsert([record('rec1', 'A', 3), record('rec2', 'B', None), record('rec3', 'A', 1)])
+    table_mirror.add_index('group', lambda row: row.get('Group'))
+    table_mirror.add_sorted_index('score', lambda row: row.get('Score'))
+
+    assert sorted(ids(table_mirror.lookup('group', 'A'))) == ['rec1', 'rec3']
+    assert ids(table_mirror.between('score')) == ['rec3', 'rec1']
+
+
+# ===== CHANGE LOG =====
+def test_changes_since_returns_latest_changes_and_removals():
+    table_mirror = make_mirror()
+    table_mirror.upsert([record('rec1', 'A', 1), record('rec2', 'B', 2)])
+    cursor = table_mirror.cursor
+
+    table_mirror.upsert([record('rec1', 'A', 5)])
+    table_mirror.upsert([record('rec1', 'C', 6), record('rec3', 'A', 7)])
+    table_mirror.remove(['rec2'])
+
+    changed, removed, next_cursor = table_mirror.changes_since(cursor)
+    assert [(record_id, row['Score']) for record_id, row in changed] == [('rec1', 6), ('rec3', 7)]
+    assert [(record_id, row['Group']) for record_id, row in removed] == [('rec2', 'B')]
+    assert next_cursor == table_mirror.cursor
+    assert table_mirror.changes_since(next_cursor) == ([], [], next_cursor)
+
+
+def test_unchanged_upsert_is_not_a_change():
+    table_mirror = make_mirror()
+    table_mirror.upsert([record('rec1', 'A', 1)])
+    cursor = table_mirror.cursor
+    table_mirror.upsert([record('rec1', 'A', 1)])
+    assert table_mirror.cursor == cursor
+
+
+def test_changes_since_rejects_cursors_it_cannot_answer():
+    table_mirror = make_mirror(log_size=3)
+    other = make_mirror()
+    table_mirror.upsert([record('rec1', 'A', 1)])
+    old = table_mirror.cursor
+    for score in range(2, 6):
+        table_mirror.upsert([record('rec1', 'A', score)])
+
+    epoch, version = table_mirror.cursor.split('.')
+    assert table_mirror.changes_since(old) is None                       # older than the log
+    assert table_mirror.changes_since(f'{other.epoch}.{version}') is None  # another instance
+    assert table_mirror.changes_since(f'{epoch}.{int(version) + 1}') is None
+    assert table_mirror.changes_since('garbage') is None
+    assert table_mirror.changes_since(None) is None
+
+
+def test_change_listeners_get_previous_rows():
+    table_mirror = make_mirror()
+    calls = []
+    table_mirror.on_change(lambda changed, removed, previous: calls.append((changed, removed, previous)))
+
+    table_mirror.upsert([record('rec1', 'A', 1)])
+    table_mirror.upsert([record('rec1', 'B', 1)])
+    table_mirror.remove(['rec1'])
+
+    assert calls[0][2] == {}
+    assert calls[1][2]['rec1']['Group'] == 'A'
+    assert [row['Group'] for _, row in calls[2][1]] == ['B']
+
+
+# ===== SAVED COPY =====
+def test_incremental_saves_restore_the_same_rows(tmp_path):
+    path = str(tmp_path / 'mirrors.sqlite3')
+    rng = random.Random(11)
+    table_mirror = make_mirror()
+    for _ in range(30):
+        for _ in range(5):
+            random_step(table_mirror, rng)
+        mirror.save(table_mirror, path)
+
+    restored = mirror.TableMirror('Test', ['Group', 'Score'], record_fields, ttl=float('inf'))
+    restored.add_sorted_index('score', lambda row: row.get('Score'))
+    assert mirror.load(restored, path)
+    assert sorted(restored.rows(), key=lambda row: row['id']) == sorted(table_mirror.rows(), key=lambda row: row['id'])
+    assert ids(restored.between('score')) == ids(table_mirror.between('score'))
+    # Cursors don't survive a restart
+    assert restored.epoch != table_mirror.epoch
+    assert restored.changes_since(table_mirror.cursor) is None
+
+
+def test_state_round_trips(tmp_path):
+    path = str(tmp_path / 'mirrors.sqlite3')
+    assert mirror.load_state('webhook-cursor:x', path) is None
+    mirror.save_state('webhook-cursor:x', 42, path)
+    mirror.save_state('webhook-cursor:x', 43, path)
+    assert mirror.load_state('webhook-cursor:x', path) == 43
+    assert mirror.load_state('webhook-cursor:x', '') is None
+
+
+# ===== FOLLOWERS =====
+def as_worker(monkeypatch, pid):
+    """Saves and pulls from here on act as worker pid (the feed skips a worker's own saves)"""
+    monkeypatch.setattr(mirror.os, 'getpid', lambda: pid)
+
+
+def restored(path):
+    table_mirror = mirror.TableMirror('Test', ['Group', 'Score'], record_fields, ttl=float('inf'))
+    assert mirror.load(table_mirror, path)
+    return table_mirror
+
+
+def scores(table_mirror):
+    return {row['id']: row['Score'] for row in table_mirror.rows()}
+
+
+def test_follower_writes_reach_the_feed(tmp_path, monkeypatch):
+    path = str(tmp_path / 'mirrors.sqlite3')
+    monkeypatch.setattr(mirror, 'SNAPSHOT_PATH', path)
+    as_worker(monkeypatch, 1)
+    leader = make_mirror()
+    leader.upsert([record('rec1', 'A', 1), record('rec2', 'A', 1)])
+    mirror.save(leader)
+    follower = restored(path)
+
+    # A write on the follower (e.g. /job/<n>/update), saved as app.py does
+    as_worker(monkeypatch, 2)
+    follower.upsert([record('rec1', 'A', 2)])
+    mirror.save(follower)
+    assert not follower._dirty
+
+    as_worker(monkeypatch, 1)
+    leader.pull()
+    assert scores(leader) == {'rec1': 2, 'rec2': 1}
+
+    # ...and a later change by the leader still reaches the follower
+    leader.upsert([record('rec1', 'A', 3)])
+    leader.remove(['rec2'])
+    mirror.save(leader)
+    as_worker(monkeypatch, 2)
+    follower.pull()
+    assert scores(follower) == {'rec1': 3}
+
+
+def test_follower_write_that_failed_to_save_does_not_block_the_feed(tmp_path, monkeypatch):
+    path = str(tmp_path / 'mirrors.sqlite3')
+    monkeypatch.setattr(mirror, 'SNAPSHOT_PATH', path)
+    as_worker(monkeypatch, 1)
+    leader = make_mirror()
+    leader.upsert([record('rec1', 'A', 1), record('rec2', 'A', 1)])
+    mirror.save(leader)
+    follower = restored(path)
+
+    # Unsaved local writes, then a newer change to one of them from the leader
+    as_worker(monkeypatch, 2)
+    follower.upsert([record('rec1', 'A', 2), record('rec2', 'A', 2)])
+    as_worker(monkeypatch, 1)
+    leader.upsert([record('rec1', 'A', 3)])
+    mirror.save(leader)
+
+    as_worker(monkeypatch, 2)
+    follower.pull()
+    assert scores(follower) == {'rec1': 3, 'rec2': 2}
+    assert not follower._dirty
+
+    # The write the leader never overwrote was retried onto the feed
+    as_worker(monkeypatch, 1)
+    leader.pull()
+    assert scores(leader) == {'rec1': 3, 'rec2': 2}
+
+
+def test_feed_cursors_are_answered_by_any_worker(tmp_path, monkeypatch):
+    path = str(tmp_path / 'mirrors.sqlite3')
+    monkeypatch.setattr(mirror, 'SNAPSHOT_PATH', path)
+    as_worker(monkeypatch, 1)
+    leader = make_mirror()
+    leader.upsert([record('rec1', 'A', 1), record('rec2', 'A', 1)])
+    mirror.save(leader)
+    follower = restored(path)
+    start = leader.cursor
+    assert follower.cursor == start
+
+    leader.upsert([record('rec1', 'A', 5)])
+    leader.remove(['rec2'])
+    mirror.save(leader)
+    changed, removed, cursor = leader.changes_since(start)
+    assert ([record_id for record_id, _ in changed], [record_id for record_id, _ in removed]) == (['rec1'], ['rec2'])
+
+    # A follower that hasn't pulled yet has nothing newer to tell...
+    as_worker(monkeypatch, 2)
+    assert follower.changes_since(start) == ([], [], start)
+    assert follower.changes_since(cursor) == ([], [], cursor)
+    # ...and once it has, answers the leader's cursors like the leader does
+    follower.pull()
+    assert follower.changes_since(start) == (changed, removed, cursor)
+
+    # A follower's own write moves its cursor on; the leader catches up on pull
+    follower.upsert([record('rec3', 'B', 2)])
+    mirror.save(follower)
+    as_worker(monkeypatch, 1)
+    assert leader.changes_since(cursor) == ([], [], cursor)
+    leader.pull()
+    changed, removed, latest = leader.changes_since(cursor)
+    assert [record_id for record_id, _ in changed] == ['rec3'] and not removed
+    assert latest == leader.cursor == follower.cursor
+
+    assert leader.changes_since(f'other.{latest.split(".")[1]}') is None
+
+
+def test_feed_cursors_resync_when_the_feed_cannot_answer(tmp_path, monkeypatch):
+    path = str(tmp_path / 'mirrors.sqlite3')
+    monkeypatch.setattr(mirror, 'SNAPSHOT_PATH', path)
+    table_mirror = make_mirror()
+    before_first_save = table_mirror.cursor
+    table_mirror.upsert([record('rec1', 'A', 1)])
+    mirror.save(table_mirror)
+    # The first save replaced the whole table
+    assert table_mirror.changes_since(before_first_save) is None
+
+    start = table_mirror.cursor
+    monkeypatch.setattr(mirror, 'CHANGE_FEED_SIZE', 2)
+    for score in range(2, 6):
+        table_mirror.upsert([record('rec1', 'A', score)])
+        mirror.save(table_mirror)
+    # Pruned from the feed
+    assert table_mirror.changes_since(start) is None
+
+    # A new SQLite file is a new feed
+    monkeypatch.setattr(mirror, 'SNAPSHOT_PATH', str(tmp_path / 'other.sqlite3'))
+    assert table_mirror.changes_since(start) is None
@@ -0,0 +1,100 @@
+"""
+People directory: client groups, Client Link ids mapped to codes, and the
+n-gram search against a plain substring scan
+"""
+
+import random
+import string
+import time
+
+import pytest
+
+import ask_dot
+import mirror
+import people
+from conftest import SEED, client, person
+from transforms import CLIENT_FIELDS, PEOPLE_FIELDS, record_fields
+
+
+def make_directory(people_records=SEED['People'], client_records=SEED['Clients']):
+    mirrors = []
+    for table, fields, records in (('People', PEOPLE_FIELDS, people_records), ('Clients', CLIENT_FIELDS, client_records)):
+        table_mirror = mirror.TableMirror(table, fields, record_fields, ttl=float('inf'))
+        table_mirror.synced_at = time.monotonic()
+        table_mirror.upsert(records)
+        mirrors.append(table_mirror)
+    return people.Directory(*mirrors), mirrors[0], mirrors[1]
+
+
+def names(found):
+    return [p['name'] for p in found]
+
+
+# ===== GROUPS =====
+def test_client_links_map_to_codes():
+    directory, _, _ = make_directory()
+    jess = [p for p in directory.search() if p['name'] == 'Jess Brown'][0]
+    assert jess['clientCode'] == ['SKY', 'HUN']
+
+    # Plain codes pass through, and a bare string stays one
+    directory, _, _ = make_directory([person(9, 'Old Row', 'old@x.example', 'TOW'),
+                                      {'id': 'recH010', 'fields': {'Name': 'Older Row', 'Client Link': 'SKY'}}])
+    assert [p['clientCode'] for p in directory.search()] == [['TOW'], 'SKY']
+
+
+def test_one_nz_divisions_share_contacts():
+    directory, _, _ = make_directory()
+    for code in ['ONE', 'ONB', 'ONS']:
+        assert names(directory.search(code)) == ['Bo Tan', 'Sarah Lee']
+    assert names(directory.search('SKY')) == ['Aroha Smith', 'Jess Brown']
+    assert names(directory.search('HUN')) == ['Jess Brown', 'Mike Jones']
+    assert directory.search('NOPE') == []
+    assert len(directory.search()) == len(SEED['People'])
+
+
+# ===== SEARCH =====
+def test_search_matches_a_substring_scan():
+    rng = random.Random(7)
+    records = [person(n, ''.join(rng.choice('aeioubcdklmnrst ') for _ in range(rng.randint(4, 14))).strip() or 'x',
+                      f'{n}@{rng.choice(["sky", "hun", "one"])}.example', rng.choice(['recC1', 'recC2', 'recC3']))
+               for n in range(150)]
+    directory, _, _ = make_directory(records)
+    everyone = directory.search()
+
+    terms = ['a', 'E', 'st', 'ron', 'sky.ex', '@hun', 'aaaaa', ' '] + [
+        ''.join(rng.choice(string.ascii_lowercase[:8]) for _ in range(rng.randint(1, 6))) for _ in range(40)]
+    for term in terms:
+        expected = [p for p in everyone if term.strip().lower() in f"{p['name']} {p['email']}".lower()]
+        assert directory.search(term=term) == expected, term
+        assert directory.search('SKY', term) == [p for p in expected if 'SKY' in p['clientCode']], term
+
+
+def test_directory_rebuilds_after_a_change():
+    directory, people_mirror, clients_mirror = make_directory()
+    assert names(directory.search(term='tan')) == ['Bo Tan']
+
+    people_mirror.upsert([person(6, 'Tania Ngata', 'tania@sky.example', 'recC1')])
+    people_mirror.remove(['recH004'])
+    assert names(directory.search(term='tan')) == ['Tania Ngata']
+
+    # A client's code changing moves its people
+    clients_mirror.upsert([client('recC1', 'SKZ')])
+    assert names(directory.search('SKZ')) == ['Aroha Smith', 'Jess Brown', 'Tania Ngata']
+    assert directory.search('SKY') == []
+
+
+# ===== ROUTES =====
+def test_people_route_and_ask_dot_tool(client_app):
+    response = client_app.get('/people/ONB').get_json()
+    assert response == [{'name': 'Bo Tan', 'email': 'bo@onb.example', 'clientCode': ['ONB']},
+                        {'name': 'Sarah Lee', 'email': 'sarah@one.example', 'clientCode': ['ONE']}]
+
+    found = ask_dot.tool_search_people('SKY', 'JESS')
+    assert found['count'] == 1 and found['people'][0]['email'] == 'jess@sky.example'
+    assert ask_dot.tool_search_people(search_term='example')['count'] == len(SEED['People'])
+
+
+@pytest.mark.parametrize('term', ['', '   ', None])
+def test_blank_terms_match_everyone(term):
+    directory, _, _ = make_directory()
+    assert len(directory.search(term=term)) == len(SEED['People'])
@@ -0,0 +1,141 @@
+"""
+Response bodies: JSON encoding, negotiated compression, and keyset pages
+that serve every row exactly once while rows come and go between pages
+"""
+
+import gzip
+import json
+import random
+from datetime import date
+
+import pytest
+
+import app
+import responses
+from transforms import transform_projects
+
+
+# ===== JSON =====
+def test_json_matches_the_stdlib_shape():
+    provider = app.app.json
+    job = transform_projects([{'id': 'rec1', 'fields': {'Job Number': 'SKY 001', 'Update history': ['a']}}])[0]
+    payload = {'b': 1, 'a': [job], 'when': date(2026, 3, 4), 'name': 'Ngā mihi'}
+    body = provider.dumps_bytes(payload)
+
+    assert json.loads(body) == json.loads(json.dumps(
+        {'b': 1, 'a': [job.as_dict()], 'when': 'Wed, 04 Mar 2026 00:00:00 GMT', 'name': 'Ngā mihi'}))
+    # Sorted keys, as Flask's own provider writes them
+    assert body.index(b'"a"') < body.index(b'"b"') < body.index(b'"name"')
+    assert provider.loads(body) == json.loads(body)
+
+
+# ===== COMPRESSION =====
+def test_small_bodies_are_not_compressed():
+    with app.app.test_request_context(headers={'Accept-Encoding': 'gzip'}):
+        assert responses.negotiate_encoding(app.request, responses.COMPRESS_MIN_BYTES - 1) is None
+        assert responses.negotiate_encoding(app.request, responses.COMPRESS_MIN_BYTES) == 'gzip'
+    with app.app.test_request_context(headers={'Accept-Encoding': 'identity'}):
+        assert responses.negotiate_encoding(app.request, 10 ** 6) is None
+
+
+def test_brotli_is_preferred_when_installed():
+    with app.app.test_request_context(headers={'Accept-Encoding': 'gzip, br'}):
+        expected = 'br' if responses.brotli is not None else 'gzip'
+        assert responses.negotiate_encoding(app.request, 10 ** 6) == expected
+
+
+def test_snapshots_are_compressed_once_per_version(client_app, monkeypatch):
+    monkeypatch.setattr(responses, 'COMPRESS_MIN_BYTES', 100)
+    plain = client_app.get('/jobs/all')
+    packed = client_app.get('/jobs/all', headers={'Accept-Encoding': 'gzip'})
+
+    assert packed.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in packed.headers['Vary']
+    assert gzip.decompress(packed.data) == plain.data
+    assert packed.headers['ETag'] == plain.headers['ETag'][:-1] + '-gzip"'
+
+    snapshot = app.active_jobs_snapshots.get()
+    assert snapshot._encoded['gzip'] is snapshot.encoded('gzip')
+    again = client_app.get('/jobs/all', headers={'Accept-Encoding': 'gzip', 'If-None-Match': packed.headers['ETag']})
+    assert again.status_code == 304
+
+
+def test_uncached_bodies_are_compressed_on_the_way_out(client_app, monkeypatch):
+    monkeypatch.setattr(responses, 'COMPRESS_MIN_BYTES', 100)
+    plain = client_app.get('/jobs/query?status=all')
+    packed = client_app.get('/jobs/query?status=all', headers={'Accept-Encoding': 'gzip'})
+    assert packed.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(packed.data)) == plain.get_json()
+
+    small = client_app.get('/jobs/query?client=NOPE', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in small.headers
+
+
+# ===== PAGES =====
+def key(row):
+    return row['jobNumber']
+
+
+def job(number):
+    return {'jobNumber': f'JOB {number:04d}'}
+
+
+def walk(rows, limit, between_pages=None):
+    """Follow next cursors to the end, returning the keys of every page"""
+    pages, cursor = [], None
+    while True:
+        page, cursor = responses.paginate(list(rows.values()), key, limit, cursor)
+        pages.append([key(row) for row in page])
+        if cursor is None:
+            return pages
+        # A cursor that doesn't move on would page forever
+        assert len(pages) <= 10000
+        if between_pages:
+            between_pages(rows)
+
+
+@pytest.mark.parametrize('limit', [1, 7, 100, responses.MAX_PAGE_SIZE])
+def test_pages_cover_every_key_once(limit):
+    rows = {key(row): row for row in (job(n) for n in random.Random(limit).sample(range(5000), 230))}
+    served = [k for page in walk(rows, limit) for k in page]
+    assert served == sorted(rows)
+    assert all(len(page) <= limit for page in walk(rows, limit))
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_pages_stay_consistent_while_rows_change(seed):
+    rng = random.Random(seed)
+    rows = {key(row): row for row in (job(n) for n in rng.sample(range(2000), 300))}
+    original = set(rows)
+    removed = set()
+
+    def churn(rows):
+        for number in rng.sample(range(2000), 5):
+            rows.setdefault(key(job(number)), job(number))
+        for gone in rng.sample(sorted(rows), 4):
+            del rows[gone]
+            removed.add(gone)
+
+    served = [k for page in walk(rows, 17, churn) for k in page]
+
+    # Cursors are keys, not positions: nothing is served twice or out of
+    # order, and nothing that stayed put throughout is skipped
+    assert served == sorted(set(served))
+    assert (original - removed) <= set(served)
+
+
+def test_cursor_round_trips():
+    for value in ['JOB 0001', 'Ünïcode / slash+plus', '']:
+        assert responses.decode_cursor(responses.encode_cursor(value)) == value
+
+
+@pytest.mark.parametrize('cursor', ['%%%', 'not base64!', '_w=='])
+def test_bad_cursors_are_rejected(cursor):
+    with pytest.raises(ValueError):
+        responses.paginate([job(1)], key, 10, cursor)
+
+
+@pytest.mark.parametrize('limit', [0, -1, responses.MAX_PAGE_SIZE + 1])
+def test_limit_out_of_range_is_rejected(limit):
+    with pytest.raises(ValueError):
+        responses.paginate([job(1)], key, limit)
@@ -0,0 +1,119 @@
+"""
+Tracker rollups: the column store's totals against summing the rows by hand,
+and patched columns against a fresh build
+"""
+
+import random
+import time
+from collections import defaultdict
+
+import pytest
+
+import mirror
+import rollups
+from conftest import SEED, tracker_row
+from transforms import TRACKER_FIELDS, transform_tracker_rows
+
+TYPES = ['Project budget', 'Retainer', 'Extra']
+MONTHS = ['January', 'February', 'April', 'July', 'Dec 2026', '']
+
+
+def make_columns():
+    tracker = mirror.TableMirror('Tracker', TRACKER_FIELDS, transform_tracker_rows, ttl=float('inf'))
+    tracker.synced_at = time.monotonic()
+    return rollups.TrackerColumns(tracker), tracker
+
+
+def scan(rows, client_code):
+    """The summary's totals by summing every row of the client"""
+    totals = defaultdict(lambda: [0.0, 0.0, 0])
+    for row in rows:
+        if row['client'] != client_code or not row['spend']:
+            continue
+        for key in ('total', ('month', row['month']), ('quarter', rollups.quarter_for(row['month'])),
+                    ('job', row['jobNumber']), ('type', row['spendType'])):
+            totals[key][0 if row['ballpark'] else 1] += row['spend']
+            totals[key][2] += 1
+    return dict(totals)
+
+
+def totals_of(summary):
+    """The summary's entries keyed as scan() keys them"""
+    def split(entry):
+        assert entry['spend'] == entry['ballpark'] + entry['confirmed']
+        return [entry['ballpark'], entry['confirmed'], entry['rows']]
+
+    totals = {('month', e['month']): split(e) for e in summary['months']}
+    totals.update({('quarter', e['quarter']): split(e) for e in summary['quarters']})
+    totals.update({('job', e['jobNumber']): split(e) for e in summary['jobs']})
+    totals.update({('type', e['spendType']): split(e) for e in summary['spendTypes']})
+    if summary['total']['rows']:
+        totals['total'] = split(summary['total'])
+    return totals
+
+
+def random_row(rng, n):
+    return tracker_row(n, rng.choice(['SKY', 'HUN', 'ONE']), rng.choice([0, 250, 1000, 3300]), rng.choice(MONTHS),
+                       **{'Spend type': rng.choice(TYPES), 'Ballpark': rng.random() < 0.3})
+
+
+# ===== SUMMARIES =====
+def test_quarters_follow_months():
+    assert rollups.quarter_for('January') == 'JAN-MAR'
+    assert rollups.quarter_for('Jun 2026') == 'APR-JUN'
+    assert rollups.quarter_for('december') == 'OCT-DEC'
+    assert rollups.quarter_for('') is None
+
+
+def test_summary_matches_a_scan_of_the_rows():
+    columns, tracker = make_columns()
+    rng = random.Random(4)
+    tracker.upsert([random_row(rng, n) for n in range(200)])
+
+    for code in ['SKY', 'HUN', 'ONE', 'NOPE']:
+        summary = columns.summarize(code)
+        assert summary['client'] == code
+        assert totals_of(summary) == scan(tracker.rows(), code)
+
+
+def test_summary_orders(client_app):
+    summary = rollups.tracker.summarize('SKY')
+    assert [e['month'] for e in summary['months']] == ['January', 'February', 'May']
+    assert [e['quarter'] for e in summary['quarters']] == ['JAN-MAR', 'APR-JUN']
+    spends = [e['spend'] for e in summary['jobs']]
+    assert spends == sorted(spends, reverse=True)
+    assert summary['jobs'][0]['projectName'].startswith('SKY campaign')
+
+
+# ===== PATCHING =====
+@pytest.mark.parametrize('seed', range(3))
+def test_patched_columns_match_a_fresh_build(seed):
+    columns, tracker = make_columns()
+    rng = random.Random(seed)
+    tracker.upsert([random_row(rng, n) for n in range(60)])
+    columns.ensure_built()
+
+    for _ in range(20):
+        tracker.upsert([random_row(rng, rng.randrange(80)) for _ in range(5)])
+        tracker.remove([f'recT{rng.randrange(80):03d}' for _ in range(3)])
+
+    fresh = rollups.TrackerColumns(tracker)
+    for code in ['SKY', 'HUN', 'ONE']:
+        assert columns.summarize(code) == fresh.summarize(code)
+        assert totals_of(columns.summarize(code)) == scan(tracker.rows(), code)
+    # Removed slots are reused rather than left to pile up
+    assert len(columns.spend) <= 80
+
+
+# ===== /tracker/summary =====
+def test_summary_route(client_app):
+    summary = client_app.get('/tracker/summary?client=SKY').get_json()
+    assert totals_of(summary) == scan(transform_tracker_rows(SEED['Tracker']), 'SKY')
+
+    mirror.tracker.upsert([tracker_row(99, 'SKY', 700, 'March', Ballpark=True)])
+    summary = client_app.get('/tracker/summary?client=SKY').get_json()
+    assert summary['total']['ballpark'] == 700 + sum(
+        row['spend'] for row in transform_tracker_rows(SEED['Tracker']) if row['client'] == 'SKY' and row['ballpark'])
+
+    assert client_app.get('/tracker/summary?client=NOPE').get_json()['total']['rows'] == 0
+    assert client_app.get('/tracker/summary').status_code == 400
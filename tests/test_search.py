@@ -0,0 +1,113 @@
+"""
+Job search: matches against scanning every job's tokens, ranking, and the
+patched index against a fresh build
+"""
+
+import random
+import time
+
+import pytest
+
+import mirror
+import responses
+import search
+from conftest import project
+from transforms import PROJECT_FIELDS, transform_projects
+
+WORDS = ['brand', 'branding', 'brief', 'launch', 'lunch', 'social', 'summer', 'sale', 'ooh', 'digital', 'dig']
+
+
+def make_index():
+    projects = mirror.TableMirror('Projects', PROJECT_FIELDS, transform_projects, ttl=float('inf'))
+    projects.synced_at = time.monotonic()
+    return search.JobIndex(projects), projects
+
+
+def random_project(rng, n):
+    def words(count):
+        return ' '.join(rng.choice(WORDS) for _ in range(count))
+    return project(n, rng.choice(['SKY', 'HUN', 'ONE']), **{
+        'Project Name': words(2), 'Description': words(4), 'Update Summary': words(3),
+        'Update history': f'{words(3)}\n{words(3)}', 'Project Owner': rng.choice(['Sarah', 'Mike', 'Aroha'])})
+
+
+def scan(projects, query):
+    """Job numbers containing every query token, the last also as a prefix"""
+    *whole, last = search.tokenize(query)
+    found = set()
+    for job in projects.rows():
+        tokens = set(search.job_tokens(job))
+        if all(token in tokens for token in whole) and any(token.startswith(last) for token in tokens):
+            found.add(job['jobNumber'])
+    return found
+
+
+def numbers(results):
+    return [job['jobNumber'] for _, job in results]
+
+
+# ===== MATCHING =====
+def test_tokens_are_lowercase_words():
+    assert search.tokenize('SKY 001: Summer-Sale, 2026!') == ['sky', '001', 'summer', 'sale', '2026']
+    assert search.tokenize(None) == []
+
+
+def test_every_token_must_match_and_the_last_may_be_a_prefix():
+    index, projects = make_index()
+    rng = random.Random(3)
+    projects.upsert([random_project(rng, n) for n in range(120)])
+
+    for query in ['brand', 'bran', 'dig', 'brief lau', 'summer sale', 'social l', 'sky 00', 'sarah brand', 'zzz',
+                  'lunch brief ooh']:
+        assert set(numbers(index.search(query))) == scan(projects, query), query
+    assert index.search('  ... ') == []
+
+
+def test_results_are_ranked_by_where_the_token_is():
+    index, projects = make_index()
+    projects.upsert([
+        project(1, 'SKY', **{'Project Name': 'Quarterly report', 'Description': 'launch plan'}),
+        project(2, 'SKY', **{'Project Name': 'Launch film', 'Description': 'hero edit'}),
+        project(3, 'SKY', **{'Project Name': 'Launchpad site', 'Description': 'web build'}),
+    ])
+    # Name beats description; the whole word beats a prefix
+    assert numbers(index.search('launch')) == ['SKY 002', 'SKY 003', 'SKY 001']
+    assert numbers(index.search('launch', limit=1)) == ['SKY 002']
+    assert numbers(index.search('launch', where=lambda job: job['jobNumber'] != 'SKY 002')) == ['SKY 003', 'SKY 001']
+
+
+# ===== PATCHING =====
+@pytest.mark.parametrize('seed', range(3))
+def test_patched_index_matches_a_fresh_build(seed):
+    index, projects = make_index()
+    rng = random.Random(seed)
+    projects.upsert([random_project(rng, n) for n in range(50)])
+    index.ensure_built()
+
+    for _ in range(15):
+        projects.upsert([random_project(rng, rng.randrange(70)) for _ in range(4)])
+        projects.remove([f'recP{rng.randrange(70):03d}' for _ in range(3)])
+
+    fresh = search.JobIndex(projects)
+    for query in ['brand', 'b', 'dig', 'summer s', 'mike lunch', 'hun']:
+        patched, built = index.search(query), fresh.search(query)
+        assert numbers(patched) == numbers(built), query
+        assert [score for score, _ in patched] == pytest.approx([score for score, _ in built])
+    assert index._vocabulary == sorted(index._postings)
+
+
+# ===== /jobs/search =====
+def test_search_route(client_app):
+    results = client_app.get('/jobs/search?q=hun campaign').get_json()
+    assert results and all(job['clientCode'] == 'HUN' for job in results)
+    scores = [job['score'] for job in results]
+    assert scores == sorted(scores, reverse=True)
+
+    narrowed = client_app.get('/jobs/search?q=campaign&client=ONE&limit=2').get_json()
+    assert [job['clientCode'] for job in narrowed] == ['ONE', 'ONE']
+
+
+@pytest.mark.parametrize('args', ['', 'q=campaign&limit=x', 'q=campaign&limit=0',
+                                  f'q=campaign&limit={responses.MAX_PAGE_SIZE + 1}'])
+def test_search_route_rejects_bad_arguments(client_app, args):
+    assert client_app.get(f'/jobs/search?{args}').status_code == 400
@@ -0,0 +1,92 @@
+"""
+Record transforms: Job reads and serializes like the dict it replaced
+"""
+
+import sys
+from datetime import date
+
+import pytest
+
+from transforms import Job, parse_friendly_date, parse_status_changed, transform_projects, transform_tracker_rows
+
+
+def project(**fields):
+    return {'id': 'rec1', 'fields': dict({
+        'Job Number': 'SKY 017', 'Project Name': 'Launch', 'Client': 'Sky',
+        'Update Summary': 'Kicked off | Brief in', 'Update due friendly': 'TBC',
+        'Last update made': '3/4/2026', 'Status': 'In Progress', 'With Client?': True,
+    }, **fields)}
+
+
+# ===== JOB =====
+def test_job_serializes_to_the_frontend_shape():
+    job = transform_projects([project()])[0]
+    assert job.as_dict() == {
+        'jobNumber': 'SKY 017', 'jobName': 'Launch', 'clientCode': 'SKY', 'client': 'Sky',
+        'description': '', 'projectOwner': '', 'update': 'Brief in', 'updateHistory': [],
+        'updateDue': None, 'liveDate': None, 'lastUpdated': '2026-04-03', 'stage': 'Triage',
+        'status': 'In Progress', 'withClient': True, 'channelUrl': '', 'teamsChannelId': '',
+    }
+    assert list(job.as_dict()) == list(Job.KEYS)
+
+
+def test_job_reads_like_a_dict():
+    job = transform_projects([project()])[0]
+    assert job['status'] == job.get('status') == 'In Progress'
+    assert job.get('nope', 'default') == 'default'
+    assert 'jobName' in job and 'nope' not in job
+    assert dict(job) == job.as_dict()
+    with pytest.raises(KeyError):
+        job['nope']
+    assert not hasattr(job, '__dict__')
+
+
+def test_job_equality_and_interning():
+    first, second = transform_projects([project(), project()])
+    assert first == second
+    assert first != transform_projects([project(Status='On Hold')])[0]
+    assert first.status is second.status
+    assert first.clientCode is sys.intern('SKY')
+
+
+def test_update_history_is_split_when_read():
+    text, listed = transform_projects([
+        project(**{'Update history': 'one\n\n two \nthree'}),
+        project(**{'Update history': ['a', 'b']}),
+    ])
+    assert text._history == 'one\n\n two \nthree'
+    assert text['updateHistory'] == ['one', 'two', 'three']
+    assert listed['updateHistory'] == ['a', 'b']
+
+
+def test_history_limit_trims_list_history_only():
+    text, listed = transform_projects([
+        project(**{'Update history': '\n'.join('0123456')}),
+        project(**{'Update history': list('0123456')}),
+    ], history_limit=5)
+    assert text['updateHistory'] == list('0123456')
+    assert listed['updateHistory'] == list('01234')
+
+
+# ===== FIELDS =====
+def test_friendly_dates_pick_the_nearest_year():
+    today = date(2026, 11, 20)
+    assert parse_friendly_date('Mon 14 Dec', today) == '2026-12-14'
+    assert parse_friendly_date('3 Feb', today) == '2027-02-03'
+    assert parse_friendly_date('TBC', today) is None
+    assert parse_friendly_date('31 Feb', today) is None
+
+
+def test_status_changed_dates():
+    assert parse_status_changed('2026-04-03T10:00:00.000Z') == '2026-04-03'
+    assert parse_status_changed('3/4/2026') == '2026-04-03'
+    assert parse_status_changed('') is None
+
+
+def test_tracker_rows_take_first_lookup_values():
+    row = transform_tracker_rows([{'id': 'rec9', 'fields': {
+        'Client Code': ['SKY'], 'Job Number': ['SKY 017'], 'Spend': '$1,250.50', 'Ballpark': 1,
+    }}])[0]
+    assert row['client'] == 'SKY' and row['jobNumber'] == 'SKY 017'
+    assert row['spend'] == 1250.5 and row['ballpark'] is True
+    assert row['spendType'] == 'Project budget'
@@ -0,0 +1,102 @@
+"""
+Webhook payload cursors and change folding, against a stand-in for the
+Airtable webhooks API
+"""
+
+import pytest
+
+import cache
+import mirror
+import webhooks
+
+
+class Response:
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+class FakeWebhooksAPI:
+    """List-webhooks and list-payloads endpoints for one webhook, 3 payloads a page"""
+
+    def __init__(self, payloads, webhook_id='ach1'):
+        self.payloads = payloads        # payload n is payloads[n - 1]
+        self.webhook_id = webhook_id
+        self.requests = []
+
+    def __call__(self, method, url, **kwargs):
+        params = kwargs.get('params') or {}
+        self.requests.append((url.rsplit('/', 1)[-1], params.get('cursor')))
+        if url.endswith('/webhooks'):
+            return Response({'webhooks': [{'id': self.webhook_id,
+                                           'cursorForNextPayload': len(self.payloads) + 1}]})
+        cursor = params.get('cursor', 1)
+        page = self.payloads[cursor - 1:cursor + 2]
+        return Response({'payloads': page, 'cursor': cursor + len(page),
+                         'mightHaveMore': cursor + len(page) <= len(self.payloads)})
+
+
+def payload(table_id, created=(), changed=(), destroyed=()):
+    return {'changedTablesById': {table_id: {
+        'createdRecordsById': {record_id: {} for record_id in created},
+        'changedRecordsById': {record_id: {} for record_id in changed},
+        'destroyedRecordIds': list(destroyed),
+    }}}
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    monkeypatch.setattr(mirror, 'SNAPSHOT_PATH', str(tmp_path / 'mirrors.sqlite3'))
+    monkeypatch.setattr(webhooks, '_cursors', {})
+    monkeypatch.setattr(webhooks, 'BACKFILL_PAYLOADS', 4)
+    fake = FakeWebhooksAPI([payload('tbl1', changed=[f'rec{n}']) for n in range(1, 11)])
+    monkeypatch.setattr(cache, 'airtable_request', fake)
+    return fake
+
+
+def test_first_read_backfills_from_the_webhook_cursor(api):
+    payloads = webhooks.fetch_payloads('app1', 'ach1')
+    # 10 payloads so far: start BACKFILL_PAYLOADS before the next one
+    assert [next(iter(p['changedTablesById']['tbl1']['changedRecordsById'])) for p in payloads] == \
+        ['rec7', 'rec8', 'rec9', 'rec10']
+    assert api.requests[0] == ('webhooks', None)
+    assert mirror.load_state('webhook-cursor:ach1') == 11
+
+
+def test_saved_cursor_is_shared_and_survives_restarts(api, monkeypatch):
+    webhooks.fetch_payloads('app1', 'ach1')
+    api.payloads.append(payload('tbl1', created=['rec11']))
+
+    # Another worker (or a restart): nothing in memory, the store has the cursor
+    monkeypatch.setattr(webhooks, '_cursors', {})
+    api.requests.clear()
+    payloads = webhooks.fetch_payloads('app1', 'ach1')
+    assert api.requests == [('payloads', 11)]
+    assert payloads == [api.payloads[-1]]
+    assert mirror.load_state('webhook-cursor:ach1') == 12
+
+
+def test_cursor_kept_in_memory_without_persistence(api, monkeypatch):
+    monkeypatch.setattr(mirror, 'SNAPSHOT_PATH', '')
+    webhooks.fetch_payloads('app1', 'ach1')
+    api.requests.clear()
+    assert webhooks.fetch_payloads('app1', 'ach1') == []
+    assert api.requests == [('payloads', 11)]
+
+
+def test_collect_changes_keeps_the_last_word_per_record():
+    tables = webhooks.collect_changes([
+        payload('tbl1', created=['rec1', 'rec2'], changed=['rec3']),
+        payload('tbl1', destroyed=['rec1', 'rec4']),
+        payload('tbl1', created=['rec4']),
+        payload('tbl2', changed=['rec9']),
+    ])
+    assert tables == {
+        'tbl1': ({'rec2', 'rec3', 'rec4'}, {'rec1'}),
+        'tbl2': ({'rec9'}, set()),
+    }
@@ -0,0 +1,150 @@
+"""
+Dot Remote API - Traffic Traces
+Capture mode: append one JSON line per request to TRACE_PATH, for
+bench/replay.py to play back against the local stand-ins.
+
+Traces are sanitized as they are written. Each line keeps the route, the
+method, the path, the outcome and the timing. Everything else is reduced:
+- Only the query params and body keys listed below keep their values.
+  Any other string becomes "<str:N>", with N its length, so payload size
+  survives but the text doesn't.
+- Session IDs are hashed. A conversation can still be followed across
+  its requests without the ID being stored.
+- Headers are never recorded.
+
+    {"ts": 1760000000.123, "method": "POST", "route": "/tracker/update",
+     "path": "/tracker/update", "args": {}, "body": {"id": "rec...",
+     "spend": 1200, "description": "<str:48>"}, "status": 200, "ms": 41.7,
+     "session": null}
+
+Capture is off unless TRACE_PATH is set. Workers append to the same file;
+each line goes out in a single write on an O_APPEND descriptor, so lines
+don't interleave.
+"""
+
+import os
+import json
+import time
+import random
+import hashlib
+import threading
+
+# ===== CONFIGURATION =====
+# File traces are appended to (unset = capture off)
+TRACE_PATH = os.environ.get('TRACE_PATH')
+
+# Fraction of traffic captured. Ask Dot sessions are kept or dropped whole.
+TRACE_SAMPLE = float(os.environ.get('TRACE_SAMPLE', 1.0))
+
+# Capture stops once the file reaches this size
+TRACE_MAX_BYTES = int(float(os.environ.get('TRACE_MAX_MB', 100)) * 1024 * 1024)
+
+# Values kept as sent - change cursors, codes, record IDs, numbers and pick-list
+# values. Free text (q, search) and page cursors, which encode job numbers and
+# record IDs of this base, are reduced like any other string
+KEEP_ARGS = {'since', 'client', 'format', 'limit', 'view', 'fields', 'status', 'stage',
+             'dateRange', 'dateField', 'withClient', 'active'}
+KEEP_BODY = {'id', 'code', 'stage', 'status', 'month', 'spendType', 'ballpark',
+             'withClient', 'spend', 'updateDue', 'liveDate'}
+
+# Debug traffic isn't part of the mix
+SKIP_ROUTES = {'/debug/profiles/<profile_id>'}
+
+_fd = None
+_pid = None
+_full = False
+_lock = threading.Lock()
+
+
+# ===== SANITIZING =====
+def shape(value, key=None):
+    """value with every string not under a KEEP_BODY key replaced by its length"""
+    if isinstance(value, dict):
+        return {k: shape(v, k) for k, v in value.items()}
+    if isinstance(value, list):
+        return [shape(item, key) for item in value]
+    if isinstance(value, str) and key not in KEEP_BODY:
+        return f'<str:{len(value)}>'
+    return value
+
+
+def session_hash(session_id):
+    if not session_id:
+        return None
+    return hashlib.sha256(str(session_id).encode()).hexdigest()[:12]
+
+
+def sanitize(request, status, seconds):
+    """One trace for a finished Flask request"""
+    body = request.get_json(silent=True) if request.method in ('POST', 'PUT', 'PATCH') else None
+    session_id = body.get('sessionId') if isinstance(body, dict) else None
+    if isinstance(body, dict):
+        body = {k: v for k, v in body.items() if k != 'sessionId'}
+    return {
+        'ts': round(time.time() - seconds, 3),
+        'method': request.method,
+        'route': request.url_rule.rule if request.url_rule else None,
+        'path': request.path,
+        'args': {k: v if k in KEEP_ARGS else f'<str:{len(v)}>'
+                 for k, v in request.args.items() if k != 'profile'},
+        'body': shape(body),
+        'status': status,
+        'ms': round(seconds * 1000, 1),
+        'session': session_hash(session_id),
+    }
+
+
+def sampled(session):
+    if TRACE_SAMPLE >= 1:
+        return True
+    if session:
+        return int(session, 16) / 16 ** len(session) < TRACE_SAMPLE
+    return random.random() < TRACE_SAMPLE
+
+
+# ===== CAPTURE =====
+def _open():
+    """This process's descriptor for TRACE_PATH (reopened after a fork)"""
+    global _fd, _pid
+    if _pid != os.getpid():
+        _fd = os.open(TRACE_PATH, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        _pid = os.getpid()
+    return _fd
+
+
+def record(request, status, seconds):
+    """Append a trace for a finished request, if capture is on"""
+    global _full
+    if not TRACE_PATH or _full or not request.url_rule or request.url_rule.rule in SKIP_ROUTES:
+        return
+
+    try:
+        trace = sanitize(request, status, seconds)
+        if not sampled(trace['session']):
+            return
+        line = (json.dumps(trace, separators=(',', ':')) + '\n').encode()
+        with _lock:
+            fd = _open()
+            if os.fstat(fd).st_size >= TRACE_MAX_BYTES:
+                _full = True
+                print(f"[traces] {TRACE_PATH} reached {TRACE_MAX_BYTES // (1024 * 1024)} MB - capture stopped")
+                return
+            os.write(fd, line)
+    except Exception as e:
+        # Never fail a request over its trace
+        print(f"[traces] Recording failed: {e}")
+
+
+def read(path):
+    """Traces from a capture file, oldest first (lines that aren't traces are skipped)"""
+    traces = []
+    with open(path) as f:
+        for line in f:
+            try:
+                trace = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(trace, dict) and 'route' in trace and 'ts' in trace:
+                traces.append(trace)
+    traces.sort(key=lambda trace: trace['ts'])
+    return traces
@@ -0,0 +1,276 @@
+"""
+Dot Remote API - Record Transforms
+Airtable records -> frontend dicts. Batch transformers for Projects (shared
+by app.py, the mirrors and airtable.py job cards) and Tracker.
+"""
+
+import re
+import sys
+from datetime import date, datetime
+from functools import lru_cache
+
+# ===== PATTERNS =====
+FRIENDLY_DATE_RE = re.compile(
+    r'(\d{1,2})\s+(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)', re.IGNORECASE
+)
+SLASH_DATE_RE = re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4})')
+
+MONTHS = {'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+          'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12}
+
+
+# ===== DATE PARSING =====
+def parse_friendly_date(friendly_str, today=None):
+    """Parse friendly date formats into ISO format"""
+    if not friendly_str or friendly_str.upper() == 'TBC':
+        return None
+    return _parse_friendly_date(friendly_str, today or date.today())
+
+
+@lru_cache(maxsize=4096)
+def _parse_friendly_date(friendly_str, today):
+    # Keyed on (string, day): "14 Mar" means a different year depending on
+    # today, and lots of jobs share the same handful of friendly strings
+    match = FRIENDLY_DATE_RE.search(friendly_str)
+    if match:
+        day = int(match.group(1))
+        month = MONTHS[match.group(2).lower()]
+        try:
+            parsed = date(today.year, month, day)
+            if (today - parsed).days > 180:
+                parsed = date(today.year + 1, month, day)
+            return parsed.isoformat()
+        except ValueError:
+            return None
+
+    try:
+        return datetime.strptime(friendly_str, '%d %B %Y').strftime('%Y-%m-%d')
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=4096)
+def parse_status_changed(status_str):
+    """Parse Status Changed field into ISO date"""
+    if not status_str:
+        return None
+
+    if 'T' in status_str:
+        return status_str.split('T')[0]
+
+    match = SLASH_DATE_RE.search(status_str)
+    if match:
+        day, month, year = int(match.group(1)), int(match.group(2)), int(match.group(3))
+        try:
+            return date(year, month, day).isoformat()
+        except ValueError:
+            return None
+
+    return None
+
+
+def extract_client_code(job_number):
+    """Extract client code from job number like 'SKY 017' -> 'SKY'"""
+    if not job_number:
+        return None
+    parts = job_number.split(' ')
+    return parts[0] if parts else None
+
+
+# ===== PROJECTS =====
+
+# Fields transform_projects reads - requested via fields[] so Airtable skips
+# every other column. Keep in step with transform_projects.
+PROJECT_FIELDS = [
+    'Job Number', 'Project Name', 'Client', 'Description', 'Project Owner',
+    'Update Summary', 'Update', 'Update history', 'Update due friendly',
+    'Live Date', 'Last update made', 'Stage', 'Status', 'With Client?',
+    'Channel Url', 'Teams Channel ID'
+]
+
+class Job:
+    """
+    One transformed job, compact: a __slots__ record rather than a 16-key
+    dict, with status, stage and client code interned (a few values shared
+    by every job). It reads like the dict it replaces - job['status'],
+    job.get(...), dict(job) - and as_dict() is the JSON the Hub gets.
+
+    updateHistory is kept as Airtable sent it and only split and trimmed
+    when read, so jobs nobody asks about never build the list.
+    """
+
+    KEYS = (
+        'jobNumber', 'jobName', 'clientCode', 'client', 'description', 'projectOwner',
+        'update', 'updateHistory', 'updateDue', 'liveDate', 'lastUpdated', 'stage',
+        'status', 'withClient', 'channelUrl', 'teamsChannelId'
+    )
+    __slots__ = tuple(key for key in KEYS if key != 'updateHistory') + ('_history', '_history_limit')
+
+    def __init__(self, history, history_limit=None, **fields):
+        self._history = history
+        self._history_limit = history_limit
+        for key, value in fields.items():
+            setattr(self, key, value)
+
+    @property
+    def updateHistory(self):
+        history = self._history
+        if isinstance(history, str):
+            return [u.strip() for u in history.split('\n') if u.strip()]
+        if not isinstance(history, list):
+            return []
+        if self._history_limit is not None:
+            history = history[:self._history_limit]
+        return history
+
+    # ----- dict-like reads -----
+    def __getitem__(self, key):
+        if key not in self.KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self.KEYS else default
+
+    def __contains__(self, key):
+        return key in self.KEYS
+
+    def keys(self):
+        return self.KEYS
+
+    def as_dict(self):
+        return {key: getattr(self, key) for key in self.KEYS}
+
+    def __eq__(self, other):
+        if not isinstance(other, Job):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f'Job({self.jobNumber!r})'
+
+
+def transform_projects(records, history_limit=None, stage_default='Triage', status_default='Incoming'):
+    """
+    Transform a page of Airtable Projects records to frontend jobs (Job).
+    history_limit trims a list updateHistory (job cards only show the latest
+    few); a newline-separated string history is kept whole.
+    """
+    today = date.today()
+    parse_date = _parse_friendly_date
+    parse_changed = parse_status_changed
+
+    jobs = []
+    for record in records:
+        fields = record.get('fields', {})
+        get = fields.get
+        job_number = get('Job Number', '')
+
+        latest_update = get('Update Summary', '') or get('Update', '')
+        if '|' in latest_update:
+            latest_update = latest_update.rsplit('|', 1)[-1].strip()
+
+        update_due_friendly = get('Update due friendly', '')
+        if update_due_friendly and update_due_friendly.upper() != 'TBC':
+            update_due = parse_date(update_due_friendly, today)
+        else:
+            update_due = None
+
+        live_date_raw = get('Live Date', '')
+        if live_date_raw and live_date_raw.upper() != 'TBC':
+            live_date = parse_date(live_date_raw, today)
+        else:
+            live_date = None
+
+        # Update history - array or string, parsed when read (see Job)
+        jobs.append(Job(
+            get('Update history', []),
+            history_limit,
+            jobNumber=job_number,
+            jobName=get('Project Name', ''),
+            clientCode=_intern(job_number.split(' ')[0]) if job_number else None,
+            client=get('Client', ''),
+            description=get('Description', ''),
+            projectOwner=get('Project Owner', ''),
+            update=latest_update,
+            updateDue=update_due,
+            liveDate=live_date,
+            lastUpdated=parse_changed(get('Last update made', '')),
+            stage=_intern(get('Stage', stage_default)),
+            status=_intern(get('Status', status_default)),
+            withClient=bool(get('With Client?', False)),
+            channelUrl=get('Channel Url', ''),
+            teamsChannelId=get('Teams Channel ID', '')
+        ))
+
+    return jobs
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def transform_project(record):
+    """Transform one Airtable record to frontend format"""
+    return transform_projects([record])[0]
+
+
+# ===== TRACKER =====
+
+# Fields transform_tracker_rows reads. Keep in step with it.
+TRACKER_FIELDS = [
+    'Client Code', 'Job Number', 'Project Name', 'Owner', 'Tracker notes',
+    'Spend', 'Month', 'Spend type', 'Ballpark'
+]
+
+def _first(value):
+    """Lookup fields come back as lists - take the first value"""
+    if isinstance(value, list):
+        return value[0] if value else ''
+    return value
+
+
+def transform_tracker_rows(records):
+    """Transform a page of Tracker records to frontend spend rows"""
+    rows = []
+    for record in records:
+        fields = record.get('fields', {})
+        get = fields.get
+
+        spend = get('Spend', 0)
+        if isinstance(spend, str):
+            spend = float(spend.replace('$', '').replace(',', '') or 0)
+
+        rows.append({
+            'id': record.get('id'),
+            'client': _first(get('Client Code', '')),
+            'jobNumber': _first(get('Job Number', '')),
+            'projectName': _first(get('Project Name', '')),
+            'owner': _first(get('Owner', '')),
+            'description': get('Tracker notes', ''),
+            'spend': spend,
+            'month': get('Month', ''),
+            'spendType': get('Spend type', 'Project budget'),
+            'ballpark': bool(get('Ballpark', False)),
+        })
+
+    return rows
+
+
+# ===== CLIENTS & PEOPLE =====
+
+# Clients columns read by /clients and the budget view (budgets.py)
+CLIENT_FIELDS = [
+    'Client code', 'Clients', 'Teams ID', 'Sharepoint ID', 'Monthly Committed',
+    'Rollover Credit', 'Rollover use', 'Year end', 'Current Quarter',
+    'This month', 'JAN-MAR', 'APR-JUN', 'JUL-SEP', 'OCT-DEC'
+]
+
+# People columns read by /people and Ask Dot's people search
+PEOPLE_FIELDS = ['Name', 'Full name', 'Email Address', 'Phone Number', 'Client Link']
+
+def record_fields(records):
+    """Identity transform - each record's fields plus its id"""
+    return [dict(record.get('fields', {}), id=record.get('id')) for record in records]
@@ -0,0 +1,196 @@
+"""
+Dot Remote API - Airtable Webhooks
+Receives Airtable change notifications, reads the pending payloads and hands
+each table's changed/destroyed record IDs to whoever caches that table.
+
+Airtable's notification is only a ping: the body names the base and webhook,
+signed with the webhook's MAC secret. The actual changes come from the list
+payloads endpoint, read from the last cursor we've seen.
+
+The cursor is kept in the mirrors' SQLite file, so it is shared by every
+worker and survives restarts. With none saved yet, reading starts a few
+payloads before the webhook's current one rather than at its first (up to
+7 days back) - anything older is already in the mirrors from their sync.
+"""
+
+import os
+import hmac
+import json
+import base64
+import hashlib
+import threading
+
+import cache
+import mirror
+
+# ===== CONFIGURATION =====
+# macSecretBase64 from the webhook's create response
+AIRTABLE_WEBHOOK_SECRET = os.environ.get('AIRTABLE_WEBHOOK_SECRET')
+
+# Optional "tblXXX=Projects,tblYYY=Clients" - otherwise looked up via the meta API
+AIRTABLE_TABLE_IDS = os.environ.get('AIRTABLE_TABLE_IDS', '')
+
+SIGNATURE_HEADER = 'X-Airtable-Content-MAC'
+
+# Payloads read back when there's no saved cursor
+BACKFILL_PAYLOADS = int(os.environ.get('WEBHOOK_BACKFILL_PAYLOADS', 20))
+
+
+class WebhookError(Exception):
+    """Raised for notifications we refuse (bad signature, not configured)"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+# ===== SIGNATURES =====
+def sign(body, secret_b64):
+    """Header value Airtable sends for body: hmac-sha256=<hex>"""
+    digest = hmac.new(base64.b64decode(secret_b64), body, hashlib.sha256).hexdigest()
+    return f'hmac-sha256={digest}'
+
+
+def verify_signature(body, header, secret_b64=None):
+    secret_b64 = secret_b64 or AIRTABLE_WEBHOOK_SECRET
+    if not secret_b64 or not header:
+        return False
+    return hmac.compare_digest(sign(body, secret_b64), header)
+
+
+# ===== TABLE NAMES =====
+_table_names = {}
+
+def table_name(table_id):
+    """Payloads name tables by ID; handlers are registered by name"""
+    if not _table_names:
+        for pair in filter(None, AIRTABLE_TABLE_IDS.split(',')):
+            tid, _, name = pair.partition('=')
+            _table_names[tid.strip()] = name.strip()
+    if table_id not in _table_names:
+        response = cache.airtable_request(
+            'GET',
+            f'{cache.AIRTABLE_API_URL}/meta/bases/{cache.AIRTABLE_BASE_ID}/tables',
+            headers=cache.HEADERS
+        )
+        response.raise_for_status()
+        for table in response.json().get('tables', []):
+            _table_names[table['id']] = table['name']
+        # Remember misses too, so an unknown table doesn't cost a lookup per ping
+        _table_names.setdefault(table_id, None)
+    return _table_names[table_id]
+
+
+# ===== HANDLERS =====
+_handlers = {}
+
+def on_table(name):
+    """
+    Register handler(changed_ids, destroyed_ids) for a table name.
+    changed_ids covers created and updated records.
+    """
+    def register(handler):
+        _handlers.setdefault(name, []).append(handler)
+        return handler
+    return register
+
+
+# ===== PAYLOADS =====
+_cursors = {}                   # webhook id -> next payload cursor (without persistence)
+_lock = threading.Lock()        # one payload reader at a time - cursors must not race
+
+
+def starting_cursor(base_id, webhook_id):
+    """No saved cursor: BACKFILL_PAYLOADS before the webhook's next payload"""
+    response = cache.airtable_request(
+        'GET', f'{cache.AIRTABLE_API_URL}/bases/{base_id}/webhooks', headers=cache.HEADERS
+    )
+    response.raise_for_status()
+    for webhook in response.json().get('webhooks', []):
+        if webhook.get('id') == webhook_id:
+            return max(1, webhook.get('cursorForNextPayload', 1) - BACKFILL_PAYLOADS)
+    return None
+
+
+def load_cursor(base_id, webhook_id):
+    cursor = mirror.load_state(f'webhook-cursor:{webhook_id}')
+    if cursor is None:
+        cursor = _cursors.get(webhook_id)
+    if cursor is None:
+        cursor = starting_cursor(base_id, webhook_id)
+    return cursor
+
+
+def save_cursor(webhook_id, cursor):
+    _cursors[webhook_id] = cursor
+    mirror.save_state(f'webhook-cursor:{webhook_id}', cursor)
+
+
+def fetch_payloads(base_id, webhook_id):
+    """Every payload since the saved cursor for this webhook"""
+    url = f'{cache.AIRTABLE_API_URL}/bases/{base_id}/webhooks/{webhook_id}/payloads'
+    payloads = []
+    cursor = load_cursor(base_id, webhook_id)
+
+    while True:
+        params = {'cursor': cursor} if cursor else {}
+        response = cache.airtable_request('GET', url, headers=cache.HEADERS, params=params)
+        response.raise_for_status()
+        data = response.json()
+
+        payloads.extend(data.get('payloads', []))
+        cursor = data.get('cursor', cursor)
+        if not data.get('mightHaveMore'):
+            break
+
+    save_cursor(webhook_id, cursor)
+    return payloads
+
+
+def collect_changes(payloads):
+    """Fold payloads into {table id: (changed ids, destroyed ids)}"""
+    tables = {}
+    for payload in payloads:
+        for table_id, change in payload.get('changedTablesById', {}).items():
+            changed, destroyed = tables.setdefault(table_id, (set(), set()))
+            for record_id in change.get('createdRecordsById', {}):
+                changed.add(record_id)
+                destroyed.discard(record_id)
+            for record_id in change.get('changedRecordsById', {}):
+                changed.add(record_id)
+            for record_id in change.get('destroyedRecordIds', []):
+                changed.discard(record_id)
+                destroyed.add(record_id)
+    return tables
+
+
+def handle_notification(body, signature):
+    """
+    Verify a notification, read its payloads and run the table handlers.
+    Returns {table name: number of records touched}.
+    """
+    if not AIRTABLE_WEBHOOK_SECRET:
+        raise WebhookError('Webhooks not configured', status=503)
+    if not verify_signature(body, signature):
+        raise WebhookError('Invalid signature', status=401)
+
+    notification = json.loads(body)
+    base_id = notification.get('base', {}).get('id')
+    webhook_id = notification.get('webhook', {}).get('id')
+    if not base_id or not webhook_id:
+        raise WebhookError('Missing base or webhook ID')
+
+    with _lock:
+        payloads = fetch_payloads(base_id, webhook_id)
+
+    touched = {}
+    for table_id, (changed, destroyed) in collect_changes(payloads).items():
+        name = table_name(table_id)
+        for handler in _handlers.get(name, []):
+            try:
+                handler(changed, destroyed)
+            except Exception as e:
+                print(f"[webhooks] {name} handler failed: {e}")
+        touched[name or table_id] = len(changed) + len(destroyed)
+
+    return touched